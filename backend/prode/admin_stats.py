@@ -0,0 +1,206 @@
+"""Estadísticas del panel admin (`/api/admin/overview`).
+
+Las cifras de la base salen de un único aggregate condicional sobre
+`Prediction` (totales, actividad reciente y cobertura por provincia) más la
+búsqueda indexada del último resultado publicado. Se cachean
+`ADMIN_STATS_TTL` segundos: el polling del panel durante la ráfaga previa al
+deadline no multiplica la carga. Las tasas de rechazo salen de los contadores
+en memoria de `/api/metrics` (son del proceso que responde).
+
+`analytics()` (`/api/admin/analytics`) agrega en la base las altas y ediciones
+por minuto u hora y la distribución de los porcentajes nacionales por fuerza.
+"""
+import logging
+from datetime import timedelta
+from typing import Any, Dict, List, Optional
+
+from django.core.cache import cache
+from django.db.models import Count, F, FloatField, Q, Sum
+from django.db.models.fields.json import KeyTextTransform
+from django.db.models.functions import Cast, Floor, TruncHour, TruncMinute
+from django.utils import timezone
+
+from prode_backend import settings as app_settings
+from .metrics import HTTP_REQUESTS, VALIDATION_FAILURES, cache_lookup
+from .models import Prediction
+from .ranking import latest_published_results
+from .validators import get_schema
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY = 'prode:admin:overview'
+RATE_WINDOW_MINUTES = 5
+UPSERT_VIEW = 'PredictionUpsertView'
+
+
+def overview() -> Dict[str, Any]:
+    stats = cache.get(CACHE_KEY)
+    cache_lookup('admin_overview', stats is not None)
+    if stats is None:
+        stats = db_stats()
+        cache.set(CACHE_KEY, stats, app_settings.ADMIN_STATS_TTL)
+    out = dict(stats, deadline=app_settings.DEADLINE, after_deadline=app_settings.is_after_deadline())
+    out['validation'] = validation_stats()
+    if app_settings.WRITE_BEHIND:
+        from .submission_queue import pending_count
+        out['write_behind_pending'] = pending_count()
+    return out
+
+
+def db_stats() -> Dict[str, Any]:
+    now = timezone.now()
+    window = now - timedelta(minutes=RATE_WINDOW_MINUTES)
+    provincias = get_schema().provincias_sorted
+    aggregates = {
+        'total': Count('id'),
+        'completed': Count('id', filter=~Q(username='')),
+        'last_minute': Count('id', filter=Q(updated_at__gte=now - timedelta(minutes=1))),
+        'saved_in_window': Count('id', filter=Q(updated_at__gte=window)),
+        'created_in_window': Count('id', filter=Q(created_at__gte=window)),
+    }
+    # Una columna por provincia: sigue siendo una sola pasada sobre la tabla
+    aggregates.update({f'prov_{i}': Count('id', filter=Q(provinciales__has_key=p)) for i, p in enumerate(provincias)})
+    row = Prediction.objects.aggregate(**aggregates)
+    res = latest_published_results()
+
+    total = row['total']
+    coverage = {}
+    for i, prov in enumerate(provincias):
+        n = row[f'prov_{i}']
+        coverage[prov] = {'count': n, 'ratio': round(n / total, 4) if total else 0.0}
+    return {
+        'generated_at': now.isoformat(),
+        'predictions_total': total,
+        'predictions_completed': row['completed'],
+        'results_published': bool(res),
+        'results_published_at': res.published_at.isoformat() if res and res.published_at else None,
+        'submissions_last_minute': row['last_minute'],
+        'submissions_per_minute': round(row['saved_in_window'] / RATE_WINDOW_MINUTES, 2),
+        'new_predictions_per_minute': round(row['created_in_window'] / RATE_WINDOW_MINUTES, 2),
+        'province_coverage': coverage,
+    }
+
+
+def validation_stats() -> Dict[str, Any]:
+    """Envíos a `/api/predictions` y rechazos (400) de este proceso desde que arrancó."""
+    statuses = {status: n for (view, status), n in HTTP_REQUESTS.items() if view == UPSERT_VIEW}
+    attempts = int(sum(statuses.values()))
+    rejected = int(statuses.get('400', 0))
+    return {
+        'attempts': attempts,
+        'rejected': rejected,
+        'rejection_rate': round(rejected / attempts, 4) if attempts else 0.0,
+        'by_field': {field: int(n) for (field,), n in VALIDATION_FAILURES.items()},
+    }
+
+
+# --- Analytics (/api/admin/analytics) -----------------------------------------
+
+BUCKETS = {
+    # bucket: (función de truncado, paso, cantidad por defecto, máximo)
+    'minute': (TruncMinute, timedelta(minutes=1), 120, 1440),
+    'hour': (TruncHour, timedelta(hours=1), 48, 720),
+}
+QUANTILES = (0.1, 0.25, 0.5, 0.75, 0.9)
+EDIT_GRACE = timedelta(seconds=1)  # created_at/updated_at de un alta por ORM difieren en microsegundos
+
+
+def analytics(bucket: str = 'minute', span: Optional[int] = None, bins: int = 10) -> Dict[str, Any]:
+    key = f'{CACHE_KEY}:analytics:{bucket}:{span}:{bins}'
+    out = cache.get(key)
+    cache_lookup('admin_analytics', out is not None)
+    if out is None:
+        out = {
+            'generated_at': timezone.now().isoformat(),
+            'deadline': app_settings.DEADLINE,
+            'bucket': bucket,
+            'series': submission_series(bucket, span),
+            'national': national_distribution(bins),
+        }
+        cache.set(key, out, app_settings.ADMIN_STATS_TTL)
+    return out
+
+
+def submission_series(bucket: str = 'minute', span: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Altas y ediciones por minuto u hora (GROUP BY en la base), con ceros en los huecos.
+
+    Solo hay `created_at`/`updated_at`: cada pronóstico aporta su alta y su
+    última edición (las intermedias no quedan registradas).
+    """
+    trunc, step, default, hi = BUCKETS[bucket]
+    span = min(max(span or default, 1), hi)
+    end = trunc_datetime(timezone.now(), bucket)
+    start = end - step * (span - 1)
+
+    created = (
+        Prediction.objects.filter(created_at__gte=start)
+        .annotate(t=trunc('created_at')).values('t').annotate(n=Count('id')).values_list('t', 'n')
+    )
+    edited = (
+        Prediction.objects.filter(updated_at__gte=start, updated_at__gt=F('created_at') + EDIT_GRACE)
+        .annotate(t=trunc('updated_at')).values('t').annotate(n=Count('id')).values_list('t', 'n')
+    )
+    created, edited = dict(created), dict(edited)
+    series = []
+    for i in range(span):
+        t = start + step * i
+        series.append({'t': t.isoformat(), 'submissions': created.get(t, 0), 'edits': edited.get(t, 0)})
+    return series
+
+
+def trunc_datetime(dt, bucket: str):
+    dt = dt.replace(second=0, microsecond=0)
+    return dt.replace(minute=0) if bucket == 'hour' else dt
+
+
+def national_distribution(bins: int = 10) -> Dict[str, Any]:
+    """Distribución de los % nacionales pronosticados por fuerza.
+
+    Por fuerza, un GROUP BY sobre FLOOR(%) en la base (a lo sumo 101 filas);
+    media, cuantiles (interpolados dentro del punto) e histograma de `bins`
+    tramos se derivan de esos conteos.
+    """
+    out: Dict[str, Any] = {}
+    for force in get_schema().fuerzas_sorted:
+        value = Cast(KeyTextTransform(force, 'national_percentages'), FloatField())
+        try:
+            rows = list(
+                Prediction.objects.filter(national_percentages__has_key=force)
+                .annotate(p=Floor(value)).values('p')
+                .annotate(n=Count('id'), s=Sum(value)).values_list('p', 'n', 's')
+            )
+        except Exception as e:
+            logger.warning("national_distribution failed force=%s: %s: %s", force, type(e).__name__, e)
+            continue
+        points = {int(p): n for p, n, _ in rows if p is not None and 0 <= p <= 100}
+        count = sum(points.values())
+        if not count:
+            continue
+        total = sum(s or 0 for p, _, s in rows if p is not None and 0 <= p <= 100)
+        out[force] = {
+            'count': count,
+            'mean': round(total / count, 2),
+            'quantiles': {str(q): quantile(points, count, q) for q in QUANTILES},
+            'histogram': histogram(points, bins),
+        }
+    return out
+
+
+def quantile(points: Dict[int, int], count: int, q: float) -> float:
+    """Cuantil a partir de conteos por punto entero, asumiendo valores uniformes dentro de cada punto."""
+    rank = q * count
+    acc = 0
+    for p in sorted(points):
+        n = points[p]
+        if acc + n >= rank:
+            return round(p + (rank - acc) / n, 2) if p < 100 else 100.0
+        acc += n
+    return 100.0
+
+
+def histogram(points: Dict[int, int], bins: int) -> List[Dict[str, Any]]:
+    width = 100 / bins
+    counts = [0] * bins
+    for p, n in points.items():
+        counts[min(int(p // width), bins - 1)] += n
+    return [{'from': round(i * width, 2), 'to': round((i + 1) * width, 2), 'count': c} for i, c in enumerate(counts)]
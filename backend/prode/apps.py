@@ -4,3 +4,13 @@ from django.apps import AppConfig
 class ProdeConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'prode'
+
+    def ready(self):
+        # Compila el schema de validación al arrancar (no en el primer request)
+        from .validators import get_schema
+        get_schema()
+        # Registra la sincronización del store columnar en cada guardado
+        from . import columns  # noqa: F401
+        # y los deltas del consenso y de los contadores de jugadores en guardados por ORM
+        from . import consensus  # noqa: F401
+        from . import players  # noqa: F401
@@ -1,13 +1,28 @@
-from typing import Optional, Tuple
+import threading
+import time
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.contrib.auth.signals import user_logged_out
 from django.core import signing
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.utils import timezone
 from rest_framework.authentication import BaseAuthentication
 from rest_framework import exceptions
 
+from prode_backend import settings as app_settings
+from .models import AdminLogout
+
 # Salt compartida para firmar/verificar tokens del admin
 ADMIN_TOKEN_SALT = 'prode-admin-token'
 
+# Usuarios staff ya verificados, por (username, iat del token): (vence, pk, is_staff)
+_staff_cache: Dict[Tuple[str, int], Tuple[float, object, bool]] = {}
+_staff_lock = threading.Lock()
+STAFF_CACHE_MAX = 1024
+
 
 class AdminBearerAuthentication(BaseAuthentication):
     """Autenticación por token Bearer firmada con django.core.signing.
@@ -15,7 +30,18 @@ class AdminBearerAuthentication(BaseAuthentication):
     - Espera un encabezado Authorization: Bearer <token>
     - El token contiene un payload JSON con:
         {"u": <username>, "s": true, "iat": <ts>, "exp": <ts>}
-    - Verifica firma, expiración y que el usuario siga siendo staff.
+    - Verifica firma, expiración, que el usuario siga siendo staff y que el
+      token sea posterior a su último logout (`AdminLogout`).
+
+    La firma se verifica una vez por token (`_parse_token`) y el resultado se
+    cachea `ADMIN_AUTH_CACHE_TTL` segundos por (username, iat) como (pk,
+    is_staff): el polling del panel no consulta la tabla de usuarios en cada
+    request y cada request recibe su propia instancia liviana del usuario. El
+    cache es por proceso y se invalida al guardar o borrar el usuario y al
+    hacer logout, pero solo en el proceso que lo hizo: los demás workers siguen
+    aceptando un token revocado (o de un usuario que dejó de ser staff) hasta
+    que vence su entrada, como mucho `ADMIN_AUTH_CACHE_TTL` segundos. Lo mismo
+    vale para un `.update()` masivo, que no dispara señales.
     """
 
     keyword = 'Bearer'
@@ -24,28 +50,93 @@ class AdminBearerAuthentication(BaseAuthentication):
         header = request.META.get('HTTP_AUTHORIZATION') or request.headers.get('Authorization')
         if not header or not header.startswith(self.keyword + ' '):
             return None
-        token = header.split(' ', 1)[1].strip()
-        try:
-            payload = signing.loads(token, salt=ADMIN_TOKEN_SALT)
-        except Exception:
-            raise exceptions.AuthenticationFailed('Invalid token')
-
-        exp = payload.get('exp')
-        username = payload.get('u')
-        if not exp or not username:
-            raise exceptions.AuthenticationFailed('Invalid token payload')
-        now_ts = int(timezone.now().timestamp())
-        try:
-            if int(exp) < now_ts:
-                raise exceptions.AuthenticationFailed('Token expired')
-        except Exception:
-            raise exceptions.AuthenticationFailed('Invalid token exp')
+        username, iat, exp = _parse_token(header.split(' ', 1)[1].strip())
+        if exp < int(timezone.now().timestamp()):
+            raise exceptions.AuthenticationFailed('Token expired')
 
         user_model = get_user_model()
-        try:
-            user = user_model.objects.get(username=username)
-        except user_model.DoesNotExist:
-            raise exceptions.AuthenticationFailed('User not found')
-        if not getattr(user, 'is_staff', False):
-            raise exceptions.AuthenticationFailed('Not staff')
-        return (user, None)
+        hit = _cached_staff(username, iat)
+        if hit is None:
+            row = (user_model.objects.filter(username=username)
+                   .values_list('pk', 'is_staff', 'admin_logout__logged_out_at').first())
+            if row is None:
+                raise exceptions.AuthenticationFailed('User not found')
+            pk, is_staff, logged_out_at = row
+            if not is_staff:
+                raise exceptions.AuthenticationFailed('Not staff')
+            # iat tiene resolución de segundos: un token del mismo segundo que el logout se revoca
+            if logged_out_at is not None and iat <= int(logged_out_at.timestamp()):
+                raise exceptions.AuthenticationFailed('Token revoked')
+            hit = (pk, is_staff)
+            _remember_staff(username, iat, pk, is_staff)
+        pk, is_staff = hit
+        return (_light_user(user_model, pk, username, is_staff), None)
+
+
+@lru_cache(maxsize=256)
+def _parse_token(token: str) -> Tuple[str, int, int]:
+    """Firma y payload verificados: (username, iat, exp). Los errores no se cachean."""
+    try:
+        payload = signing.loads(token, salt=ADMIN_TOKEN_SALT)
+    except Exception:
+        raise exceptions.AuthenticationFailed('Invalid token')
+    exp = payload.get('exp')
+    username = payload.get('u')
+    if not exp or not username:
+        raise exceptions.AuthenticationFailed('Invalid token payload')
+    try:
+        return str(username), int(payload.get('iat') or 0), int(exp)
+    except (TypeError, ValueError):
+        raise exceptions.AuthenticationFailed('Invalid token exp')
+
+
+def _light_user(user_model, pk, username: str, is_staff: bool):
+    # Instancia propia del request; el resto de los campos se difiere (query al accederlos)
+    return user_model.from_db(None, [user_model._meta.pk.attname, 'username', 'is_staff'], (pk, username, is_staff))
+
+
+def _cached_staff(username: str, iat: int) -> Optional[Tuple[object, bool]]:
+    with _staff_lock:
+        hit = _staff_cache.get((username, iat))
+    if hit is None or hit[0] < time.monotonic():
+        return None
+    return hit[1], hit[2]
+
+
+def _remember_staff(username: str, iat: int, pk, is_staff: bool) -> None:
+    ttl = app_settings.ADMIN_AUTH_CACHE_TTL
+    if ttl <= 0:
+        return
+    with _staff_lock:
+        if len(_staff_cache) >= STAFF_CACHE_MAX:
+            now = time.monotonic()
+            for key in [k for k, (expires, _, _) in _staff_cache.items() if expires < now]:
+                del _staff_cache[key]
+            if len(_staff_cache) >= STAFF_CACHE_MAX:
+                _staff_cache.clear()
+        _staff_cache[(username, iat)] = (time.monotonic() + ttl, pk, is_staff)
+
+
+def invalidate_staff(username: Optional[str] = None, pk=None) -> None:
+    """Descarta los tokens cacheados de un usuario (por username o pk); sin argumentos, todos."""
+    with _staff_lock:
+        if username is None and pk is None:
+            _staff_cache.clear()
+            return
+        for key in [k for k, (_, cached_pk, _) in _staff_cache.items() if k[0] == username or (pk is not None and cached_pk == pk)]:
+            del _staff_cache[key]
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL, dispatch_uid='prode_admin_auth_saved')
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL, dispatch_uid='prode_admin_auth_deleted')
+def _invalidate_on_user_change(sender, instance, **kwargs):
+    # Cambios de is_staff, de username o bajas: el próximo request vuelve a la base
+    invalidate_staff(instance.get_username(), instance.pk)
+
+
+@receiver(user_logged_out, dispatch_uid='prode_admin_auth_logout')
+def _invalidate_on_logout(sender, request, user, **kwargs):
+    # Revoca los tokens emitidos hasta ahora: ya en este proceso, en los demás al vencer su cache
+    if user is not None:
+        AdminLogout.objects.update_or_create(user_id=user.pk, defaults={'logged_out_at': timezone.now()})
+        invalidate_staff(user.get_username(), user.pk)
@@ -0,0 +1,389 @@
+"""Scoring vectorizado (NumPy) para todo el set de pronósticos.
+
+Empaqueta los campos que usa `scoring.score_prediction` en arrays densos
+indexados por la lista de fuerzas de `validators.get_fuerzas()` y calcula
+MAE, errores y puntos de Top-3 de todas las filas con pocas operaciones.
+Los provinciales se empaquetan por provincia oficial (una matriz filas x
+fuerzas de esa provincia) y se puntúan igual, provincia por provincia.
+Las filas pueden venir del store columnar (`Columnar` + índices de Top-3):
+esos porcentajes se copian del buffer binario sin pasar por JSON.
+El resultado es idéntico al de la versión fila a fila: las sumas se acumulan
+en el mismo orden de fuerzas y los redondeos finales usan `round()` de Python.
+
+Si NumPy no está instalado se usa `score_prediction` fila por fila.
+"""
+import logging
+from dataclasses import dataclass
+from itertools import repeat
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depende del entorno
+    np = None
+
+from .models import Prediction, OfficialResults
+from .scoring import (
+    OfficialProvince, PROV_ACCURACY_POINTS, PROV_MAE_CAP, PROV_WINNER_POINTS, ScoringContext,
+    official_top3_of, score_bonus, score_prediction, scoring_context, to_float_or_zero,
+)
+from .columns import PICK_NONE, decode_national
+from .validators import get_schema
+
+logger = logging.getLogger(__name__)
+
+# (top3, national_percentages, participation, margin_1_2, provinciales, bonus)
+# Desde el store columnar: top3 = (pick1, pick2, pick3) y national = Columnar
+ScoreRow = Tuple[Any, Any, Any, Any, Any, Any]
+
+
+class Columnar(NamedTuple):
+    blob: bytes                 # float64 little-endian, una por fuerza de `forces`
+    forces: Tuple[str, ...]     # layout con que se escribió el blob
+
+TOP3_NONE = -1   # posición vacía o fuerza desconocida en el Top-3 del pronóstico
+TOP3_PAD = -2    # relleno del Top-3 oficial cuando hay menos de 3 fuerzas
+
+
+@dataclass
+class PackedPredictions:
+    forces: List[str]
+    national: Any          # (n, F) float64
+    participation: Any     # (n,) float64
+    participation_ok: Any  # (n,) bool; False => float() falló (se penaliza con 100)
+    margin: Any            # (n,) float64
+    margin_ok: Any         # (n,) bool
+    top3: Any              # (n, 3) int32, índice de fuerza o TOP3_NONE
+    fallback: List[int]    # filas con formatos atípicos: se puntúan fila a fila
+
+    def __len__(self):
+        return len(self.participation)
+
+
+@dataclass
+class PackedProvinces:
+    provinces: List[OfficialProvince]
+    rows: List[Any]        # por provincia: (m,) intp, filas que la pronosticaron
+    hits: List[Any]        # por provincia: (m,) bool, acierto de ganador
+    values: List[Any]      # por provincia: (m, k) float64, columnas = fuerzas oficiales
+    fallback: List[int]
+
+
+def force_columns(nat_real: Dict[str, Any]) -> List[str]:
+    """Columnas de los arrays: fuerzas válidas + cualquier fuerza extra del oficial."""
+    schema = get_schema()
+    forces = list(schema.fuerzas_sorted)
+    known = schema.fuerzas
+    forces.extend(f for f in nat_real.keys() if f not in known)
+    return forces
+
+
+def pack_rows(rows: Sequence[ScoreRow], forces: List[str]) -> PackedPredictions:
+    # Se arma en listas de Python y se convierte una sola vez: asignar celda a
+    # celda sobre arrays de NumPy es varias veces más lento.
+    n = len(rows)
+    width = len(forces)
+    col = {f: j for j, f in enumerate(forces)}
+    empty_nat = [0.0] * width
+    layout = tuple(forces[:len(get_schema().fuerzas_sorted)])
+    national: List[List[float]] = []
+    json_rows: List[int] = []
+    blobs: List[bytes] = []
+    blob_rows: List[int] = []
+    top3: List[List[int]] = []
+    participation: List[float] = []
+    participation_ok: List[bool] = []
+    margin: List[float] = []
+    margin_ok: List[bool] = []
+    fallback: List[int] = []
+
+    for i, (t3, nat, part, marg, _prov, _bonus) in enumerate(rows):
+        if nat.__class__ is Columnar:
+            if nat.forces is layout or nat.forces == layout:
+                # Índices del store == columnas de los arrays (layout es prefijo de `forces`)
+                blobs.append(nat.blob)
+                blob_rows.append(i)
+                top3.append(list(t3))
+            else:
+                t3, nat = columnar_to_json(t3, nat)
+        if nat.__class__ is not Columnar:
+            nat = nat or {}
+            t3 = t3 or []
+            vals = empty_nat.copy()
+            picks = [TOP3_NONE, TOP3_NONE, TOP3_NONE]
+            if isinstance(nat, dict) and isinstance(t3, list):
+                for f, v in nat.items():
+                    j = col.get(f)
+                    if j is not None:
+                        # Equivale a to_float_or_zero, inline por ser el lazo más caliente
+                        try:
+                            vals[j] = float(v or 0)
+                        except Exception:
+                            pass
+                for k, f in enumerate(t3[:3]):
+                    try:
+                        picks[k] = col.get(f, TOP3_NONE)
+                    except TypeError:
+                        pass  # valor no hasheable: nunca coincide con el oficial
+            else:
+                fallback.append(i)
+            json_rows.append(i)
+            national.append(vals)
+            top3.append(picks)
+        if part.__class__ is float:
+            participation.append(part)
+            participation_ok.append(True)
+        else:
+            v, ok = _pack_float(part)
+            participation.append(v)
+            participation_ok.append(ok)
+        if marg.__class__ is float:
+            margin.append(marg)
+            margin_ok.append(True)
+        else:
+            v, ok = _pack_float(marg)
+            margin.append(v)
+            margin_ok.append(ok)
+
+    if not blob_rows:
+        nat_arr = np.array(national, dtype=np.float64).reshape(n, width)
+    else:
+        nat_arr = np.zeros((n, width), dtype=np.float64)
+        if json_rows:
+            nat_arr[json_rows] = np.array(national, dtype=np.float64).reshape(len(json_rows), width)
+        stored = np.frombuffer(b''.join(blobs), dtype='<f8').reshape(len(blob_rows), len(layout))
+        nat_arr[blob_rows, :len(layout)] = stored
+
+    return PackedPredictions(
+        forces=forces,
+        national=nat_arr,
+        participation=np.array(participation, dtype=np.float64),
+        participation_ok=np.array(participation_ok, dtype=bool),
+        margin=np.array(margin, dtype=np.float64),
+        margin_ok=np.array(margin_ok, dtype=bool),
+        top3=np.array(top3, dtype=np.int32).reshape(n, 3),
+        fallback=fallback,
+    )
+
+
+def columnar_to_json(picks: Sequence[int], nat: Columnar) -> Tuple[List[Any], Dict[str, float]]:
+    """Vuelve a la forma JSON (para layouts viejos o el camino fila a fila)."""
+    t3 = [nat.forces[j] if j != PICK_NONE else None for j in picks]
+    return t3, decode_national(nat.blob, nat.forces)
+
+
+def pack_provinces(rows: Sequence[ScoreRow], provinces: List[OfficialProvince]) -> PackedProvinces:
+    index = {off.name: j for j, off in enumerate(provinces)}
+    rows_by_prov: List[List[int]] = [[] for _ in provinces]
+    hits: List[List[bool]] = [[] for _ in provinces]
+    values: List[List[List[float]]] = [[] for _ in provinces]
+    fallback: List[int] = []
+
+    for i, row in enumerate(rows):
+        prov = row[4]
+        if not prov or not provinces:
+            continue
+        if not isinstance(prov, dict):
+            fallback.append(i)
+            continue
+        staged = []
+        for name, payload in prov.items():
+            j = index.get(name)
+            if j is None or not isinstance(payload, dict) or not payload:
+                continue
+            off = provinces[j]
+            hit = off.winner is not None and (payload.get('winner') or payload.get('ganador')) == off.winner
+            vals = None
+            if off.forces:
+                pcts = payload.get('porcentajes') or payload.get('percentages') or {}
+                if not isinstance(pcts, dict):
+                    break
+                vals = []
+                for f in off.forces:
+                    try:
+                        vals.append(float(pcts.get(f, 0) or 0))
+                    except Exception:
+                        vals.append(0.0)
+            staged.append((j, hit, vals))
+        else:
+            for j, hit, vals in staged:
+                rows_by_prov[j].append(i)
+                hits[j].append(hit)
+                if vals is not None:
+                    values[j].append(vals)
+            continue
+        fallback.append(i)
+
+    return PackedProvinces(
+        provinces=provinces,
+        rows=[np.array(r, dtype=np.intp) for r in rows_by_prov],
+        hits=[np.array(h, dtype=bool) for h in hits],
+        values=[
+            np.array(v, dtype=np.float64).reshape(len(v), len(off.forces))
+            for v, off in zip(values, provinces)
+        ],
+        fallback=fallback,
+    )
+
+
+def _pack_float(x: Any) -> Tuple[float, bool]:
+    try:
+        return float(x), True
+    except Exception:
+        return 0.0, False
+
+
+def score_packed(packed: PackedPredictions, res: OfficialResults) -> Dict[str, Any]:
+    """Devuelve arrays (n,) con score y cada componente del breakdown sin redondear."""
+    n = len(packed)
+    nat_real = res.national_percentages or {}
+    col = {f: j for j, f in enumerate(packed.forces)}
+
+    # MAE nacional: acumulación secuencial por fuerza oficial (mismo orden que mae_national)
+    real_forces = list(nat_real.keys())
+    abs_sum = np.zeros(n, dtype=np.float64)
+    for f in real_forces:
+        real_v = to_float_or_zero(nat_real.get(f, 0))
+        abs_sum += np.abs(packed.national[:, col[f]] - real_v)
+    mae = abs_sum / len(real_forces) if real_forces else abs_sum
+
+    part_err = _abs_error_vec(packed.participation, packed.participation_ok, res.participation)
+    margin_err = _abs_error_vec(packed.margin, packed.margin_ok, res.margin_1_2)
+
+    official = [col[f] for f in official_top3_of(nat_real)]
+    official += [TOP3_PAD] * (3 - len(official))
+    points = np.zeros(n, dtype=np.float64)
+    for k in range(3):
+        picked = packed.top3[:, k]
+        exact = picked == official[k]
+        member = np.isin(picked, official)
+        points += np.where(exact, 10.0, np.where(member, 5.0, 0.0))
+    top3_err = 30.0 - points
+
+    err = (mae * 0.5) + (part_err * 0.25) + (margin_err * 0.25) + (top3_err * (2.0/3.0))
+    raw = 100.0 - err
+    return {
+        'national_score': np.where(raw > 0.0, raw, 0.0),
+        'mae_national': mae,
+        'participation_error': part_err,
+        'margin_error': margin_err,
+        'top3_points': points,
+    }
+
+
+def score_provinces(packed: PackedProvinces, n: int) -> Dict[str, Any]:
+    """Puntos provinciales por fila; mismo orden de acumulación que `provincial_scores`."""
+    total = np.zeros(n, dtype=np.float64)
+    winners = np.zeros(n, dtype=np.int64)
+    mae_sum = np.zeros(n, dtype=np.float64)
+    mae_n = np.zeros(n, dtype=np.int64)
+    per_prov: List[Dict[str, float]] = [{} for _ in range(n)]
+
+    for off, idx, hit, vals in zip(packed.provinces, packed.rows, packed.hits, packed.values):
+        if not len(idx):
+            continue
+        pts = np.where(hit, PROV_WINNER_POINTS, 0.0)
+        if off.forces:
+            abs_sum = np.zeros(len(idx), dtype=np.float64)
+            for c, real_v in enumerate(off.reals):
+                abs_sum += np.abs(vals[:, c] - real_v)
+            mae = abs_sum / len(off.forces)
+            acc = 1.0 - mae / PROV_MAE_CAP
+            pts = pts + PROV_ACCURACY_POINTS * np.where(acc > 0.0, acc, 0.0)
+            mae_sum[idx] += mae
+            mae_n[idx] += 1
+        total[idx] += pts
+        winners[idx] += hit
+        for i, v in zip(idx.tolist(), map(round, pts.tolist(), repeat(2))):
+            per_prov[i][off.name] = v
+
+    mae_avg = np.divide(mae_sum, mae_n, out=np.zeros(n, dtype=np.float64), where=mae_n > 0)
+    return {
+        'provincial_points': total,
+        'provincial_winners': winners,
+        'provincial_mae': mae_avg,
+        'provincias': per_prov,
+    }
+
+
+def _abs_error_vec(pred, pred_ok, real: Any):
+    try:
+        r = float(real)
+    except Exception:
+        return np.zeros(len(pred), dtype=np.float64)
+    return np.abs(np.where(pred_ok, pred, 100.0) - r)
+
+
+def score_rows(rows: Sequence[ScoreRow], res: OfficialResults,
+               ctx: Optional[ScoringContext] = None) -> List[Optional[Dict[str, Any]]]:
+    """Puntúa todas las filas; el resultado de cada una es igual a `score_prediction`.
+
+    Las filas que `score_prediction` no puede puntuar devuelven None.
+    """
+    if ctx is None:
+        ctx = scoring_context(res)
+    if np is None:
+        return [_score_row(r, res, ctx) for r in rows]
+
+    packed = pack_rows(rows, force_columns(res.national_percentages or {}))
+    packed_prov = pack_provinces(rows, ctx.provinces)
+    arrays = score_packed(packed, res)
+    prov = score_provinces(packed_prov, len(packed))
+    # Bonus: respuestas resueltas una vez en ctx, una pasada sobre las filas
+    bonuses = [score_bonus(row[5], ctx.answers) for row in rows]
+    arrays['score'] = (
+        arrays['national_score'] + prov['provincial_points']
+        + np.array([b for b, _ in bonuses], dtype=np.float64)
+    )
+    arrays['provincial_points'] = prov['provincial_points']
+    arrays['provincial_mae'] = prov['provincial_mae']
+    # top3_points son múltiplos exactos de 5: round(x, 2) no los cambia
+    rounded = {k: list(map(round, v.tolist(), repeat(2))) for k, v in arrays.items() if k != 'top3_points'}
+    rounded['top3_points'] = arrays['top3_points'].tolist()
+
+    out: List[Optional[Dict[str, Any]]] = [
+        {
+            'score': score,
+            'bonus': bonus,
+            'medals': medals,
+            'breakdown': {
+                'mae_national': mae,
+                'participation_error': part,
+                'margin_error': margin,
+                'top3_points': points,
+                'national_score': national,
+                'provincial_points': prov_pts,
+                'provincial_winners': prov_win,
+                'provincial_mae': prov_mae,
+                'provincias': per_prov,
+            },
+        }
+        for score, mae, part, margin, points, national, prov_pts, prov_win, prov_mae, per_prov, (bonus, medals) in zip(
+            rounded['score'], rounded['mae_national'], rounded['participation_error'],
+            rounded['margin_error'], rounded['top3_points'], rounded['national_score'],
+            rounded['provincial_points'], prov['provincial_winners'].tolist(),
+            rounded['provincial_mae'], prov['provincias'], bonuses,
+        )
+    ]
+    for i in set(packed.fallback).union(packed_prov.fallback):
+        out[i] = _score_row(rows[i], res, ctx)
+    return out
+
+
+def score_predictions(preds: Iterable[Prediction], res: OfficialResults) -> List[Optional[Dict[str, Any]]]:
+    rows = [(p.top3, p.national_percentages, p.participation, p.margin_1_2, p.provinciales, p.bonus) for p in preds]
+    return score_rows(rows, res)
+
+
+def _score_row(row: ScoreRow, res: OfficialResults,
+               ctx: Optional[ScoringContext] = None) -> Optional[Dict[str, Any]]:
+    t3, nat, part, marg, prov, bonus = row
+    if nat.__class__ is Columnar:
+        t3, nat = columnar_to_json(t3, nat)
+    p = Prediction(top3=t3, national_percentages=nat, participation=part, margin_1_2=marg,
+                   provinciales=prov, bonus=bonus)
+    try:
+        return score_prediction(p, res, ctx)
+    except Exception as row_err:
+        logger.warning("score_rows row error: %s: %s", type(row_err).__name__, row_err)
+        return None
@@ -0,0 +1,225 @@
+"""Benchmark de la API pública (`manage.py bench_api`).
+
+Dos cargas mixtas que reproducen los picos reales:
+
+- `deadline`: ráfaga de envíos antes del cierre (upserts + `/players` + `/results`).
+- `results`: estampida de la noche de resultados (ranking, resultados y players).
+
+Cada request se mide con el test client de Django (en proceso, cuenta queries)
+o contra un servidor local por HTTP. El reporte trae p50/p95/p99, throughput y
+queries por request para cada endpoint, y se compara contra un baseline guardado.
+"""
+import json
+import math
+import random
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from .seeding import official_payload, player_email, player_payload
+
+ENDPOINTS = ('/api/predictions', '/api/ranking', '/api/players', '/api/results')
+
+# Mezcla de cada escenario: (endpoint, peso)
+SCENARIOS: Dict[str, Tuple[Tuple[str, int], ...]] = {
+    'deadline': (('/api/predictions', 70), ('/api/players', 20), ('/api/results', 10)),
+    'results': (('/api/ranking', 60), ('/api/results', 30), ('/api/players', 10)),
+}
+
+# Fracción de envíos de emails que todavía no existen (altas en plena ráfaga)
+NEW_PLAYER_RATIO = 0.1
+# Margen mínimo (ms) para considerar regresión de latencia: debajo es ruido
+LATENCY_FLOOR_MS = 2.0
+# Queries por request: se tolera este desvío sobre el promedio del baseline
+QUERIES_SLACK = 0.5
+
+
+class BenchRequest(NamedTuple):
+    endpoint: str
+    method: str
+    params: Dict[str, Any]
+    body: Optional[Dict[str, Any]] = None
+
+
+class Sample(NamedTuple):
+    endpoint: str
+    status: int
+    seconds: float
+    queries: Optional[int]
+
+
+class ClientTransport:
+    """Django test client contra la base configurada; cuenta queries por request."""
+    name = 'client'
+
+    def __init__(self):
+        self.client = Client()
+
+    def send(self, req: BenchRequest) -> Sample:
+        with CaptureQueriesContext(connection) as ctx:
+            t0 = time.perf_counter()
+            if req.method == 'POST':
+                resp = self.client.post(req.endpoint, data=req.body, content_type='application/json')
+            else:
+                resp = self.client.get(req.endpoint, req.params)
+            if resp.streaming:
+                b''.join(resp.streaming_content)
+            elapsed = time.perf_counter() - t0
+        return Sample(req.endpoint, resp.status_code, elapsed, len(ctx.captured_queries))
+
+
+class HttpTransport:
+    """Requests HTTP a un servidor local (`runserver`, gunicorn, uvicorn). Sin conteo de queries."""
+    name = 'http'
+
+    def __init__(self, base_url: str, timeout: float = 30.0):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def send(self, req: BenchRequest) -> Sample:
+        url = self.base_url + req.endpoint
+        data = None
+        headers = {}
+        if req.method == 'POST':
+            data = json.dumps(req.body).encode('utf-8')
+            headers['Content-Type'] = 'application/json'
+        elif req.params:
+            url += '?' + urllib.parse.urlencode(req.params)
+        t0 = time.perf_counter()
+        try:
+            with urllib.request.urlopen(urllib.request.Request(url, data=data, headers=headers), timeout=self.timeout) as r:
+                r.read()
+                status = r.status
+        except urllib.error.HTTPError as e:
+            status = e.code
+        except Exception:
+            status = 0
+        return Sample(req.endpoint, status, time.perf_counter() - t0, None)
+
+
+def build_requests(scenario: str, count: int, players: int, rng: random.Random) -> List[BenchRequest]:
+    """Secuencia reproducible (según `rng`) de requests del escenario."""
+    mix = SCENARIOS[scenario]
+    endpoints = [e for e, _ in mix]
+    weights = [w for _, w in mix]
+    official = official_payload(rng)
+    out = []
+    for endpoint in rng.choices(endpoints, weights=weights, k=count):
+        out.append(_request_for(endpoint, players, official, rng))
+    return out
+
+
+def _request_for(endpoint: str, players: int, official: Dict[str, Any], rng: random.Random) -> BenchRequest:
+    if endpoint == '/api/predictions':
+        i = rng.randrange(max(1, int(players * (1 + NEW_PLAYER_RATIO))))
+        return BenchRequest(endpoint, 'POST', {}, player_payload(i, official, rng))
+    if endpoint == '/api/ranking':
+        r = rng.random()
+        if r < 0.7:
+            params = {'limit': 50}
+        elif r < 0.9:
+            params = {'email': player_email(rng.randrange(max(1, players))), 'window': 5}
+        else:
+            params = {'limit': 100, 'compact': 1}
+        return BenchRequest(endpoint, 'GET', params)
+    if endpoint == '/api/players':
+        return BenchRequest(endpoint, 'GET', {'limit': 1000} if rng.random() < 0.2 else {})
+    return BenchRequest(endpoint, 'GET', {})
+
+
+def run_requests(transport, requests: Sequence[BenchRequest], concurrency: int = 1) -> Tuple[List[Sample], float]:
+    """Ejecuta `requests` y devuelve (muestras, segundos de pared)."""
+    t0 = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            samples = list(pool.map(transport.send, requests))
+    else:
+        samples = [transport.send(r) for r in requests]
+    return samples, time.perf_counter() - t0
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """Percentil por rango más cercano (0 si no hay valores)."""
+    if not values:
+        return 0.0
+    s = sorted(values)
+    return s[max(0, math.ceil(q / 100.0 * len(s)) - 1)]
+
+
+def summarize(samples: Sequence[Sample], wall: float) -> Dict[str, Any]:
+    endpoints: Dict[str, Any] = {}
+    for endpoint in ENDPOINTS:
+        mine = [s for s in samples if s.endpoint == endpoint]
+        if not mine:
+            continue
+        ms = [s.seconds * 1000.0 for s in mine]
+        queries = [s.queries for s in mine if s.queries is not None]
+        endpoints[endpoint] = {
+            'requests': len(mine),
+            'errors': sum(1 for s in mine if not 200 <= s.status < 400),
+            'p50_ms': round(percentile(ms, 50), 3),
+            'p95_ms': round(percentile(ms, 95), 3),
+            'p99_ms': round(percentile(ms, 99), 3),
+            'rps': round(len(mine) / wall, 1) if wall else 0.0,
+            'queries_per_request': round(sum(queries) / len(queries), 2) if queries else None,
+        }
+    return {
+        'requests': len(samples),
+        'wall_s': round(wall, 3),
+        'rps': round(len(samples) / wall, 1) if wall else 0.0,
+        'endpoints': endpoints,
+    }
+
+
+def comparable(report: Dict[str, Any], baseline: Dict[str, Any]) -> bool:
+    """Solo se comparan corridas con la misma configuración (jugadores, volumen, transporte)."""
+    keys = ('players', 'requests', 'transport', 'concurrency', 'seed')
+    return all(report['config'].get(k) == baseline.get('config', {}).get(k) for k in keys)
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float,
+            floor_ms: float = LATENCY_FLOOR_MS) -> List[str]:
+    """Regresiones de `report` respecto de `baseline`, en texto legible."""
+    problems = []
+    for name, base in baseline.get('scenarios', {}).items():
+        cur = report['scenarios'].get(name)
+        if cur is None:
+            continue
+        if base['rps'] and cur['rps'] < base['rps'] / (1 + tolerance):
+            problems.append(f"{name}: throughput {cur['rps']} req/s < {base['rps']} req/s")
+        for endpoint, b in base['endpoints'].items():
+            c = cur['endpoints'].get(endpoint)
+            if c is None:
+                continue
+            label = f'{name} {endpoint}'
+            if c['errors'] > b['errors']:
+                problems.append(f"{label}: {c['errors']} errores (baseline {b['errors']})")
+            # p99 sale de pocas muestras por endpoint: se reporta pero no se usa de umbral
+            for key in ('p50_ms', 'p95_ms'):
+                if c[key] > b[key] * (1 + tolerance) and c[key] - b[key] > floor_ms:
+                    problems.append(f"{label}: {key} {c[key]} > {b[key]}")
+            bq, cq = b.get('queries_per_request'), c.get('queries_per_request')
+            if bq is not None and cq is not None and cq > bq + QUERIES_SLACK:
+                problems.append(f"{label}: {cq} queries/request > {bq}")
+    return problems
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    lines = []
+    for name, sc in report['scenarios'].items():
+        lines.append(f"{name}: {sc['requests']} requests en {sc['wall_s']} s ({sc['rps']} req/s)")
+        lines.append(f"  {'endpoint':<18}{'n':>6}{'err':>5}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'req/s':>9}{'q/req':>7}")
+        for endpoint, e in sc['endpoints'].items():
+            q = '-' if e['queries_per_request'] is None else e['queries_per_request']
+            lines.append(
+                f"  {endpoint:<18}{e['requests']:>6}{e['errors']:>5}{e['p50_ms']:>9}"
+                f"{e['p95_ms']:>9}{e['p99_ms']:>9}{e['rps']:>9}{q:>7}"
+            )
+    return '\n'.join(lines)
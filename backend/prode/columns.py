@@ -0,0 +1,147 @@
+"""Store columnar de pronósticos (`PredictionColumns`).
+
+Copia de ancho fijo de `national_percentages` y `top3` que el scoring lee
+sin decodificar JSON ni instanciar modelos. Se mantiene al día en cada
+camino de escritura: `post_save` de `Prediction`, `upsert_prediction` y el
+import por lotes. Es derivado: si una sincronización falla (`try_sync_columns`)
+las lecturas caen al JSON original.
+"""
+import hashlib
+import logging
+import struct
+from typing import Any, Iterable, List, Optional, Sequence, Tuple
+
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .models import Prediction, PredictionColumns
+from .validators import get_schema
+
+logger = logging.getLogger(__name__)
+
+COLUMN_FIELDS = ('layout', 'synced_at', 'national', 'pick1', 'pick2', 'pick3', 'exotic')
+BULK_BATCH_SIZE = 1000
+PICK_NONE = -1
+
+
+def layout_key(forces: Sequence[str]) -> str:
+    return hashlib.sha1('\x1f'.join(forces).encode('utf-8')).hexdigest()[:16]
+
+
+def current_layout() -> Tuple[Tuple[str, ...], str]:
+    forces = get_schema().fuerzas_sorted
+    return forces, layout_key(forces)
+
+
+def encode_national(values: List[float]) -> bytes:
+    return struct.pack(f'<{len(values)}d', *values)
+
+
+def decode_national(blob: bytes, forces: Sequence[str]) -> dict:
+    return dict(zip(forces, struct.unpack(f'<{len(forces)}d', blob)))
+
+
+def pack_prediction(top3: Any, nat: Any, forces: Sequence[str]) -> Tuple[List[float], List[int], bool]:
+    """(porcentajes, picks, exotic) con la misma conversión que `batch_scoring.pack_rows`.
+
+    `exotic` marca formas que el layout no representa (no dict/list, fuerzas
+    fuera del layout): esas filas se siguen puntuando desde el JSON.
+    """
+    col = {f: j for j, f in enumerate(forces)}
+    vals = [0.0] * len(forces)
+    picks = [PICK_NONE, PICK_NONE, PICK_NONE]
+    nat = nat or {}
+    t3 = top3 or []
+    if not isinstance(nat, dict) or not isinstance(t3, list):
+        return vals, picks, True
+    exotic = False
+    for f, v in nat.items():
+        j = col.get(f)
+        if j is None:
+            exotic = True
+            continue
+        try:
+            vals[j] = float(v or 0)
+        except Exception:
+            pass
+    for k, f in enumerate(t3[:3]):
+        if isinstance(f, str):
+            j = col.get(f)
+            if j is None:
+                exotic = True
+            else:
+                picks[k] = j
+    return vals, picks, exotic
+
+
+def build_columns(p: Prediction, forces: Sequence[str], key: str) -> PredictionColumns:
+    vals, picks, exotic = pack_prediction(p.top3, p.national_percentages, forces)
+    return PredictionColumns(
+        prediction_id=p.pk,
+        layout=key,
+        synced_at=p.updated_at,
+        national=encode_national(vals),
+        pick1=picks[0],
+        pick2=picks[1],
+        pick3=picks[2],
+        exotic=exotic,
+    )
+
+
+def sync_columns(preds: Iterable[Prediction]) -> int:
+    """Escribe (upsert) la fila columnar de cada pronóstico. Devuelve cuántas."""
+    forces, key = current_layout()
+    objs = [build_columns(p, forces, key) for p in preds if p.pk is not None]
+    PredictionColumns.objects.bulk_create(
+        objs,
+        update_conflicts=True,
+        unique_fields=['prediction'],
+        update_fields=list(COLUMN_FIELDS),
+        batch_size=BULK_BATCH_SIZE,
+    )
+    return len(objs)
+
+
+def resync_all() -> int:
+    """Reconstruye el store completo (p. ej. tras cambiar `fuerzas.json`)."""
+    total = 0
+    batch: List[Prediction] = []
+    qs = Prediction.objects.order_by('id').only(
+        'id', 'updated_at', 'top3', 'national_percentages',
+    )
+    for p in qs.iterator(chunk_size=BULK_BATCH_SIZE):
+        batch.append(p)
+        if len(batch) >= BULK_BATCH_SIZE:
+            total += sync_columns(batch)
+            batch = []
+    if batch:
+        total += sync_columns(batch)
+    return total
+
+
+def is_fresh(layout: Optional[str], synced_at, updated_at, key: str) -> bool:
+    return layout == key and synced_at is not None and synced_at == updated_at
+
+
+def try_sync_columns(preds: Sequence[Prediction]) -> bool:
+    """`sync_columns` que tolera fallas. Dentro de una transacción corre en su
+    propio savepoint, así un error de la base no la deja abortada (PostgreSQL)
+    para quien llama; en autocommit no hay nada que proteger."""
+    try:
+        if transaction.get_connection().in_atomic_block:
+            with transaction.atomic():
+                sync_columns(preds)
+        else:
+            sync_columns(preds)
+        return True
+    except Exception:
+        logger.exception("sync_columns failed ids=%s", [p.pk for p in preds])
+        return False
+
+
+@receiver(post_save, sender=Prediction, dispatch_uid='prode_prediction_columns')
+def _sync_on_save(sender, instance: Prediction, raw: bool = False, **kwargs):
+    if raw:
+        return  # loaddata: se sincroniza con `sync_prediction_columns`
+    try_sync_columns([instance])
@@ -0,0 +1,172 @@
+"""Consenso de los jugadores: qué pronostica "el jugador promedio".
+
+`ConsensusStat` guarda por (provincia, fuerza) la cantidad de pronósticos con
+ese porcentaje, su suma y su suma de cuadrados. Cada camino de escritura
+aplica solo la diferencia entre lo que aportaba el pronóstico y lo que aporta
+ahora, en un único `INSERT … ON CONFLICT DO UPDATE` con sumas:
+
+- `upsert_prediction` y `ingest._write_batch` (ya leen el estado previo);
+- `pre_save`/`post_save` de `Prediction` para guardados por ORM (admin, tests);
+- `delete_predictions` para las bajas; `seeding` para las altas masivas.
+
+`/api/consensus` lee esas filas (O(fuerzas × provincias), sin importar cuántos
+jugadores haya) y cachea la respuesta `CONSENSUS_CACHE_TTL` segundos.
+`rebuild_consensus()` recalcula todo desde los pronósticos (comando
+`rebuild_consensus`), p. ej. tras cambios de datos por SQL directo.
+"""
+import math
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from django.db import connection, transaction
+from django.db.models.signals import post_save, pre_save
+from django.dispatch import receiver
+
+from .models import ConsensusStat, Prediction
+
+NATIONAL = ''
+ROWS_PER_STATEMENT = 150  # 5 parámetros por fila: dentro del límite de SQLite
+
+Key = Tuple[str, str]                  # (provincia | '', fuerza)
+Delta = Tuple[int, float, float]       # (count, total, total_sq)
+
+
+def _number(v: Any) -> Optional[float]:
+    try:
+        f = float(v)
+    except (TypeError, ValueError):
+        return None
+    return f if math.isfinite(f) else None
+
+
+def contributions(national: Any, provinciales: Any) -> Dict[Key, float]:
+    """Porcentajes que aporta un pronóstico, por (provincia, fuerza)."""
+    out: Dict[Key, float] = {}
+    if isinstance(national, dict):
+        for force, v in national.items():
+            f = _number(v)
+            if f is not None:
+                out[(NATIONAL, force)] = f
+    if isinstance(provinciales, dict):
+        for prov, payload in provinciales.items():
+            if not isinstance(payload, dict):
+                continue
+            pcts = payload.get('porcentajes') or payload.get('percentages') or {}
+            if not isinstance(pcts, dict):
+                continue
+            for force, v in pcts.items():
+                f = _number(v)
+                if f is not None:
+                    out[(prov, force)] = f
+    return out
+
+
+def diff(old: Dict[Key, float], new: Dict[Key, float], into: Optional[Dict[Key, Delta]] = None) -> Dict[Key, Delta]:
+    """Acumula en `into` el cambio de pasar de `old` a `new` (los valores iguales se cancelan)."""
+    into = {} if into is None else into
+    for key, v in old.items():
+        c, t, s = into.get(key, (0, 0.0, 0.0))
+        into[key] = (c - 1, t - v, s - v * v)
+    for key, v in new.items():
+        c, t, s = into.get(key, (0, 0.0, 0.0))
+        into[key] = (c + 1, t + v, s + v * v)
+    return into
+
+
+def apply_consensus_delta(delta: Dict[Key, Delta]) -> None:
+    """Suma los deltas a `ConsensusStat` en un solo statement (por bloque de filas)."""
+    rows = sorted((k, d) for k, d in delta.items() if d != (0, 0.0, 0.0))
+    if not rows:
+        return
+    meta = ConsensusStat._meta
+    qn = connection.ops.quote_name
+    table = qn(meta.db_table)
+    cols = [qn(meta.get_field(n).column) for n in ('province', 'force', 'count', 'total', 'total_sq')]
+    sums = ', '.join(f'{c} = {table}.{c} + excluded.{c}' for c in cols[2:])
+    # Orden fijo de filas: dos transacciones concurrentes las bloquean en el mismo orden
+    for i in range(0, len(rows), ROWS_PER_STATEMENT):
+        chunk = rows[i:i + ROWS_PER_STATEMENT]
+        sql = 'INSERT INTO {table} ({cols}) VALUES {vals} ON CONFLICT ({p}, {f}) DO UPDATE SET {sums}'.format(
+            table=table,
+            cols=', '.join(cols),
+            vals=', '.join(['(%s, %s, %s, %s, %s)'] * len(chunk)),
+            p=cols[0], f=cols[1], sums=sums,
+        )
+        params = [x for (prov, force), (c, t, s) in chunk for x in (prov, force, c, t, s)]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+
+
+def rebuild_consensus(batch_size: int = 1000) -> int:
+    """Recalcula el consenso completo desde los pronósticos. Devuelve cuántas filas quedaron."""
+    with transaction.atomic():
+        rows = Prediction.objects.order_by('id').values_list('national_percentages', 'provinciales')
+        delta = added_consensus_delta(rows.iterator(chunk_size=batch_size))
+        ConsensusStat.objects.all().delete()
+        apply_consensus_delta(delta)
+    return ConsensusStat.objects.count()
+
+
+def consensus_payload() -> Dict[str, Any]:
+    national: Dict[str, Any] = {}
+    provinces: Dict[str, Dict[str, Any]] = {}
+    for stat in ConsensusStat.objects.filter(count__gt=0).order_by('province', 'force'):
+        summary = summarize(stat.count, stat.total, stat.total_sq)
+        if stat.province == NATIONAL:
+            national[stat.force] = summary
+        else:
+            provinces.setdefault(stat.province, {})[stat.force] = summary
+    return {'national': national, 'provinces': provinces}
+
+
+def summarize(count: int, total: float, total_sq: float) -> Dict[str, Any]:
+    mean = total / count
+    # Sumas corrientes en float: la varianza puede dar -0.0000x por redondeo
+    variance = max(total_sq / count - mean * mean, 0.0)
+    return {'count': count, 'mean': round(mean, 2), 'stddev': round(math.sqrt(variance), 2)}
+
+
+def saved_consensus_delta(old: Optional[Tuple[Any, Any]], national: Any, provinciales: Any) -> Dict[Key, Delta]:
+    return diff(contributions(*old) if old else {}, contributions(national, provinciales))
+
+
+def added_consensus_delta(rows: Iterable[Tuple[Any, Any]]) -> Dict[Key, Delta]:
+    """Delta de dar de alta pronósticos (national_percentages, provinciales)."""
+    delta: Dict[Key, Delta] = {}
+    for nat, prov in rows:
+        diff({}, contributions(nat, prov), delta)
+    return delta
+
+
+def deleted_consensus_delta(rows: Iterable[Tuple[Any, Any]]) -> Dict[Key, Delta]:
+    """Delta de borrar pronósticos (national_percentages, provinciales)."""
+    delta: Dict[Key, Delta] = {}
+    for nat, prov in rows:
+        diff(contributions(nat, prov), {}, delta)
+    return delta
+
+
+def _touches_consensus(raw: bool, update_fields) -> bool:
+    return not raw and (update_fields is None or bool({'national_percentages', 'provinciales'} & set(update_fields)))
+
+
+@receiver(pre_save, sender=Prediction, dispatch_uid='prode_consensus_before')
+def _consensus_before_save(sender, instance: Prediction, raw: bool = False, update_fields=None, **kwargs):
+    # Instancia sin estado leído (armada a mano, `.only()`/`defer()`): se relee la fila previa
+    if instance.pk is None or getattr(instance, '_loaded_consensus', None) is not None:
+        return
+    if not _touches_consensus(raw, update_fields):
+        return
+    qs = Prediction.objects.filter(pk=instance.pk)
+    if not transaction.get_autocommit():
+        qs = qs.select_for_update()  # nadie la cambia hasta el post_save
+    instance._loaded_consensus = qs.values_list('national_percentages', 'provinciales').first()
+
+
+@receiver(post_save, sender=Prediction, dispatch_uid='prode_consensus')
+def _consensus_on_save(sender, instance: Prediction, created: bool, raw: bool = False, update_fields=None, **kwargs):
+    # Guardados por ORM; upsert, import y seed aplican su delta directamente
+    if not _touches_consensus(raw, update_fields):
+        return
+    old = None if created else getattr(instance, '_loaded_consensus', None)
+    apply_consensus_delta(saved_consensus_delta(old, instance.national_percentages, instance.provinciales))
+    instance._loaded_consensus = (instance.national_percentages, instance.provinciales)
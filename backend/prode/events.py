@@ -0,0 +1,180 @@
+"""Canal Server-Sent Events para avisar publicaciones de resultados.
+
+Un `Broadcaster` en memoria del proceso reparte cada evento a las conexiones
+abiertas: cada cliente es solo una `asyncio.Queue` chica y una corrutina
+dormida, por lo que miles de conexiones ociosas cuestan poco. La publicación
+llega por dos caminos:
+
+- `notify_results_published()` desde la vista sync que publica (mismo proceso);
+- un watcher por event loop que consulta la versión vigente cada
+  `SSE_POLL_SECONDS`, para enterarse de publicaciones hechas en otro worker.
+
+Ambos caminos deduplican por versión: el instante de publicación del
+OfficialResults vigente en microsegundos (`results_version`). No se usa el id
+porque un borrador viejo publicado después de uno nuevo, o una republicación,
+tienen id menor o igual al último enviado y nunca se difundirían.
+"""
+import asyncio
+import json
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from asgiref.sync import sync_to_async
+
+from prode_backend import settings as app_settings
+from .models import OfficialResults, RankingEntry
+from .ranking import latest_published_results
+
+logger = logging.getLogger(__name__)
+
+Subscriber = Tuple[asyncio.AbstractEventLoop, asyncio.Queue]
+
+
+def format_event(event: str, data: Dict[str, Any], event_id: Optional[int] = None) -> str:
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'event: {event}')
+    lines.append('data: ' + json.dumps(data, separators=(',', ':')))
+    return '\n'.join(lines) + '\n\n'
+
+
+class Broadcaster:
+    def __init__(self, queue_size: int = 16):
+        self._queue_size = queue_size
+        self._subscribers: Set[Subscriber] = set()
+        self._watchers: Dict[asyncio.AbstractEventLoop, asyncio.Task] = {}
+        self._lock = threading.Lock()
+        self.last_version: Optional[int] = None
+        self.last_message: Optional[str] = None
+
+    def subscribe(self) -> asyncio.Queue:
+        """Registra una conexión; debe llamarse dentro del event loop que la atiende."""
+        loop = asyncio.get_running_loop()
+        q: asyncio.Queue = asyncio.Queue(maxsize=self._queue_size)
+        with self._lock:
+            self._subscribers.add((loop, q))
+            if loop not in self._watchers or self._watchers[loop].done():
+                self._watchers[loop] = loop.create_task(self._watch())
+        return q
+
+    def unsubscribe(self, q: asyncio.Queue) -> None:
+        with self._lock:
+            self._subscribers = {s for s in self._subscribers if s[1] is not q}
+
+    @property
+    def connections(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, version: int, message: str) -> bool:
+        """Envía `message` a todas las conexiones. Thread-safe; ignora versiones ya enviadas."""
+        with self._lock:
+            if self.last_version is not None and version <= self.last_version:
+                return False
+            self.last_version = version
+            self.last_message = message
+            subscribers = list(self._subscribers)
+        for loop, q in subscribers:
+            try:
+                loop.call_soon_threadsafe(_offer, q, message)
+            except RuntimeError:
+                # Loop cerrado: la conexión ya no existe
+                self.unsubscribe(q)
+        return True
+
+    async def _watch(self) -> None:
+        interval = app_settings.SSE_POLL_SECONDS
+        while self._subscribers:
+            await asyncio.sleep(interval)
+            try:
+                payload = await sync_to_async(build_results_event)()
+            except Exception as e:
+                logger.warning("SSE watcher failed: %s: %s", type(e).__name__, e)
+                continue
+            if payload is None:
+                continue
+            version, message = payload
+            if self.last_version is None:
+                # Primera lectura del proceso: solo fija la versión de referencia
+                # (los clientes reciben el estado vigente al conectarse)
+                with self._lock:
+                    self.last_version, self.last_message = version, message
+                continue
+            self.publish(version, message)
+
+
+def _offer(q: asyncio.Queue, message: str) -> None:
+    # Cliente lento: se descarta lo más viejo, solo importa la última versión
+    if q.full():
+        try:
+            q.get_nowait()
+        except asyncio.QueueEmpty:
+            pass
+    q.put_nowait(message)
+
+
+broadcaster = Broadcaster(queue_size=app_settings.SSE_QUEUE_SIZE)
+
+
+def top_snapshot(n: int) -> List[Dict[str, Any]]:
+    qs = RankingEntry.objects.filter(position__lte=n).order_by('position')
+    return [
+        {'id': e.prediction_id, 'username': e.username, 'position': e.position, 'score': e.score}
+        for e in qs.only('prediction_id', 'username', 'position', 'score')
+    ]
+
+
+def ranking_diff(before: List[Dict[str, Any]], after: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Filas del top nuevo cuya posición o puntaje cambió (prev_position None = entra al top)."""
+    prev = {row['id']: row for row in before}
+    diff = []
+    for row in after:
+        old = prev.get(row['id'])
+        if old is None or old['position'] != row['position'] or old['score'] != row['score']:
+            diff.append({
+                'username': row['username'],
+                'position': row['position'],
+                'prev_position': old['position'] if old else None,
+                'score': row['score'],
+            })
+    return diff
+
+
+def results_version(res: OfficialResults) -> int:
+    """Versión monótona por publicación: `published_at` (o `created_at`) en microsegundos."""
+    stamp = res.published_at or res.created_at
+    return int(stamp.timestamp() * 1_000_000)
+
+
+def build_results_event(before_top: Optional[List[Dict[str, Any]]] = None,
+                        changes: Optional[Dict[str, Any]] = None) -> Optional[Tuple[int, str]]:
+    res = latest_published_results()
+    if res is None:
+        return None
+    version = results_version(res)
+    data: Dict[str, Any] = {
+        'id': res.id,
+        'version': version,
+        'published_at': res.published_at.isoformat() if res.published_at else None,
+    }
+    if changes is not None:
+        data['changes'] = changes
+    top_n = app_settings.SSE_TOP_N
+    if top_n:
+        after = top_snapshot(top_n)
+        data['top'] = [{k: row[k] for k in ('username', 'position', 'score')} for row in after]
+        if before_top is not None:
+            data['diff'] = ranking_diff(before_top, after)
+    return version, format_event('results', data, event_id=version)
+
+
+def notify_results_published(before_top: Optional[List[Dict[str, Any]]] = None,
+                             changes: Optional[Dict[str, Any]] = None) -> None:
+    try:
+        payload = build_results_event(before_top, changes)
+    except Exception as e:
+        logger.warning("SSE notify failed: %s: %s", type(e).__name__, e)
+        return
+    if payload is not None:
+        broadcaster.publish(*payload)
@@ -0,0 +1,113 @@
+"""Export del ranking en CSV por streaming.
+
+Lee el ranking materializado en bloques y va emitiendo líneas CSV (opcionalmente
+comprimidas con gzip) sin armar el archivo completo en memoria.
+"""
+import csv
+import zlib
+from typing import Iterable, Iterator, List, Sequence
+
+from .models import OfficialResults, RankingEntry
+from .scoring import BREAKDOWN_FIELDS, official_provinces
+
+BASE_HEADER = ['posicion', 'usuario', 'email', 'puntaje', 'bonus', 'enviado']
+CHUNK_ROWS = 500
+ITERATOR_CHUNK_SIZE = 2000
+PROVINCE_PREFIX = 'prov:'
+
+
+class _Echo:
+    """Pseudo-buffer para csv.writer: devuelve la línea en vez de escribirla."""
+
+    def write(self, value):
+        return value
+
+
+def parse_extra_columns(raw: str) -> List[str]:
+    """`extra=breakdown` agrega todo el breakdown; también se aceptan claves sueltas.
+
+    `provincias` se expande en `ranking_csv_lines` a una columna por provincia oficial.
+    """
+    cols: List[str] = []
+    for token in (raw or '').split(','):
+        token = token.strip()
+        if token == 'breakdown':
+            cols.extend(f for f in BREAKDOWN_FIELDS if f not in cols)
+        elif (token in BREAKDOWN_FIELDS or token == 'provincias') and token not in cols:
+            cols.append(token)
+    return cols
+
+
+def _expand_provinces(res: OfficialResults, extra: Sequence[str]) -> List[str]:
+    cols: List[str] = []
+    for c in extra:
+        if c == 'provincias':
+            cols.extend(PROVINCE_PREFIX + off.name for off in official_provinces(res))
+        else:
+            cols.append(c)
+    return cols
+
+
+def _extra_value(bd, col: str):
+    if col.startswith(PROVINCE_PREFIX):
+        return (bd.get('provincias') or {}).get(col[len(PROVINCE_PREFIX):], '')
+    return bd.get(col, '')
+
+
+def ranking_csv_lines(res: OfficialResults, extra: Sequence[str] = ()) -> Iterator[str]:
+    writer = csv.writer(_Echo())
+    extra = _expand_provinces(res, extra)
+    yield writer.writerow(BASE_HEADER + list(extra))
+    qs = RankingEntry.objects.filter(results=res).order_by('position')
+    if not extra:
+        qs = qs.defer('breakdown', 'medals')
+    buf: List[str] = []
+    for e in qs.iterator(chunk_size=ITERATOR_CHUNK_SIZE):
+        row = [e.position, e.username, e.email, e.score, e.bonus, e.submitted_at.isoformat()]
+        if extra:
+            bd = e.breakdown or {}
+            row.extend(_extra_value(bd, c) for c in extra)
+        buf.append(writer.writerow(row))
+        if len(buf) >= CHUNK_ROWS:
+            yield ''.join(buf)
+            buf = []
+    if buf:
+        yield ''.join(buf)
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """True si `Accept-Encoding` admite gzip con q > 0 (`gzip;q=0` lo rechaza).
+
+    Una entrada explícita de `gzip`/`x-gzip` manda sobre el comodín `*`.
+    """
+    explicit = wildcard = None
+    for part in (accept_encoding or '').split(','):
+        coding, _, params = part.partition(';')
+        coding = coding.strip().lower()
+        q = 1.0
+        for param in params.split(';'):
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if coding in ('gzip', 'x-gzip'):
+            explicit = q if explicit is None else max(explicit, q)
+        elif coding == '*':
+            wildcard = q
+    q = explicit if explicit is not None else wildcard
+    return q is not None and q > 0
+
+
+def encode_stream(lines: Iterable[str], gzip: bool = False) -> Iterator[bytes]:
+    if not gzip:
+        for chunk in lines:
+            yield chunk.encode('utf-8')
+        return
+    z = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 => contenedor gzip
+    for chunk in lines:
+        out = z.compress(chunk.encode('utf-8'))
+        if out:
+            yield out
+    yield z.flush()
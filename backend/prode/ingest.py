@@ -0,0 +1,194 @@
+"""Carga masiva de pronósticos (CSV o JSONL).
+
+Cada fila se valida igual que en `/api/predictions` (validators + serializer)
+y las válidas se escriben por lotes con `bulk_create(update_conflicts=True)`
+sobre el email. Un error de fila se reporta y no aborta el lote.
+
+A diferencia del upsert de la API, cada fila importada reemplaza el
+pronóstico completo: los campos ausentes vuelven a su valor por defecto.
+"""
+import csv
+import json
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from django.db import transaction
+
+from .columns import sync_columns
+from .consensus import apply_consensus_delta, contributions, diff
+from .models import Prediction, compute_completed
+from .players import apply_counter_delta, saved_delta
+from .predictions import WRITABLE_FIELDS
+from .serializers import PredictionUpsertSerializer
+from .validators import (
+    get_schema,
+    validate_national_fuerzas,
+    validate_provinciales,
+    validate_top3,
+    validate_bonus,
+)
+
+FORMATS = ('csv', 'jsonl')
+JSON_COLUMNS = ('top3', 'national_percentages', 'provinciales', 'bonus')
+DEFAULT_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+
+
+@dataclass
+class IngestReport:
+    rows: int = 0
+    created: int = 0
+    updated: int = 0
+    failed: int = 0
+    errors: List[Dict[str, Any]] = field(default_factory=list)
+
+    def add_error(self, line: int, email: Any, detail: Any) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line, 'email': email, 'errors': detail})
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'rows': self.rows,
+            'created': self.created,
+            'updated': self.updated,
+            'failed': self.failed,
+            'errors': self.errors,
+            'errors_truncated': self.failed > len(self.errors),
+        }
+
+
+def iter_rows(stream: Iterable[str], fmt: str) -> Iterator[Tuple[int, Any]]:
+    """Devuelve (número de línea, fila cruda) sin cargar el archivo entero.
+
+    `stream` es cualquier iterable de líneas de texto (archivo abierto, stdin...).
+    """
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, _from_csv(row)
+    elif fmt == 'jsonl':
+        for n, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield n, json.loads(line)
+            except ValueError as e:
+                yield n, ValueError(f'JSON inválido: {e}')
+    else:
+        raise ValueError(f'Formato "{fmt}" no soportado')
+
+
+def _from_csv(row: Dict[str, Any]) -> Any:
+    out: Dict[str, Any] = {}
+    for key, val in row.items():
+        if key is None:
+            continue
+        val = (val or '').strip()
+        if val == '':
+            continue
+        if key in JSON_COLUMNS:
+            try:
+                val = json.loads(val)
+            except ValueError:
+                return ValueError(f'JSON inválido en columna {key}')
+        out[key] = val
+    return out
+
+
+def validate_row(raw: Any) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """Devuelve (valores validados, None) o (None, errores por campo)."""
+    if isinstance(raw, Exception):
+        return None, {'row': str(raw)}
+    if not isinstance(raw, dict):
+        return None, {'row': 'Se esperaba un objeto'}
+    data = dict(raw)
+    if isinstance(data.get('email'), str):
+        data['email'] = data['email'].strip().lower()
+    if data.get('provinciales') is None:
+        data['provinciales'] = {}
+    if data.get('bonus') is None:
+        data['bonus'] = {}
+
+    schema = get_schema()
+    fuerzas = schema.fuerzas
+    provincias = schema.provincias
+    checks = (
+        ('national_percentages', lambda: validate_national_fuerzas(data.get('national_percentages') or {}, fuerzas)),
+        ('provinciales', lambda: validate_provinciales(data.get('provinciales') or {}, provincias, fuerzas)),
+        ('top3', lambda: validate_top3(data.get('top3'), fuerzas)),
+        ('bonus', lambda: validate_bonus(data.get('bonus') or {}, provincias)),
+    )
+    for name, check in checks:
+        try:
+            err = check()
+        except Exception as e:
+            err = f'Formato inválido: {type(e).__name__}'
+        if err:
+            return None, {name: err}
+
+    serializer = PredictionUpsertSerializer(data=data)
+    if not serializer.is_valid():
+        return None, serializer.errors
+    return serializer.validated_data, None
+
+
+def ingest(rows: Iterable[Tuple[int, Any]], batch_size: int = DEFAULT_BATCH_SIZE, dry_run: bool = False) -> IngestReport:
+    report = IngestReport()
+    batch: Dict[str, Dict[str, Any]] = {}
+    for line, raw in rows:
+        report.rows += 1
+        values, errors = validate_row(raw)
+        if errors:
+            email = raw.get('email') if isinstance(raw, dict) else None
+            report.add_error(line, email, errors)
+            continue
+        # Dentro de un lote gana la última fila del mismo email
+        batch[values['email']] = values
+        if len(batch) >= batch_size:
+            _write_batch(batch, report, dry_run)
+            batch = {}
+    if batch:
+        _write_batch(batch, report, dry_run)
+    return report
+
+
+def _write_batch(batch: Dict[str, Dict[str, Any]], report: IngestReport, dry_run: bool) -> None:
+    existing = {
+        email: (username, completed, nat, prov)
+        for email, username, completed, nat, prov in Prediction.objects.filter(email__in=list(batch))
+        .values_list('email', 'username', 'is_completed', 'national_percentages', 'provinciales')
+    }
+    report.updated += len(existing)
+    report.created += len(batch) - len(existing)
+    if dry_run:
+        return
+    objs = [
+        Prediction(email=email, **{k: v for k, v in values.items() if k in WRITABLE_FIELDS})
+        for email, values in batch.items()
+    ]
+    delta = {'total': 0, 'completed': 0, 'changed': False}
+    consensus = {}
+    for o in objs:
+        o.is_completed = compute_completed(o.username, o.top3, o.national_percentages, o.provinciales)
+        old = existing.get(o.email)
+        d = saved_delta(old is None, old[:2] if old else None, o.username, o.is_completed)
+        delta['total'] += d['total']
+        delta['completed'] += d['completed']
+        delta['changed'] |= d['changed']
+        diff(contributions(*old[2:]) if old else {}, contributions(o.national_percentages, o.provinciales), consensus)
+    with transaction.atomic():
+        Prediction.objects.bulk_create(
+            objs,
+            update_conflicts=True,
+            unique_fields=['email'],
+            update_fields=list(WRITABLE_FIELDS) + ['is_completed', 'updated_at'],
+        )
+        apply_counter_delta(**delta)
+        apply_consensus_delta(consensus)
+        if any(o.pk is None for o in objs):
+            # Motores sin RETURNING en bulk_create: se releen los ids
+            ids = dict(Prediction.objects.filter(email__in=list(batch)).values_list('email', 'id'))
+            for o in objs:
+                o.pk = ids.get(o.email)
+        sync_columns(objs)
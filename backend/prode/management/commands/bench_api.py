@@ -0,0 +1,115 @@
+import json
+import random
+from pathlib import Path
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.utils import timezone
+
+from prode.bench import (
+    SCENARIOS,
+    ClientTransport,
+    HttpTransport,
+    build_requests,
+    comparable,
+    compare,
+    format_report,
+    run_requests,
+    summarize,
+)
+from prode.publication import after_results_published
+from prode.seeding import seed
+from prode_backend.settings import BASE_DIR
+
+DEFAULT_BASELINE = Path(BASE_DIR) / 'bench' / 'baseline.json'
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark de /api/predictions, /api/ranking, /api/players y /api/results. "
+        "Sin --url corre en proceso sobre una base de test temporal sembrada con --players jugadores."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--players', type=int, default=2000, help='Jugadores a sembrar (o ya sembrados con --url)')
+        parser.add_argument('--requests', type=int, default=1000, help='Requests por escenario')
+        parser.add_argument('--scenario', choices=sorted(SCENARIOS) + ['all'], default='all')
+        parser.add_argument('--url', help='Servidor local a medir (p. ej. http://localhost:8000); no siembra datos')
+        parser.add_argument('--concurrency', type=int, default=1, help='Requests en paralelo (solo con --url)')
+        parser.add_argument('--seed', type=int, default=1234, help='Semilla de datos y requests')
+        parser.add_argument('--baseline', default=str(DEFAULT_BASELINE), help='Reporte contra el que se compara')
+        parser.add_argument('--save-baseline', action='store_true', help='Guardar este reporte como baseline')
+        parser.add_argument('--tolerance', type=float, default=0.5, help='Desvío relativo tolerado en latencia/throughput')
+        parser.add_argument('--output', help='Guardar el reporte JSON en este archivo')
+
+    def handle(self, *args, **options):
+        scenarios = sorted(SCENARIOS) if options['scenario'] == 'all' else [options['scenario']]
+        # deadline antes que results: los envíos entran al ranking que se publica después
+        scenarios.sort(key=lambda s: s != 'deadline')
+        url = options['url']
+        config = {
+            'players': options['players'],
+            'requests': options['requests'],
+            'transport': 'http' if url else 'client',
+            'concurrency': options['concurrency'] if url else 1,
+            'seed': options['seed'],
+        }
+        if url:
+            self.stdout.write(self.style.WARNING(
+                f'Midiendo {url}: se asume una base sembrada con seed_prode --players {config["players"]} --publish'
+            ))
+            report = self._run(HttpTransport(url), scenarios, config, publish=None)
+        else:
+            report = self._run_in_test_db(scenarios, config)
+
+        self.stdout.write(format_report(report))
+        if options['output']:
+            Path(options['output']).write_text(json.dumps(report, indent=2), encoding='utf-8')
+
+        baseline_path = Path(options['baseline'])
+        if options['save_baseline']:
+            baseline_path.parent.mkdir(parents=True, exist_ok=True)
+            baseline_path.write_text(json.dumps(report, indent=2) + '\n', encoding='utf-8')
+            self.stdout.write(self.style.SUCCESS(f'Baseline guardado en {baseline_path}'))
+            return
+        if not baseline_path.exists():
+            self.stdout.write(self.style.WARNING(f'Sin baseline en {baseline_path}; no se compara'))
+            return
+        baseline = json.loads(baseline_path.read_text(encoding='utf-8'))
+        if not comparable(report, baseline):
+            self.stdout.write(self.style.WARNING('El baseline usa otra configuración; no se compara'))
+            return
+        problems = compare(report, baseline, options['tolerance'])
+        if problems:
+            raise CommandError('Regresiones contra el baseline:\n' + '\n'.join(f'- {p}' for p in problems))
+        self.stdout.write(self.style.SUCCESS('Sin regresiones contra el baseline'))
+
+    def _run_in_test_db(self, scenarios, config):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            cache.clear()
+            rng = random.Random(config['seed'])
+            self.stdout.write(self.style.WARNING(f'Sembrando {config["players"]} jugadores...'))
+            res = seed(config['players'], rng=rng)
+            return self._run(ClientTransport(), scenarios, config, publish=res)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    def _run(self, transport, scenarios, config, publish):
+        rng = random.Random(config['seed'] + 1)
+        report = {'config': config, 'scenarios': {}}
+        for name in scenarios:
+            if name == 'results' and publish is not None:
+                # Igual que la publicación desde el admin: ranking recalculado, caches frías
+                publish.is_published = True
+                publish.published_at = timezone.now()
+                publish.save()
+                after_results_published(publish)
+            requests = build_requests(name, config['requests'], config['players'], rng)
+            samples, wall = run_requests(transport, requests, config['concurrency'])
+            report['scenarios'][name] = summarize(samples, wall)
+        return report
@@ -0,0 +1,59 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from prode.microbench import (
+    DEFAULT_ROUNDS,
+    append_history,
+    benchmark_cases,
+    compare,
+    current_commit,
+    find_entry,
+    format_results,
+    load_history,
+    make_entry,
+    run,
+    synthetic_payloads,
+)
+from prode.validators import override_schema
+from prode_backend.settings import BASE_DIR
+
+DEFAULT_HISTORY = Path(BASE_DIR) / 'bench' / 'micro_history.jsonl'
+
+
+class Command(BaseCommand):
+    help = "Micro-benchmarks de scoring, validadores y serializers sobre payloads sintéticos (24 provincias, 8 fuerzas)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rounds', type=int, default=DEFAULT_ROUNDS, help='Rondas por caso')
+        parser.add_argument('--min-time', type=float, default=0.05, help='Segundos aproximados por ronda')
+        parser.add_argument('--only', nargs='*', help='Correr solo estos casos')
+        parser.add_argument('--history', default=str(DEFAULT_HISTORY), help='Historial JSONL de corridas')
+        parser.add_argument('--save', action='store_true', help='Agregar esta corrida al historial (con el commit actual)')
+        parser.add_argument('--against', help='Commit (prefijo) del historial contra el que comparar; por defecto la última corrida')
+        parser.add_argument('--max-slowdown', type=float, help='Fallar si alguna mediana empeora más que esta fracción (p. ej. 0.25)')
+
+    def handle(self, *args, **options):
+        payloads = synthetic_payloads()
+        with override_schema(payloads.schema):
+            results = run(benchmark_cases(payloads), options['rounds'], options['min_time'], options['only'])
+
+        history_path = Path(options['history'])
+        history = load_history(history_path)
+        reference = find_entry(history, options['against'])
+        if options['against'] and reference is None:
+            raise CommandError(f'No hay corridas del commit {options["against"]} en {history_path}')
+        deltas = compare(results, reference) if reference else None
+        if reference:
+            self.stdout.write(f'Referencia: commit {reference["commit"]} ({reference["created_at"]})')
+        self.stdout.write(format_results(results, deltas))
+
+        if options['save']:
+            append_history(history_path, make_entry(results, current_commit(Path(BASE_DIR))))
+            self.stdout.write(self.style.SUCCESS(f'Corrida guardada en {history_path}'))
+
+        limit = options['max_slowdown']
+        if limit is not None and deltas:
+            slower = {name: d for name, d in deltas.items() if d > limit}
+            if slower:
+                raise CommandError('Más lento que la referencia: ' + ', '.join(f'{n} {d:+.1%}' for n, d in slower.items()))
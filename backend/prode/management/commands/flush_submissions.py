@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from prode import submission_queue
+from prode_backend import settings as app_settings
+
+
+class Command(BaseCommand):
+    help = "Escribe en la base los envíos de la cola write-behind (WRITE_BEHIND=1)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch', type=int, default=app_settings.WRITE_BEHIND_BATCH)
+        parser.add_argument('--loop', action='store_true', help="Sigue drenando cada WRITE_BEHIND_INTERVAL segundos")
+        parser.add_argument('--dead-letters', action='store_true', help="Lista los envíos que agotaron los reintentos")
+        parser.add_argument('--replay', nargs='*', type=int, metavar='ID',
+                            help="Reencola esos dead letters (sin ids: todos) y drena")
+
+    def handle(self, *args, **options):
+        try:
+            if options['dead_letters']:
+                for row in submission_queue.dead_letters():
+                    self.stdout.write(
+                        f"{row['id']}\t{row['receipt']}\t{row['email']}\t{row['received_at']}\t"
+                        f"{row['attempts']} intentos\t{row['error']}\t{row['failed_at']}"
+                    )
+                return
+            if options['replay'] is not None:
+                moved = submission_queue.replay(options['replay'] or None)
+                self.stdout.write(f"{moved} envíos reencolados.")
+            while True:
+                stats = submission_queue.drain(options['batch'])
+                if stats['submissions'] or not options['loop']:
+                    self.stdout.write(
+                        f"{stats['submissions']} envíos: {stats['written']} pronósticos escritos, {stats['failed']} fallidos; "
+                        f"quedan {submission_queue.pending_count()}."
+                    )
+                if not options['loop']:
+                    return
+                time.sleep(app_settings.WRITE_BEHIND_INTERVAL)
+        finally:
+            submission_queue.close()
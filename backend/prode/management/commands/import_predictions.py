@@ -0,0 +1,37 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from prode.ingest import DEFAULT_BATCH_SIZE, FORMATS, ingest, iter_rows
+
+
+class Command(BaseCommand):
+    help = "Importa pronósticos desde CSV o JSONL (upsert por email, en lotes)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Archivo a importar ('-' para stdin)")
+        parser.add_argument('--format', choices=FORMATS, help='Formato (por defecto se infiere de la extensión)')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='Filas por lote de escritura')
+        parser.add_argument('--dry-run', action='store_true', help='Validar sin escribir')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or ('csv' if path.lower().endswith('.csv') else 'jsonl')
+        batch_size = max(1, int(options['batch_size']))
+        dry = bool(options['dry_run'])
+
+        try:
+            stream = sys.stdin if path == '-' else open(path, encoding='utf-8', newline='')
+        except OSError as e:
+            raise CommandError(f'No se pudo abrir {path}: {e}')
+        with stream:
+            report = ingest(iter_rows(stream, fmt), batch_size=batch_size, dry_run=dry)
+
+        for err in report.errors[:20]:
+            self.stdout.write(self.style.WARNING(f" - línea {err['line']} ({err['email']}): {err['errors']}"))
+        if report.failed > 20:
+            self.stdout.write(f"   ... (+{report.failed - 20} errores más)")
+        prefix = 'Dry-run: ' if dry else ''
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix}{report.rows} filas, {report.created} nuevas, {report.updated} actualizadas, {report.failed} con error."
+        ))
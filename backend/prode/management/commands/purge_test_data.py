@@ -1,6 +1,7 @@
 from django.core.management.base import BaseCommand
 from django.db import transaction
 from prode.models import Prediction, OfficialResults
+from prode.players import delete_predictions
 
 
 class Command(BaseCommand):
@@ -60,7 +61,7 @@ class Command(BaseCommand):
 
         with transaction.atomic():
             if ids:
-                Prediction.objects.filter(id__in=ids).delete()
+                delete_predictions(Prediction.objects.filter(id__in=ids))
             if include_official or purge_all_official:
                 off_qs.delete()
 
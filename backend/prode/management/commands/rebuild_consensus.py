@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from prode.consensus import rebuild_consensus
+
+
+class Command(BaseCommand):
+    help = "Recalcula el consenso de los jugadores (ConsensusStat) desde los pronósticos."
+
+    def handle(self, *args, **options):
+        rows = rebuild_consensus()
+        self.stdout.write(self.style.SUCCESS(f"Consenso recalculado: {rows} filas (provincia, fuerza)."))
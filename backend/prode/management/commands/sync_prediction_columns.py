@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from prode.columns import resync_all
+
+
+class Command(BaseCommand):
+    help = "Reconstruye el store columnar de pronósticos (necesario tras cambiar fuerzas.json)."
+
+    def handle(self, *args, **options):
+        count = resync_all()
+        self.stdout.write(self.style.SUCCESS(f"{count} pronósticos sincronizados."))
@@ -0,0 +1,270 @@
+"""Instrumentos en memoria (por proceso) y exposición Prometheus (`/api/metrics`).
+
+Los valores son del proceso que atiende el scrape: con varios workers cada uno
+expone los suyos y Prometheus los agrega por instancia.
+"""
+import bisect
+import functools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Sequence, Tuple
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+class Histogram:
+    """Histograma de buckets fijos (límites superiores, como Prometheus `le`)."""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)  # el último es +Inf
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[i] += 1
+            self._sum += value
+            self._count += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Conteos acumulados por bucket y cuantiles aproximados (límite del bucket)."""
+        with self._lock:
+            counts = list(self._counts)
+            total, count = self._sum, self._count
+        cumulative = []
+        acc = 0
+        for c in counts:
+            acc += c
+            cumulative.append(acc)
+        labels = [_fmt(b) for b in self.buckets] + ['+Inf']
+        return {
+            'count': count,
+            'sum': round(total, 6),
+            'buckets': dict(zip(labels, cumulative)),
+            'p50': self._quantile(cumulative, count, 0.50),
+            'p95': self._quantile(cumulative, count, 0.95),
+            'p99': self._quantile(cumulative, count, 0.99),
+        }
+
+    def _quantile(self, cumulative, count: int, q: float):
+        if not count:
+            return None
+        rank = q * count
+        for bound, acc in zip(self.buckets, cumulative):
+            if acc >= rank:
+                return bound
+        return None  # cae en +Inf
+
+
+class _Family:
+    kind = ''
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, values: Sequence[Any]) -> Tuple[str, ...]:
+        if len(values) != len(self.labels):
+            raise ValueError(f'{self.name}: se esperaban labels {self.labels}')
+        return tuple(str(v) for v in values)
+
+    def render(self) -> List[str]:
+        return [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.kind}'] + self._samples()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Family):
+    kind = 'counter'
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        super().__init__(name, help_text, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: Any, amount: float = 1) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, *labels: Any) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def items(self) -> List[Tuple[Tuple[str, ...], float]]:
+        with self._lock:
+            return sorted(self._values.items())
+
+    def _samples(self) -> List[str]:
+        return [f'{self.name}{_labels(self.labels, k)} {_fmt(v)}' for k, v in self.items()]
+
+
+class Gauge(_Family):
+    """Gauge calculado al momento del scrape."""
+    kind = 'gauge'
+
+    def __init__(self, name: str, help_text: str, fn: Callable[[], float]):
+        super().__init__(name, help_text)
+        self.fn = fn
+
+    def _samples(self) -> List[str]:
+        try:
+            return [f'{self.name} {_fmt(self.fn())}']
+        except Exception as e:
+            logger.warning("metrics gauge %s failed: %s: %s", self.name, type(e).__name__, e)
+            return []
+
+
+class HistogramVec(_Family):
+    kind = 'histogram'
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = (), buckets: Sequence[float] = SECONDS_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(buckets)
+        self._children: Dict[Tuple[str, ...], Histogram] = {}
+
+    def child(self, *labels: Any) -> Histogram:
+        key = self._key(labels)
+        with self._lock:
+            h = self._children.get(key)
+            if h is None:
+                h = self._children[key] = Histogram(self.buckets)
+        return h
+
+    def observe(self, value: float, *labels: Any) -> None:
+        self.child(*labels).observe(value)
+
+    @contextmanager
+    def time(self, *labels: Any) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0, *labels)
+
+    def timed(self, *labels: Any):
+        """Decorador: observa la duración de cada llamada."""
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.time(*labels):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            children = sorted(self._children.items())
+        lines = []
+        for key, h in children:
+            snap = h.snapshot()
+            for le, acc in snap['buckets'].items():
+                lines.append(f'{self.name}_bucket{_labels(self.labels + ("le",), key + (le,))} {acc}')
+            lines.append(f'{self.name}_sum{_labels(self.labels, key)} {_fmt(snap["sum"])}')
+            lines.append(f'{self.name}_count{_labels(self.labels, key)} {snap["count"]}')
+        return lines
+
+
+REGISTRY: List[_Family] = []
+
+
+def render() -> str:
+    return '\n'.join(line for family in REGISTRY for line in family.render()) + '\n'
+
+
+def _labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ''
+    pairs = ','.join(f'{n}="{_escape(v)}"' for n, v in zip(names, values))
+    return '{' + pairs + '}'
+
+
+def _escape(v: str) -> str:
+    return v.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _fmt(v: float) -> str:
+    return repr(float(v)) if isinstance(v, float) and not float(v).is_integer() else str(int(v))
+
+
+def view_name(view_func) -> str:
+    cls = getattr(view_func, 'view_class', None) or getattr(view_func, 'cls', None)
+    return cls.__name__ if cls is not None else getattr(view_func, '__name__', 'unknown')
+
+
+def _sse_connections() -> int:
+    from .events import broadcaster
+    return broadcaster.connections
+
+
+def _write_behind_pending() -> int:
+    from prode_backend import settings as app_settings
+    if not app_settings.WRITE_BEHIND:
+        return 0
+    from .submission_queue import pending_count
+    return pending_count()
+
+
+# --- Métricas de la app -------------------------------------------------------
+
+HTTP_REQUESTS = Counter('prode_http_requests_total', 'Requests atendidos por vista y status.', ('view', 'status'))
+HTTP_SECONDS = HistogramVec('prode_http_request_duration_seconds', 'Duración de los requests por vista.', ('view',))
+UPSERT_SECONDS = HistogramVec('prode_prediction_upsert_duration_seconds', 'Duración de upsert_prediction (lectura previa, upsert y store columnar).')
+VALIDATION_FAILURES = Counter('prode_prediction_validation_failures_total', 'Envíos rechazados en /api/predictions por campo.', ('field',))
+RANKING_SECONDS = HistogramVec('prode_ranking_compute_duration_seconds', 'Duración del cálculo del ranking por tipo.', ('kind',))
+CACHE_REQUESTS = Counter('prode_cache_requests_total', 'Lecturas de cache por cache y resultado (hit/miss).', ('cache', 'result'))
+SSE_CONNECTIONS = Gauge('prode_sse_connections', 'Conexiones SSE activas en /api/events.', _sse_connections)
+WRITE_BEHIND_PENDING = Gauge('prode_write_behind_pending', 'Envíos en la cola write-behind aún no escritos.', _write_behind_pending)
+
+
+def cache_lookup(name: str, hit: bool) -> None:
+    CACHE_REQUESTS.inc(name, 'hit' if hit else 'miss')
+
+
+class MetricsMiddleware:
+    """Cuenta requests por vista y status y mide su duración. Va primero en MIDDLEWARE.
+
+    Sync y async: bajo ASGI no obliga a correr la cadena (y las vistas async) en un hilo.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        t0 = time.perf_counter()
+        return self._observe(request, self.get_response(request), t0)
+
+    async def __acall__(self, request):
+        t0 = time.perf_counter()
+        return self._observe(request, await self.get_response(request), t0)
+
+    @staticmethod
+    def _observe(request, response, t0: float):
+        view = getattr(request, '_prode_view', None) or 'unresolved'
+        HTTP_SECONDS.observe(time.perf_counter() - t0, view)
+        HTTP_REQUESTS.inc(view, response.status_code)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._prode_view = view_name(view_func)
+        return None
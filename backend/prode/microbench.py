@@ -0,0 +1,175 @@
+"""Micro-benchmarks de scoring y validación (`manage.py bench_micro`).
+
+Cada caso corre sobre un payload sintético del tamaño de uno real (24
+provincias, 8 fuerzas, todas las fuerzas cargadas en cada provincia) y con un
+schema de validación sintético del mismo tamaño, así el costo no depende de
+los JSON estáticos de la instalación.
+
+La medición sigue a pytest-benchmark: `timeit` calibra cuántas llamadas entran
+en una ronda y se repiten varias rondas; se reportan min/mediana/media/desvío
+por llamada. Los resultados se agregan a un historial JSONL por commit.
+"""
+import json
+import platform
+import random
+import statistics
+import subprocess
+import timeit
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from django.utils import timezone
+
+from .models import OfficialResults, Prediction
+from .scoring import BONUS_KEYS, mae_national, score_prediction, scoring_context, top3_points
+from .serializers import OfficialResultsSerializer, PredictionSerializer, PredictionUpsertSerializer
+from .validators import ValidationSchema, build_schema, validate_provinciales, validate_top3
+
+PROVINCES = 24
+FORCES = 8
+DEFAULT_ROUNDS = 7
+
+
+class Payloads(NamedTuple):
+    schema: ValidationSchema
+    prediction: Dict[str, Any]
+    official: Dict[str, Any]
+
+
+def synthetic_payloads(provinces: int = PROVINCES, forces: int = FORCES, seed: int = 1) -> Payloads:
+    rng = random.Random(seed)
+    fuerzas = [f'Fuerza {j + 1}' for j in range(forces)]
+    provincias = [f'Provincia {i + 1:02d}' for i in range(provinces)]
+    schema = build_schema(fuerzas, provincias, {p: fuerzas for p in provincias})
+
+    def pcts():
+        w = [rng.uniform(1, 10) for _ in fuerzas]
+        s = sum(w)
+        return {f: round(100.0 * v / s, 1) for f, v in zip(fuerzas, w)}
+
+    def provinciales():
+        out = {}
+        for prov in provincias:
+            p = pcts()
+            out[prov] = {'percentages': p, 'winner': max(p, key=p.get)}
+        return out
+
+    nat = pcts()
+    prediction = {
+        'username': 'Jugador', 'email': 'jugador@example.com',
+        'top3': sorted(nat, key=nat.get, reverse=True)[:3],
+        'national_percentages': nat,
+        'participation': 68.5, 'margin_1_2': 4.2, 'blanco_nulo_impugnado': 2.1, 'total_votes': 24_000_000,
+        'provinciales': provinciales(),
+        'bonus': {k: rng.choice(provincias) for k in BONUS_KEYS},
+    }
+    official = {
+        'national_percentages': pcts(),
+        'participation': 67.0, 'margin_1_2': 5.0, 'blanco_nulo_impugnado': 2.0, 'total_votes': 23_500_000,
+        'provinciales': provinciales(),
+    }
+    return Payloads(schema, prediction, official)
+
+
+def benchmark_cases(payloads: Payloads) -> Dict[str, Callable[[], Any]]:
+    """Casos medidos; requieren `override_schema(payloads.schema)` activo."""
+    schema = payloads.schema
+    pred = Prediction(**payloads.prediction)
+    res = OfficialResults(**payloads.official)
+    ctx = scoring_context(res, baseline=[])
+    nat_real = res.national_percentages
+    pred_data = dict(payloads.prediction)
+    off_data = dict(payloads.official)
+    return {
+        'score_prediction': lambda: score_prediction(pred, res, ctx),
+        'top3_points': lambda: top3_points(pred.top3, nat_real),
+        'mae_national': lambda: mae_national(pred, nat_real),
+        'validate_provinciales': lambda: validate_provinciales(pred.provinciales, schema.provincias, schema.fuerzas),
+        'validate_top3': lambda: validate_top3(pred.top3, schema.fuerzas),
+        'PredictionSerializer.validate': lambda: PredictionSerializer().validate(dict(pred_data)),
+        'OfficialResultsSerializer.validate': lambda: OfficialResultsSerializer().validate(dict(off_data)),
+        # Lo que cuesta validar un envío completo en /api/predictions (campos + validate)
+        'PredictionUpsertSerializer.is_valid': lambda: PredictionUpsertSerializer(data=pred_data).is_valid(raise_exception=True),
+    }
+
+
+def measure(fn: Callable[[], Any], rounds: int = DEFAULT_ROUNDS, min_time: float = 0.05) -> Dict[str, float]:
+    """Estadísticas por llamada (microsegundos) sobre `rounds` rondas."""
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    number = max(1, int(number * min_time / 0.2))  # autorange apunta a 0.2 s por ronda
+    per_call = [t / number * 1e6 for t in timer.repeat(repeat=rounds, number=number)]
+    return {
+        'min_us': round(min(per_call), 3),
+        'median_us': round(statistics.median(per_call), 3),
+        'mean_us': round(statistics.fmean(per_call), 3),
+        'stddev_us': round(statistics.stdev(per_call), 3) if len(per_call) > 1 else 0.0,
+        'ops': round(1e6 / statistics.median(per_call), 1),
+        'rounds': rounds,
+        'iterations': number,
+    }
+
+
+def run(cases: Dict[str, Callable[[], Any]], rounds: int = DEFAULT_ROUNDS, min_time: float = 0.05,
+        only: Optional[List[str]] = None) -> Dict[str, Dict[str, float]]:
+    return {name: measure(fn, rounds, min_time) for name, fn in cases.items() if not only or name in only}
+
+
+def current_commit(cwd: Optional[Path] = None) -> str:
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=cwd, capture_output=True, text=True, timeout=5)
+        return out.stdout.strip() or 'unknown'
+    except Exception:
+        return 'unknown'
+
+
+def make_entry(results: Dict[str, Dict[str, float]], commit: str) -> Dict[str, Any]:
+    return {
+        'commit': commit,
+        'created_at': timezone.now().isoformat(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'results': results,
+    }
+
+
+def load_history(path: Path) -> List[Dict[str, Any]]:
+    if not path.exists():
+        return []
+    return [json.loads(line) for line in path.read_text(encoding='utf-8').splitlines() if line.strip()]
+
+
+def append_history(path: Path, entry: Dict[str, Any]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open('a', encoding='utf-8') as f:
+        f.write(json.dumps(entry, sort_keys=True) + '\n')
+
+
+def find_entry(history: List[Dict[str, Any]], commit: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Última entrada del historial (o la última de `commit`, por prefijo)."""
+    for entry in reversed(history):
+        if commit is None or entry['commit'].startswith(commit):
+            return entry
+    return None
+
+
+def compare(results: Dict[str, Dict[str, float]], previous: Dict[str, Any]) -> Dict[str, float]:
+    """Cambio relativo de la mediana por caso (+0.25 = 25% más lento)."""
+    out = {}
+    for name, cur in results.items():
+        prev = previous['results'].get(name)
+        if prev and prev['median_us']:
+            out[name] = round(cur['median_us'] / prev['median_us'] - 1.0, 4)
+    return out
+
+
+def format_results(results: Dict[str, Dict[str, float]], deltas: Optional[Dict[str, float]] = None) -> str:
+    width = max(len(n) for n in results) + 2 if results else 10
+    lines = [f"{'caso':<{width}}{'min µs':>10}{'mediana µs':>12}{'media µs':>10}{'desvío':>9}{'ops/s':>12}{'vs ref':>9}"]
+    for name, r in results.items():
+        delta = '' if not deltas or name not in deltas else f'{deltas[name]:+.1%}'
+        lines.append(
+            f"{name:<{width}}{r['min_us']:>10}{r['median_us']:>12}{r['mean_us']:>10}"
+            f"{r['stddev_us']:>9}{r['ops']:>12}{delta:>9}"
+        )
+    return '\n'.join(lines)
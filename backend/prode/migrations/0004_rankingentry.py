@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:33
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('prode', '0003_officialresults'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RankingEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('computed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('username', models.CharField(max_length=120)),
+                ('email', models.EmailField(max_length=254)),
+                ('submitted_at', models.DateTimeField()),
+                ('score', models.FloatField()),
+                ('bonus', models.FloatField(default=0)),
+                ('medals', models.JSONField(default=list)),
+                ('breakdown', models.JSONField(default=dict)),
+                ('position', models.PositiveIntegerField()),
+                ('prediction', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ranking_entries', to='prode.prediction')),
+                ('results', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ranking_entries', to='prode.officialresults')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['results', 'position'], name='ranking_entry_position_idx'), models.Index(fields=['results', '-score', 'submitted_at'], name='ranking_entry_order_idx')],
+                'constraints': [models.UniqueConstraint(fields=('results', 'prediction'), name='ranking_entry_unique_prediction')],
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('prode', '0004_rankingentry'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='rankingentry',
+            name='ranking_entry_order_idx',
+        ),
+        migrations.AddIndex(
+            model_name='rankingentry',
+            index=models.Index(fields=['results', '-score', 'submitted_at', 'prediction'], name='ranking_entry_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rankingentry',
+            index=models.Index(fields=['results', 'email'], name='ranking_entry_email_idx'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:41
+
+from django.db import migrations, models
+
+
+def dedupe_emails(apps, schema_editor):
+    """Deja un solo pronóstico por email normalizado (strip + lower).
+
+    Antes de normalizar el email en la API se guardaron variantes con
+    mayúsculas/espacios del mismo correo. Se conserva la fila con
+    `updated_at` más reciente y se normaliza su email.
+    """
+    Prediction = apps.get_model('prode', 'Prediction')
+    seen = set()
+    duplicate_ids = []
+    renames = []
+    rows = Prediction.objects.order_by('-updated_at', '-id').values_list('id', 'email')
+    for pid, email in rows.iterator(chunk_size=2000):
+        key = (email or '').strip().lower()
+        if key in seen:
+            duplicate_ids.append(pid)
+            continue
+        seen.add(key)
+        if email != key:
+            renames.append((pid, key))
+    for i in range(0, len(duplicate_ids), 500):
+        Prediction.objects.filter(id__in=duplicate_ids[i:i + 500]).delete()
+    for pid, key in renames:
+        Prediction.objects.filter(id=pid).update(email=key)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('prode', '0005_rankingentry_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe_emails, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='prediction',
+            index=models.Index(fields=['email', 'updated_at'], name='prediction_email_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='prediction',
+            index=models.Index(fields=['updated_at'], name='prediction_updated_idx'),
+        ),
+    ]
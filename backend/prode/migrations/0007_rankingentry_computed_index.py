@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('prode', '0006_prediction_email_index_dedupe'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='rankingentry',
+            index=models.Index(fields=['results', 'computed_at'], name='ranking_entry_computed_idx'),
+        ),
+    ]
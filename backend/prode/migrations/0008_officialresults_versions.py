@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('prode', '0007_rankingentry_computed_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='officialresults',
+            name='delta',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='officialresults',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='children', to='prode.officialresults'),
+        ),
+        migrations.AddField(
+            model_name='officialresults',
+            name='version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
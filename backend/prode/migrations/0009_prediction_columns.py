@@ -0,0 +1,97 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:55
+
+import hashlib
+import json
+import struct
+from pathlib import Path
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+FUERZAS_JSON = Path(__file__).resolve().parent.parent / 'static' / 'fuerzas.json'
+
+# Copia congelada de prode.columns (layout y empaquetado) al escribir esta
+# migración: cambios posteriores en la app no la alteran. Si el layout
+# vigente difiere, esas filas se leen del JSON hasta `sync_prediction_columns`.
+
+
+def _forces():
+    try:
+        raw = json.loads(FUERZAS_JSON.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        raw = []
+    return tuple(sorted({str(x) for x in raw}))
+
+
+def _pack(top3, nat, col):
+    vals = [0.0] * len(col)
+    picks = [-1, -1, -1]
+    nat = nat or {}
+    t3 = top3 or []
+    if not isinstance(nat, dict) or not isinstance(t3, list):
+        return vals, picks, True
+    exotic = False
+    for f, v in nat.items():
+        j = col.get(f)
+        if j is None:
+            exotic = True
+            continue
+        try:
+            vals[j] = float(v or 0)
+        except Exception:
+            pass
+    for k, f in enumerate(t3[:3]):
+        if isinstance(f, str):
+            j = col.get(f)
+            if j is None:
+                exotic = True
+            else:
+                picks[k] = j
+    return vals, picks, exotic
+
+
+def backfill_columns(apps, schema_editor):
+    Prediction = apps.get_model('prode', 'Prediction')
+    PredictionColumns = apps.get_model('prode', 'PredictionColumns')
+    forces = _forces()
+    key = hashlib.sha1('\x1f'.join(forces).encode('utf-8')).hexdigest()[:16]
+    col = {f: j for j, f in enumerate(forces)}
+    batch = []
+    qs = Prediction.objects.order_by('id').values_list('id', 'updated_at', 'top3', 'national_percentages')
+    for pid, updated_at, top3, nat in qs.iterator(chunk_size=BATCH_SIZE):
+        vals, picks, exotic = _pack(top3, nat, col)
+        batch.append(PredictionColumns(
+            prediction_id=pid, layout=key, synced_at=updated_at,
+            national=struct.pack(f'<{len(vals)}d', *vals),
+            pick1=picks[0], pick2=picks[1], pick3=picks[2], exotic=exotic,
+        ))
+        if len(batch) >= BATCH_SIZE:
+            PredictionColumns.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        PredictionColumns.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('prode', '0008_officialresults_versions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PredictionColumns',
+            fields=[
+                ('prediction', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='columns', serialize=False, to='prode.prediction')),
+                ('layout', models.CharField(max_length=16)),
+                ('synced_at', models.DateTimeField()),
+                ('national', models.BinaryField()),
+                ('pick1', models.SmallIntegerField(default=-1)),
+                ('pick2', models.SmallIntegerField(default=-1)),
+                ('pick3', models.SmallIntegerField(default=-1)),
+                ('exotic', models.BooleanField(default=False)),
+            ],
+        ),
+        migrations.RunPython(backfill_columns, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:01
+
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+
+def compute_completed(username, top3, nat, prov):
+    # Copia congelada de prode.models.compute_completed al escribir esta migración
+    if not username:
+        return False
+    t3 = top3 or []
+    nat = nat or {}
+    try:
+        nat_values = getattr(nat, 'values', lambda: [])()
+        nat_sum = sum(float(v) for v in nat_values) if nat else 0.0
+    except Exception:
+        nat_sum = 0.0
+    try:
+        return (len(t3) > 0) or (nat_sum > 0) or bool(prov or {})
+    except Exception:
+        return False
+
+
+def backfill_completed(apps, schema_editor):
+    Prediction = apps.get_model('prode', 'Prediction')
+    PlayerCounters = apps.get_model('prode', 'PlayerCounters')
+    batch = []
+    total = completed = 0
+    qs = Prediction.objects.order_by('id').only('id', 'username', 'top3', 'national_percentages', 'provinciales')
+    for p in qs.iterator(chunk_size=BATCH_SIZE):
+        p.is_completed = compute_completed(p.username, p.top3, p.national_percentages, p.provinciales)
+        total += 1
+        completed += int(p.is_completed)
+        batch.append(p)
+        if len(batch) >= BATCH_SIZE:
+            Prediction.objects.bulk_update(batch, ['is_completed'])
+            batch = []
+    if batch:
+        Prediction.objects.bulk_update(batch, ['is_completed'])
+    PlayerCounters.objects.update_or_create(pk=1, defaults={'total': total, 'completed': completed, 'version': 1})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('prode', '0009_prediction_columns'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlayerCounters',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('completed', models.PositiveIntegerField(default=0)),
+                ('version', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='prediction',
+            name='is_completed',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddIndex(
+            model_name='prediction',
+            index=models.Index(fields=['is_completed', 'username', 'id'], name='prediction_completed_user_idx'),
+        ),
+        migrations.RunPython(backfill_completed, migrations.RunPython.noop),
+    ]
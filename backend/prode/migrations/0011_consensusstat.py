@@ -0,0 +1,78 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:27
+
+import math
+
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+
+def _number(v):
+    try:
+        f = float(v)
+    except (TypeError, ValueError):
+        return None
+    return f if math.isfinite(f) else None
+
+
+def _contributions(national, provinciales):
+    # Copia congelada de prode.consensus.contributions al escribir esta migración
+    out = {}
+    if isinstance(national, dict):
+        for force, v in national.items():
+            f = _number(v)
+            if f is not None:
+                out[('', force)] = f
+    if isinstance(provinciales, dict):
+        for prov, payload in provinciales.items():
+            if not isinstance(payload, dict):
+                continue
+            pcts = payload.get('porcentajes') or payload.get('percentages') or {}
+            if not isinstance(pcts, dict):
+                continue
+            for force, v in pcts.items():
+                f = _number(v)
+                if f is not None:
+                    out[(prov, force)] = f
+    return out
+
+
+def backfill_consensus(apps, schema_editor):
+    Prediction = apps.get_model('prode', 'Prediction')
+    ConsensusStat = apps.get_model('prode', 'ConsensusStat')
+    sums = {}
+    rows = Prediction.objects.order_by('id').values_list('national_percentages', 'provinciales')
+    for nat, prov in rows.iterator(chunk_size=BATCH_SIZE):
+        for key, v in _contributions(nat, prov).items():
+            c, t, sq = sums.get(key, (0, 0.0, 0.0))
+            sums[key] = (c + 1, t + v, sq + v * v)
+    ConsensusStat.objects.bulk_create(
+        [ConsensusStat(province=prov, force=force, count=c, total=t, total_sq=sq)
+         for (prov, force), (c, t, sq) in sorted(sums.items())],
+        batch_size=BATCH_SIZE,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('prode', '0010_prediction_is_completed_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConsensusStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('province', models.CharField(blank=True, default='', max_length=120)),
+                ('force', models.CharField(max_length=120)),
+                ('count', models.BigIntegerField(default=0)),
+                ('total', models.FloatField(default=0)),
+                ('total_sq', models.FloatField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('province', 'force'), name='consensus_province_force_uniq')],
+            },
+        ),
+        migrations.RunPython(backfill_consensus, migrations.RunPython.noop),
+    ]
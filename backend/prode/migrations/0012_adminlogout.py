@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:51
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('prode', '0011_consensusstat'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AdminLogout',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='admin_logout', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('logged_out_at', models.DateTimeField()),
+            ],
+        ),
+    ]
@@ -1,4 +1,27 @@
+from typing import Any
+
+from django.conf import settings
 from django.db import models
+from django.db.models import DEFERRED
+from django.utils import timezone
+
+
+def compute_completed(username: str, top3: Any, nat: Any, prov: Any) -> bool:
+    """Criterio MVP: usuario con nombre que completó Top-3 o algún dato relevante."""
+    if not username:
+        return False
+    t3 = top3 or []
+    nat = nat or {}
+    try:
+        nat_values = getattr(nat, 'values', lambda: [])()
+        nat_sum = sum(float(v) for v in nat_values) if nat else 0.0
+    except Exception:
+        nat_sum = 0.0
+    try:
+        return (len(t3) > 0) or (nat_sum > 0) or bool(prov or {})
+    except Exception:
+        return False
+
 
 class Prediction(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
@@ -20,21 +43,120 @@ class Prediction(models.Model):
     # Bonus
     bonus = models.JSONField(default=dict)
 
+    # En la base queda en False; las respuestas lo marcan mientras haya envíos
+    # en la cola write-behind sin escribir (submission_queue.py)
     sync_pending = models.BooleanField(default=False)
 
+    # Derivado de top3/national_percentages/provinciales; se calcula al guardar
+    is_completed = models.BooleanField(default=False)
+
+    class Meta:
+        indexes = [
+            # Lectura "mi pronóstico" por email normalizado (ver 0006: deduplicación)
+            models.Index(fields=['email', 'updated_at'], name='prediction_email_updated_idx'),
+            # Listados por actividad reciente y detección de ranking desactualizado
+            models.Index(fields=['updated_at'], name='prediction_updated_idx'),
+            # /api/players: página por keyset de usernames de quienes completaron
+            models.Index(fields=['is_completed', 'username', 'id'], name='prediction_completed_user_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        obj = super().from_db(db, field_names, values)
+        # Estado leído de la base, para ajustar contadores al guardar (players.py); None si quedó diferido
+        user, done = obj.__dict__.get('username', DEFERRED), obj.__dict__.get('is_completed', DEFERRED)
+        obj._loaded_player = None if user is DEFERRED or done is DEFERRED else (user, done)
+        # Idem para el consenso (consensus.py); None si alguno de los dos campos quedó diferido
+        nat, prov = obj.__dict__.get('national_percentages', DEFERRED), obj.__dict__.get('provinciales', DEFERRED)
+        obj._loaded_consensus = None if nat is DEFERRED or prov is DEFERRED else (nat, prov)
+        return obj
+
+    def save(self, *args, **kwargs):
+        self.is_completed = compute_completed(self.username, self.top3, self.national_percentages, self.provinciales)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | {'is_completed'}
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.username} <{self.email}>"
 
 
+class PredictionColumns(models.Model):
+    """Representación columnar de un `Prediction` para scoring y listados.
+
+    `national` son los porcentajes como float64 (little-endian) en el orden de
+    `layout` (fuerzas válidas ordenadas); `pick1..3` el Top-3 como índice en
+    ese orden (-1 si está vacío). Se sincroniza en cada guardado
+    (`columns.sync_columns`); `synced_at` copia `Prediction.updated_at` y las
+    filas que no coinciden se leen del JSON original.
+    """
+    prediction = models.OneToOneField(Prediction, primary_key=True, on_delete=models.CASCADE, related_name='columns')
+    layout = models.CharField(max_length=16)
+    synced_at = models.DateTimeField()
+    national = models.BinaryField()
+    pick1 = models.SmallIntegerField(default=-1)
+    pick2 = models.SmallIntegerField(default=-1)
+    pick3 = models.SmallIntegerField(default=-1)
+    # True si el pronóstico tiene formas que el layout no representa (se puntúa desde el JSON)
+    exotic = models.BooleanField(default=False)
+
+    def __str__(self):
+        return f"PredictionColumns({self.prediction_id})"
+
+
+class ConsensusStat(models.Model):
+    """Sumas corrientes de los porcentajes pronosticados (consenso de los jugadores).
+
+    Una fila por (provincia, fuerza); `province` vacío es el nacional. Con
+    `count`, `total` y `total_sq` salen media y desvío sin recorrer pronósticos.
+    Se ajusta con deltas en cada alta, edición y baja (ver consensus.py).
+    """
+    province = models.CharField(max_length=120, blank=True, default='')
+    force = models.CharField(max_length=120)
+    count = models.BigIntegerField(default=0)
+    total = models.FloatField(default=0)
+    total_sq = models.FloatField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['province', 'force'], name='consensus_province_force_uniq'),
+        ]
+
+    def __str__(self):
+        return f"ConsensusStat({self.province or 'nacional'}/{self.force}: {self.count})"
+
+
+class PlayerCounters(models.Model):
+    """Fila única (pk=1) con los contadores de `/api/players`.
+
+    Se actualiza con incrementos en la misma transacción que cada alta, baja o
+    cambio de estado de un pronóstico; `version` cambia con cada ajuste y sirve
+    de clave para el cache del listado.
+    """
+    total = models.PositiveIntegerField(default=0)
+    completed = models.PositiveIntegerField(default=0)
+    version = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"PlayerCounters({self.completed}/{self.total})"
+
+
 class OfficialResults(models.Model):
     """Resultados oficiales publicados por staff.
 
-    Modelo simple y único por publicación; el GET usará el último cargado.
+    Cada fila es un snapshot consolidado; el GET usará el último publicado.
+    Los escrutinios parciales se cargan como delta sobre la versión vigente
+    (`parent`) y generan una fila nueva con `version` + 1 y el `delta` aplicado.
     """
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     published_at = models.DateTimeField(null=True, blank=True)
 
+    version = models.PositiveIntegerField(default=1)
+    parent = models.ForeignKey('self', null=True, blank=True, on_delete=models.SET_NULL, related_name='children')
+    delta = models.JSONField(null=True, blank=True)
+
     # Nacional
     national_percentages = models.JSONField(default=dict)  # {force: percent}
     participation = models.FloatField(null=True, blank=True)
@@ -50,3 +172,56 @@ class OfficialResults(models.Model):
     def __str__(self):
         stamp = self.published_at.isoformat() if self.published_at else "draft"
         return f"OfficialResults({stamp})"
+
+
+class RankingEntry(models.Model):
+    """Fila del ranking materializado para una publicación de resultados.
+
+    Se recalcula en bloque al publicar (o reprocesar) y `/api/ranking` lee
+    directamente de esta tabla ordenada por `position`. Las correcciones de
+    staff sobre un pronóstico se aplican fila a fila (`ranking.rescore_prediction`).
+    """
+    results = models.ForeignKey(OfficialResults, on_delete=models.CASCADE, related_name='ranking_entries')
+    prediction = models.ForeignKey(Prediction, on_delete=models.CASCADE, related_name='ranking_entries')
+    # Instante en que se leyeron los pronósticos para calcular esta fila
+    computed_at = models.DateTimeField(default=timezone.now)
+
+    # Copia desnormalizada para servir el ranking sin tocar Prediction
+    username = models.CharField(max_length=120)
+    email = models.EmailField()
+    submitted_at = models.DateTimeField()
+
+    score = models.FloatField()
+    bonus = models.FloatField(default=0)
+    medals = models.JSONField(default=list)
+    breakdown = models.JSONField(default=dict)
+    position = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['results', 'prediction'], name='ranking_entry_unique_prediction'),
+        ]
+        indexes = [
+            models.Index(fields=['results', 'position'], name='ranking_entry_position_idx'),
+            models.Index(fields=['results', '-score', 'submitted_at', 'prediction'], name='ranking_entry_keyset_idx'),
+            models.Index(fields=['results', 'email'], name='ranking_entry_email_idx'),
+            models.Index(fields=['results', 'computed_at'], name='ranking_entry_computed_idx'),
+        ]
+
+    def __str__(self):
+        return f"#{self.position} {self.username} ({self.score})"
+
+
+class AdminLogout(models.Model):
+    """Último logout de un usuario del admin.
+
+    Los tokens Bearer no tienen estado: al hacer logout se registra el instante
+    y `AdminBearerAuthentication` rechaza los tokens emitidos hasta entonces
+    (`iat` menor o igual), también en los demás procesos.
+    """
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE,
+                                primary_key=True, related_name='admin_logout')
+    logged_out_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"AdminLogout({self.user_id} @ {self.logged_out_at.isoformat()})"
@@ -0,0 +1,176 @@
+"""Jugadores: contadores mantenidos y listado paginado de quienes completaron.
+
+`/api/players` no recorre pronósticos: lee `PlayerCounters` (una fila) y una
+página de usernames por keyset sobre `prediction_completed_user_idx`. La
+página se cachea con la `version` de los contadores, que cambia con cada
+alta, baja o cambio de estado. `aplayers_body` es la variante para la vista async.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+from asgiref.sync import sync_to_async
+from django.core import signing
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Q, QuerySet
+from django.db.models.signals import post_save, pre_save
+from django.dispatch import receiver
+
+from prode_backend import settings as app_settings
+from .consensus import apply_consensus_delta, deleted_consensus_delta, rebuild_consensus
+from .metrics import cache_lookup
+from .models import PlayerCounters, Prediction
+
+COUNTERS_PK = 1
+CURSOR_SALT = 'prode-players-cursor'
+CACHE_PREFIX = 'prode:players'
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def get_counters() -> PlayerCounters:
+    counters = PlayerCounters.objects.filter(pk=COUNTERS_PK).first()
+    return counters if counters is not None else recount_players()
+
+
+def recount_players() -> PlayerCounters:
+    """Recalcula los contadores desde la tabla (alta inicial o tras borrados masivos)."""
+    agg = Prediction.objects.aggregate(total=Count('id'), completed=Count('id', filter=Q(is_completed=True)))
+    with transaction.atomic():
+        counters, _ = PlayerCounters.objects.select_for_update().get_or_create(pk=COUNTERS_PK)
+        counters.total = agg['total']
+        counters.completed = agg['completed']
+        counters.version += 1
+        counters.save()
+    return counters
+
+
+def apply_counter_delta(total: int = 0, completed: int = 0, changed: bool = False) -> None:
+    """Suma los deltas a los contadores. `changed` fuerza nueva versión del listado
+    (p. ej. un jugador que completó y cambió su username)."""
+    if not (total or completed or changed):
+        return
+    updated = PlayerCounters.objects.filter(pk=COUNTERS_PK).update(
+        total=F('total') + total,
+        completed=F('completed') + completed,
+        version=F('version') + 1,
+    )
+    if not updated:
+        recount_players()
+
+
+def saved_delta(inserted: bool, old: Optional[Tuple[str, bool]], username: str, now_completed: bool) -> Dict[str, Any]:
+    """Deltas para `apply_counter_delta` a partir del estado previo (username, is_completed)."""
+    was_completed = bool(old[1]) if (old is not None and not inserted) else False
+    renamed = now_completed and old is not None and old[0] != username
+    return {
+        'total': 1 if inserted else 0,
+        'completed': int(now_completed) - int(was_completed),
+        'changed': inserted or renamed or now_completed != was_completed,
+    }
+
+
+def delete_predictions(qs: QuerySet) -> int:
+    """Borra los pronósticos de `qs` ajustando contadores y consenso. Devuelve cuántos se borraron."""
+    with transaction.atomic():
+        agg = qs.aggregate(total=Count('id'), completed=Count('id', filter=Q(is_completed=True)))
+        consensus = deleted_consensus_delta(qs.values_list('national_percentages', 'provinciales'))
+        _, per_model = qs.delete()
+        deleted = per_model.get(Prediction._meta.label, 0)
+        if deleted == agg['total']:
+            apply_counter_delta(total=-agg['total'], completed=-agg['completed'])
+            apply_consensus_delta(consensus)
+        else:
+            recount_players()  # borrado concurrente: se recalcula
+            rebuild_consensus()
+    return deleted
+
+
+def encode_cursor(username: str, pid: int) -> str:
+    return signing.dumps([username, pid], salt=CURSOR_SALT, compress=True)
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    try:
+        username, pid = signing.loads(cursor, salt=CURSOR_SALT)
+        return str(username), int(pid)
+    except Exception as e:
+        raise InvalidCursor(str(e))
+
+
+def players_page(limit: int, cursor: Optional[str] = None) -> Tuple[List[str], Optional[str]]:
+    return _split_page(list(_page(cursor)[:limit + 1]), limit)
+
+
+def _page(cursor: Optional[str]) -> QuerySet:
+    qs = Prediction.objects.filter(is_completed=True).order_by('username', 'id').values_list('username', 'id')
+    if cursor:
+        username, pid = decode_cursor(cursor)
+        qs = qs.filter(Q(username__gt=username) | Q(username=username, id__gt=pid))
+    return qs
+
+
+def _split_page(rows: List[Tuple[str, int]], limit: int) -> Tuple[List[str], Optional[str]]:
+    next_cursor = encode_cursor(*rows[limit - 1]) if len(rows) > limit else None
+    return [u for u, _ in rows[:limit]], next_cursor
+
+
+def players_body(limit: int, cursor: Optional[str] = None) -> Dict[str, Any]:
+    counters = get_counters()
+    key = _body_key(counters, limit, cursor)
+    body = cache.get(key)
+    cache_lookup('players', body is not None)
+    if body is None:
+        body = _body(counters, *players_page(limit, cursor))
+        cache.set(key, body, app_settings.PLAYERS_CACHE_TTL)
+    return body
+
+
+async def aplayers_body(limit: int, cursor: Optional[str] = None) -> Dict[str, Any]:
+    counters = await PlayerCounters.objects.filter(pk=COUNTERS_PK).afirst()
+    if counters is None:
+        counters = await sync_to_async(recount_players)()
+    key = _body_key(counters, limit, cursor)
+    # Cache en memoria del proceso (LocMem): se lee en el loop, sin pasar por un hilo
+    body = cache.get(key)
+    cache_lookup('players', body is not None)
+    if body is None:
+        rows = [row async for row in _page(cursor)[:limit + 1]]
+        body = _body(counters, *_split_page(rows, limit))
+        cache.set(key, body, app_settings.PLAYERS_CACHE_TTL)
+    return body
+
+
+def _body_key(counters: PlayerCounters, limit: int, cursor: Optional[str]) -> str:
+    return f'{CACHE_PREFIX}:{counters.version}:{limit}:{cursor or ""}'
+
+
+def _body(counters: PlayerCounters, usernames: List[str], next_cursor: Optional[str]) -> Dict[str, Any]:
+    return {
+        'count_completed': counters.completed,
+        'count_total': counters.total,
+        'usernames': usernames,
+        'next_cursor': next_cursor,
+    }
+
+
+@receiver(pre_save, sender=Prediction, dispatch_uid='prode_player_counters_before')
+def _count_before_save(sender, instance: Prediction, raw: bool = False, **kwargs):
+    # Instancia sin estado leído (armada a mano, `.only()`/`defer()`): se relee la fila previa
+    if raw or instance.pk is None or getattr(instance, '_loaded_player', None) is not None:
+        return
+    qs = Prediction.objects.filter(pk=instance.pk)
+    if not transaction.get_autocommit():
+        qs = qs.select_for_update()  # nadie la cambia hasta el post_save
+    instance._loaded_player = qs.values_list('username', 'is_completed').first()
+
+
+@receiver(post_save, sender=Prediction, dispatch_uid='prode_player_counters')
+def _count_on_save(sender, instance: Prediction, created: bool, raw: bool = False, **kwargs):
+    # Guardados por ORM (admin, seed); upsert e import llaman a apply_counter_delta
+    if raw:
+        return
+    old = None if created else getattr(instance, '_loaded_player', None)
+    apply_counter_delta(**saved_delta(created, old, instance.username, instance.is_completed))
+    instance._loaded_player = (instance.username, instance.is_completed)
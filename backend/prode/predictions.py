@@ -0,0 +1,93 @@
+"""Escritura de pronósticos.
+
+`upsert_prediction` guarda un pronóstico por email en un único viaje a la base
+(`INSERT … ON CONFLICT (email) DO UPDATE … RETURNING`), soportado por
+PostgreSQL y SQLite >= 3.35, los dos motores que usa el proyecto.
+"""
+from typing import Any, Dict
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .columns import try_sync_columns
+from .consensus import apply_consensus_delta, saved_consensus_delta
+from .metrics import UPSERT_SECONDS
+from .models import Prediction, compute_completed
+from .players import apply_counter_delta, saved_delta
+
+# Campos que el cliente puede escribir; los ausentes no se pisan en un update
+WRITABLE_FIELDS = (
+    'username', 'top3', 'national_percentages', 'participation', 'margin_1_2',
+    'blanco_nulo_impugnado', 'total_votes', 'provinciales', 'bonus',
+)
+
+
+@UPSERT_SECONDS.timed()
+def upsert_prediction(values: Dict[str, Any]) -> Prediction:
+    """Inserta o actualiza (por `email`) y devuelve la fila resultante.
+
+    `values` son datos ya validados; debe incluir `email`. Se lee antes el
+    estado previo (por el índice de email) para calcular `is_completed` sobre
+    la fila combinada y ajustar los contadores de jugadores y el consenso.
+    Esa lectura va bajo `_lock_email`: dos primeros envíos simultáneos del
+    mismo email no pueden ver ambos "no existe" y contarse dos veces.
+    """
+    meta = Prediction._meta
+    now = timezone.now()
+
+    row = {f.attname: f.get_default() for f in meta.concrete_fields if not f.primary_key}
+    row.update({k: v for k, v in values.items() if k in WRITABLE_FIELDS})
+    row['email'] = values['email']
+    row['created_at'] = now
+    row['updated_at'] = now
+
+    with transaction.atomic():
+        _lock_email(values['email'])
+        prev = (
+            Prediction.objects.select_for_update().filter(email=values['email'])
+            .values_list('username', 'is_completed', 'top3', 'national_percentages', 'provinciales').first()
+        )
+        keys = ('username', 'top3', 'national_percentages', 'provinciales')
+        merged = dict(zip(keys, prev[:1] + prev[2:])) if prev else {}
+        merged.update({k: row[k] for k in keys if k in values or not prev})
+        row['is_completed'] = compute_completed(*(merged[k] for k in keys))
+        saved = _upsert(row, values)
+        inserted = saved.created_at == saved.updated_at
+        apply_counter_delta(**saved_delta(inserted, prev[:2] if prev else None, saved.username, saved.is_completed))
+        apply_consensus_delta(saved_consensus_delta(
+            prev[3:] if prev else None, merged['national_percentages'], merged['provinciales'],
+        ))
+    # Fuera de la transacción: el store columnar es derivado y tolera fallas
+    try_sync_columns([saved])
+    return saved
+
+
+def _lock_email(email: str) -> None:
+    """Serializa las escrituras de un email hasta el fin de la transacción.
+
+    En PostgreSQL, un advisory lock por hash del email cubre también el caso
+    de alta (no hay fila que `select_for_update` pueda bloquear). SQLite abre
+    las transacciones con `BEGIN IMMEDIATE` (ver settings) y ya las serializa.
+    """
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_advisory_xact_lock(hashtext(%s))', [email])
+
+
+def _upsert(row: Dict[str, Any], values: Dict[str, Any]) -> Prediction:
+    meta = Prediction._meta
+    qn = connection.ops.quote_name
+    fields = [meta.get_field(name) for name in row]
+    params = [f.get_db_prep_save(row[f.attname], connection) for f in fields]
+    updated = [name for name in WRITABLE_FIELDS if name in values] + ['is_completed', 'updated_at']
+
+    sql = 'INSERT INTO {table} ({cols}) VALUES ({vals}) ON CONFLICT ({email}) DO UPDATE SET {sets} RETURNING {ret}'.format(
+        table=qn(meta.db_table),
+        cols=', '.join(qn(f.column) for f in fields),
+        vals=', '.join(['%s'] * len(fields)),
+        email=qn(meta.get_field('email').column),
+        sets=', '.join(f'{qn(meta.get_field(n).column)} = excluded.{qn(meta.get_field(n).column)}' for n in updated),
+        ret=', '.join(qn(f.column) for f in meta.concrete_fields),
+    )
+    # El SQL crudo no dispara post_save: contadores y store columnar se ajustan en upsert_prediction
+    return next(iter(Prediction.objects.raw(sql, params)))
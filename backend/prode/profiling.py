@@ -0,0 +1,290 @@
+"""Instrumentación por request (opt-in con `PROFILING_ENABLED=1`).
+
+`ProfilingMiddleware` mide por vista el tiempo total, las queries (cantidad y
+tiempo), el tiempo de serialización (bloques `span('serialize')`) y el tamaño
+de la respuesta. Las queries las cuenta un único wrapper por conexión
+(`_count_queries`, instalado con `connection_created`) que suma en el request
+del ContextVar en curso: así entran también las que el ORM async corre en el
+hilo de `sync_to_async`, y requests intercalados en el loop no se pisan. Con eso:
+
+- agrega un header `Server-Timing` (visible en las devtools del browser),
+- escribe una línea JSON por request en el logger `prode.requests`,
+- acumula histogramas por vista que sirve `/api/admin/profiling` (solo staff).
+
+Un staff puede pedir un cProfile de un request puntual con el header
+`X-Prode-Profile: 1` (sesión o token Bearer de admin); la respuesta trae
+`X-Prode-Profile-Id` y el volcado se lee en `/api/admin/profiling?profile=<id>`.
+`PROFILING_SAMPLE_RATE` perfila además una fracción aleatoria de requests.
+Bajo ASGI el cProfile mide el event loop: incluye lo que otros requests
+corran en el loop durante ese request y no lo que corre en hilos.
+"""
+import cProfile
+import io
+import json
+import logging
+import pstats
+import random
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import JsonResponse
+from django.utils import timezone
+
+from prode_backend import settings as app_settings
+from .auth import AdminBearerAuthentication
+from .metrics import Histogram, view_name
+
+logger = logging.getLogger('prode.requests')
+
+PROFILE_HEADER = 'X-Prode-Profile'
+PROFILE_ID_HEADER = 'X-Prode-Profile-Id'
+MAX_PROFILES = 20       # volcados guardados en memoria (los más viejos se descartan)
+PROFILE_LINES = 40      # funciones por volcado, ordenadas por tiempo acumulado
+
+MS_BUCKETS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+
+class RequestStats:
+    __slots__ = ('view', 'queries', 'db_ms', 'spans')
+
+    def __init__(self):
+        self.view: Optional[str] = None
+        self.queries = 0
+        self.db_ms = 0.0
+        self.spans: Dict[str, float] = {}
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar('prode_request_stats', default=None)
+
+
+def _count_queries(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    t0 = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.db_ms += (time.perf_counter() - t0) * 1000.0
+
+
+def _install_wrapper(connection, **kwargs) -> None:
+    # execute_wrappers vive en el DatabaseWrapper y sobrevive a reconexiones
+    if _count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_count_queries)
+
+
+connection_created.connect(_install_wrapper, dispatch_uid='prode_profiling_queries')
+# Conexiones ya abiertas en este hilo antes de importar el módulo
+for _conn in connections.all(initialized_only=True):
+    _install_wrapper(_conn)
+
+
+@contextmanager
+def span(name: str = 'serialize') -> Iterator[None]:
+    """Acumula el tiempo del bloque en el request en curso (no-op sin middleware)."""
+    stats = _current.get()
+    if stats is None:
+        yield
+        return
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.spans[name] = stats.spans.get(name, 0.0) + (time.perf_counter() - t0) * 1000.0
+
+
+class TimedJsonResponse(JsonResponse):
+    """`JsonResponse` que cuenta la codificación JSON como `serialize`."""
+
+    def __init__(self, *args, **kwargs):
+        with span('serialize'):
+            super().__init__(*args, **kwargs)
+
+
+class ViewStats:
+    def __init__(self):
+        self.wall_ms = Histogram(MS_BUCKETS)
+        self.db_ms = Histogram(MS_BUCKETS)
+        self.serialize_ms = Histogram(MS_BUCKETS)
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.size_bytes = Histogram(SIZE_BUCKETS)
+        self.statuses: Dict[str, int] = {}
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'wall_ms': self.wall_ms.snapshot(),
+            'db_ms': self.db_ms.snapshot(),
+            'serialize_ms': self.serialize_ms.snapshot(),
+            'queries': self.queries.snapshot(),
+            'size_bytes': self.size_bytes.snapshot(),
+            'statuses': dict(self.statuses),
+        }
+
+
+_views: Dict[str, ViewStats] = {}
+_profiles: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+_lock = threading.Lock()
+
+
+def record(view: str, status: int, wall_ms: float, stats: RequestStats, size: Optional[int]) -> None:
+    with _lock:
+        vs = _views.get(view)
+        if vs is None:
+            vs = _views[view] = ViewStats()
+        vs.statuses[str(status)] = vs.statuses.get(str(status), 0) + 1
+    vs.wall_ms.observe(wall_ms)
+    vs.db_ms.observe(stats.db_ms)
+    vs.serialize_ms.observe(stats.spans.get('serialize', 0.0))
+    vs.queries.observe(stats.queries)
+    if size is not None:
+        vs.size_bytes.observe(size)
+
+
+def snapshot() -> Dict[str, Any]:
+    with _lock:
+        views = dict(_views)
+        profiles = [{'id': pid, 'view': p['view'], 'created_at': p['created_at']} for pid, p in _profiles.items()]
+    return {'views': {name: vs.snapshot() for name, vs in sorted(views.items())}, 'profiles': profiles}
+
+
+def reset() -> None:
+    with _lock:
+        _views.clear()
+        _profiles.clear()
+
+
+def save_profile(view: str, profiler: cProfile.Profile) -> str:
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(PROFILE_LINES)
+    pid = uuid.uuid4().hex[:12]
+    with _lock:
+        _profiles[pid] = {'view': view, 'created_at': timezone.now().isoformat(), 'stats': out.getvalue()}
+        while len(_profiles) > MAX_PROFILES:
+            _profiles.popitem(last=False)
+    return pid
+
+
+def get_profile(pid: str) -> Optional[Dict[str, Any]]:
+    with _lock:
+        p = _profiles.get(pid)
+    return dict(p, id=pid) if p else None
+
+
+def server_timing(wall_ms: float, stats: RequestStats) -> str:
+    parts = [f'total;dur={wall_ms:.1f}', f'db;dur={stats.db_ms:.1f};desc="{stats.queries} queries"']
+    parts += [f'{name};dur={ms:.1f}' for name, ms in stats.spans.items()]
+    return ', '.join(parts)
+
+
+def _is_staff_request(request) -> bool:
+    user = getattr(request, 'user', None)
+    if getattr(user, 'is_authenticated', False) and getattr(user, 'is_staff', False):
+        return True
+    try:
+        return AdminBearerAuthentication().authenticate(request) is not None
+    except Exception:
+        return False
+
+
+def wants_profile(request) -> bool:
+    if request.headers.get(PROFILE_HEADER) == '1':
+        return _is_staff_request(request)
+    rate = app_settings.PROFILING_SAMPLE_RATE
+    return rate > 0 and random.random() < rate
+
+
+class ProfilingMiddleware:
+    """Va después de `AuthenticationMiddleware` (usa `request.user` para el cProfile de staff)."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        stats = RequestStats()
+        token = _current.set(stats)
+        profiler = cProfile.Profile() if wants_profile(request) else None
+        t0 = time.perf_counter()
+        try:
+            if profiler is not None:
+                profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                if profiler is not None:
+                    profiler.disable()
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, stats, profiler, t0)
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        token = _current.set(stats)
+        # Con el header se resuelve request.user (una query): fuera del loop
+        if request.headers.get(PROFILE_HEADER) == '1':
+            wanted = await sync_to_async(wants_profile)(request)
+        else:
+            wanted = wants_profile(request)
+        profiler = cProfile.Profile() if wanted else None
+        t0 = time.perf_counter()
+        try:
+            if profiler is not None:
+                profiler.enable()
+            try:
+                response = await self.get_response(request)
+            finally:
+                if profiler is not None:
+                    profiler.disable()
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, stats, profiler, t0)
+
+    def _finish(self, request, response, stats: RequestStats, profiler: Optional[cProfile.Profile], t0: float):
+        wall_ms = (time.perf_counter() - t0) * 1000.0
+
+        view = stats.view or 'unresolved'
+        size = None if response.streaming else len(response.content)
+        record(view, response.status_code, wall_ms, stats, size)
+        response['Server-Timing'] = server_timing(wall_ms, stats)
+        profile_id = None
+        if profiler is not None:
+            profile_id = save_profile(view, profiler)
+            response[PROFILE_ID_HEADER] = profile_id
+        logger.info(json.dumps({
+            'event': 'request',
+            'method': request.method,
+            'path': request.path,
+            'view': view,
+            'status': response.status_code,
+            'wall_ms': round(wall_ms, 2),
+            'db_ms': round(stats.db_ms, 2),
+            'queries': stats.queries,
+            'spans_ms': {k: round(v, 2) for k, v in stats.spans.items()},
+            'bytes': size,
+            'profile_id': profile_id,
+        }))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        stats = _current.get()
+        if stats is not None:
+            stats.view = view_name(view_func)
+        return None
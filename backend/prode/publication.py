@@ -0,0 +1,34 @@
+"""Efectos de publicar (o republicar) un `OfficialResults`.
+
+Centraliza lo que tiene que pasar después de una publicación para que todas
+las vistas que publican hagan lo mismo: ranking, caches y aviso por SSE.
+"""
+from prode_backend import settings as app_settings
+from .events import notify_results_published, top_snapshot
+from .models import OfficialResults
+from .ranking import apply_results_delta, rebuild_ranking
+from .response_cache import invalidate_results_cache, prime_results_cache
+from .results_delta import ResultsChange
+
+
+def after_results_published(res: OfficialResults) -> int:
+    """Recalcula el ranking, invalida caches y notifica a los clientes SSE.
+
+    Devuelve la cantidad de filas del ranking.
+    """
+    before_top = top_snapshot(app_settings.SSE_TOP_N) if app_settings.SSE_TOP_N else None
+    count = rebuild_ranking(res)
+    invalidate_results_cache()
+    notify_results_published(before_top)
+    return count
+
+
+def after_results_delta(base: OfficialResults, res: OfficialResults, change: ResultsChange) -> int:
+    """Igual que `after_results_published` pero para un escrutinio parcial:
+    el ranking se actualiza según lo que cambió y el cache se llena con el
+    snapshot nuevo sin releerlo."""
+    before_top = top_snapshot(app_settings.SSE_TOP_N) if app_settings.SSE_TOP_N else None
+    count = apply_results_delta(base, res, change.national, change.provinces)
+    prime_results_cache(res)
+    notify_results_published(before_top, change.as_dict())
+    return count
@@ -0,0 +1,403 @@
+"""Ranking materializado.
+
+El ranking se calcula una sola vez por publicación de `OfficialResults` y se
+persiste en `RankingEntry`; las vistas públicas solo leen la tabla ya ordenada.
+Si al leer el ranking está desactualizado, lo recalcula un solo request por
+proceso (`_rebuild_once`); los demás sirven las filas anteriores mientras tanto.
+Las funciones `a*` son las variantes para las vistas async (ORM async de Django).
+"""
+import logging
+from typing import Any, Dict, Iterable, List, Optional
+
+from asgiref.sync import sync_to_async
+from django.core import signing
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Max, Q, QuerySet
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Prediction, OfficialResults, RankingEntry
+from .batch_scoring import Columnar, score_rows
+from .columns import current_layout, is_fresh
+from .metrics import RANKING_SECONDS
+from .scoring import BONUS_KEYS, ScoringContext, score_prediction, scoring_context
+
+logger = logging.getLogger(__name__)
+
+BULK_BATCH_SIZE = 1000
+# Máximo de ids por `IN (...)` (SQLite limita la cantidad de parámetros)
+IN_BATCH_SIZE = 500
+SCORE_FIELDS = ('computed_at', 'username', 'email', 'submitted_at', 'score', 'bonus', 'medals', 'breakdown')
+CURSOR_SALT = 'prode-ranking-cursor'
+REBUILD_LOCK_KEY = 'prode:ranking:rebuild:{}'
+REBUILD_LOCK_TTL = 300  # segundos; libera el lock si el proceso muere a mitad del recálculo
+KEYSET_ORDER = ('-score', 'submitted_at', 'prediction_id')
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def _published() -> QuerySet:
+    return OfficialResults.objects.filter(is_published=True).order_by('-published_at', '-created_at')
+
+
+def latest_published_results() -> Optional[OfficialResults]:
+    return _published().first()
+
+
+async def alatest_published_results() -> Optional[OfficialResults]:
+    return await _published().afirst()
+
+
+@RANKING_SECONDS.timed('rebuild')
+def rebuild_ranking(res: OfficialResults) -> int:
+    """Recalcula el ranking completo para `res` y reemplaza el anterior.
+
+    Devuelve la cantidad de filas materializadas.
+    """
+    started = timezone.now()
+    ctx = scoring_context(res)
+    meta, rows = _scoring_inputs(ctx)
+
+    entries: List[RankingEntry] = []
+    for (pid, username, email, updated_at), scored in zip(meta, score_rows(rows, res, ctx)):
+        if scored is None:
+            continue
+        entries.append(RankingEntry(
+            results=res,
+            prediction_id=pid,
+            computed_at=started,
+            username=username,
+            email=email,
+            submitted_at=updated_at,
+            score=scored['score'],
+            bonus=scored['bonus'],
+            medals=scored['medals'],
+            breakdown=scored['breakdown'],
+            position=0,
+        ))
+    entries.sort(key=lambda e: (-e.score, e.submitted_at, e.prediction_id))
+    for idx, e in enumerate(entries, start=1):
+        e.position = idx
+
+    with transaction.atomic():
+        # Lock de fila del resultado: dos recálculos (de distintos procesos) no
+        # intercalan su DELETE con los INSERT del otro
+        list(OfficialResults.objects.select_for_update().filter(pk=res.pk).values_list('pk'))
+        # Solo se conserva el ranking de la publicación vigente
+        RankingEntry.objects.all().delete()
+        RankingEntry.objects.bulk_create(entries, batch_size=BULK_BATCH_SIZE)
+    return len(entries)
+
+
+def _scoring_inputs(ctx: ScoringContext):
+    """Filas para `score_rows`: nacional y Top-3 desde el store columnar.
+
+    Los provinciales y el bonus (JSON) solo se leen si la publicación los
+    puntúa; las filas sin store al día se completan desde el JSON original.
+    """
+    forces, key = current_layout()
+    need_prov = bool(ctx.provinces)
+    need_bonus = any(ctx.answers.values())
+    fields = [
+        'id', 'username', 'email', 'updated_at', 'participation', 'margin_1_2',
+        'columns__layout', 'columns__synced_at', 'columns__exotic', 'columns__national',
+        'columns__pick1', 'columns__pick2', 'columns__pick3',
+        'provinciales' if need_prov else 'id',
+        'bonus' if need_bonus else 'id',
+    ]
+    meta, rows, stale = [], [], {}
+    qs = Prediction.objects.order_by('id').values_list(*fields)
+    for (pid, username, email, updated_at, part, margin, layout, synced_at, exotic, blob,
+         p1, p2, p3, prov, bonus) in qs.iterator(chunk_size=2000):
+        meta.append((pid, username, email, updated_at))
+        prov = prov if need_prov else None
+        bonus = bonus if need_bonus else None
+        if not exotic and is_fresh(layout, synced_at, updated_at, key):
+            rows.append(((p1, p2, p3), Columnar(bytes(blob), forces), part, margin, prov, bonus))
+        else:
+            stale[pid] = len(rows)
+            rows.append((None, None, part, margin, prov, bonus))
+
+    pids = list(stale)
+    for i in range(0, len(pids), IN_BATCH_SIZE):
+        chunk = pids[i:i + IN_BATCH_SIZE]
+        for pid, top3, nat in Prediction.objects.filter(id__in=chunk).values_list('id', 'top3', 'national_percentages'):
+            idx = stale[pid]
+            rows[idx] = (top3, nat) + rows[idx][2:]
+    return meta, rows
+
+
+def ensure_ranking(res: OfficialResults) -> None:
+    """Materializa el ranking de `res` si no existe (p. ej. tras una invalidación
+    o si se publicó antes de existir esta tabla) o si algún pronóstico cambió
+    después de calcularlo. Ambos chequeos usan índices."""
+    computed_at = ranking_watermark(res)
+    if computed_at is None:
+        if Prediction.objects.exists():
+            _rebuild_once(res)
+        return
+    if Prediction.objects.filter(updated_at__gt=computed_at).exists():
+        _rebuild_once(res)
+
+
+async def aensure_ranking(res: OfficialResults) -> None:
+    computed_at = (await RankingEntry.objects.filter(results=res).aaggregate(m=Max('computed_at')))['m']
+    if computed_at is None:
+        stale = await Prediction.objects.aexists()
+    else:
+        stale = await Prediction.objects.filter(updated_at__gt=computed_at).aexists()
+    if stale:
+        # Recálculo completo (CPU y escrituras): en un hilo, fuera del event loop
+        await sync_to_async(_rebuild_once)(res)
+
+
+def _rebuild_once(res: OfficialResults) -> bool:
+    """Recalcula el ranking salvo que otro request de este proceso ya lo esté
+    haciendo; en ese caso se sirven las filas existentes. Entre procesos los
+    recálculos se serializan con el lock de fila de `rebuild_ranking`."""
+    key = REBUILD_LOCK_KEY.format(res.pk)
+    if not cache.add(key, 1, REBUILD_LOCK_TTL):
+        return False
+    try:
+        rebuild_ranking(res)
+    finally:
+        cache.delete(key)
+    return True
+
+
+def ranking_watermark(res: OfficialResults):
+    """Último `computed_at` del ranking de `res` (None si no está materializado)."""
+    return RankingEntry.objects.filter(results=res).aggregate(m=Max('computed_at'))['m']
+
+
+@RANKING_SECONDS.timed('rescore')
+def rescore_prediction(res: OfficialResults, pred: Prediction) -> Optional[int]:
+    """Actualiza solo la fila de `pred` y corre las posiciones de los vecinos.
+
+    Ubica la nueva posición con una búsqueda por keyset (índice) y desplaza en
+    un solo UPDATE las filas entre la posición vieja y la nueva. Si el ranking
+    no está materializado o quedó desactualizado por otros cambios, cae al
+    recálculo completo. Devuelve la nueva posición (None si la fila no puntúa).
+    """
+    started = timezone.now()
+    entries = RankingEntry.objects.filter(results=res)
+    watermark = ranking_watermark(res)
+    if watermark is None:
+        return None  # se materializa completo en la próxima lectura
+    if Prediction.objects.filter(updated_at__gt=watermark).exclude(id=pred.id).exists():
+        rebuild_ranking(res)
+        return entries.filter(prediction=pred).values_list('position', flat=True).first()
+
+    try:
+        scored = score_prediction(pred, res)
+    except Exception as row_err:
+        logger.warning("rescore_prediction error id=%s: %s: %s", pred.id, type(row_err).__name__, row_err)
+        scored = None
+
+    with transaction.atomic():
+        me = entries.select_for_update().filter(prediction=pred).first()
+        others = entries.exclude(prediction=pred)
+        if scored is None:
+            if me is not None:
+                me.delete()
+                others.filter(position__gt=me.position).update(position=F('position') - 1)
+            return None
+
+        score, submitted_at = scored['score'], pred.updated_at
+        # Primera fila que queda detrás de la nueva clave (score desc, submitted_at, id)
+        behind = others.order_by(*KEYSET_ORDER).filter(
+            Q(score__lt=score)
+            | Q(score=score, submitted_at__gt=submitted_at)
+            | Q(score=score, submitted_at=submitted_at, prediction_id__gt=pred.id)
+        ).values_list('position', flat=True).first()
+        if behind is None:
+            last = others.aggregate(m=Max('position'))['m'] or 0
+            target = last + 1 if me is None or me.position > last else last
+        elif me is not None and me.position < behind:
+            target = behind - 1
+        else:
+            target = behind
+
+        if me is None:
+            others.filter(position__gte=target).update(position=F('position') + 1)
+            me = RankingEntry(results=res, prediction=pred)
+        elif target < me.position:
+            others.filter(position__gte=target, position__lt=me.position).update(position=F('position') + 1)
+        elif target > me.position:
+            others.filter(position__gt=me.position, position__lte=target).update(position=F('position') - 1)
+
+        me.computed_at = started
+        me.username = pred.username
+        me.email = pred.email
+        me.submitted_at = submitted_at
+        me.score = score
+        me.bonus = scored['bonus']
+        me.medals = scored['medals']
+        me.breakdown = scored['breakdown']
+        me.position = target
+        me.save()
+    return target
+
+
+@RANKING_SECONDS.timed('delta')
+def apply_results_delta(base: OfficialResults, res: OfficialResults, national: bool, provinces: Iterable[str]) -> int:
+    """Pasa el ranking de `base` a la nueva versión `res` re-puntuando solo lo afectado.
+
+    Si cambió algo nacional (afecta a todos) o el ranking no está al día se
+    recalcula completo. Si solo cambiaron provincias, se re-puntúan los
+    pronósticos que incluyen alguna de ellas o alguna pregunta bonus cuya
+    respuesta cambió, y se renumeran las posiciones. Devuelve la cantidad de filas.
+    """
+    started = timezone.now()
+    watermark = ranking_watermark(base)
+    if national or watermark is None or Prediction.objects.filter(updated_at__gt=watermark).exists():
+        return rebuild_ranking(res)
+
+    ctx = scoring_context(res)
+    old_answers = scoring_context(base).answers
+    affected = Q()
+    for name in provinces:
+        affected |= Q(provinciales__has_key=name)
+    for key in BONUS_KEYS:
+        if old_answers[key] != ctx.answers[key]:
+            affected |= Q(bonus__has_key=key)
+
+    with transaction.atomic():
+        RankingEntry.objects.filter(results=base).update(results=res)
+        if affected:
+            qs = Prediction.objects.filter(affected).values_list(
+                'id', 'username', 'email', 'updated_at', 'top3', 'national_percentages',
+                'participation', 'margin_1_2', 'provinciales', 'bonus',
+            )
+            meta, rows = {}, []
+            for pid, username, email, updated_at, *row in qs.iterator(chunk_size=2000):
+                meta[pid] = (username, email, updated_at)
+                rows.append(row)
+            scored = dict(zip(meta, score_rows(rows, res, ctx)))
+            _update_scored_entries(res, meta, scored, started)
+        _renumber(res)
+    return RankingEntry.objects.filter(results=res).count()
+
+
+def _update_scored_entries(res: OfficialResults, meta, scored, started) -> None:
+    pids = list(scored)
+    for i in range(0, len(pids), IN_BATCH_SIZE):
+        chunk = pids[i:i + IN_BATCH_SIZE]
+        changed, dropped = [], []
+        for e in RankingEntry.objects.filter(results=res, prediction_id__in=chunk):
+            out = scored[e.prediction_id]
+            if out is None:
+                dropped.append(e.id)
+                continue
+            e.username, e.email, e.submitted_at = meta[e.prediction_id]
+            e.computed_at = started
+            e.score = out['score']
+            e.bonus = out['bonus']
+            e.medals = out['medals']
+            e.breakdown = out['breakdown']
+            changed.append(e)
+        RankingEntry.objects.bulk_update(changed, SCORE_FIELDS, batch_size=BULK_BATCH_SIZE)
+        if dropped:
+            RankingEntry.objects.filter(id__in=dropped).delete()
+
+
+def _renumber(res: OfficialResults) -> None:
+    """Reasigna posiciones según el orden de keyset; solo escribe las que cambian."""
+    ordered = RankingEntry.objects.filter(results=res).order_by(*KEYSET_ORDER).values_list('id', 'position')
+    moved = [
+        RankingEntry(id=eid, position=idx)
+        for idx, (eid, pos) in enumerate(ordered.iterator(chunk_size=5000), start=1)
+        if pos != idx
+    ]
+    RankingEntry.objects.bulk_update(moved, ['position'], batch_size=BULK_BATCH_SIZE)
+
+
+def invalidate_ranking() -> None:
+    """Descarta el ranking materializado; se reconstruye en la próxima lectura."""
+    RankingEntry.objects.all().delete()
+
+
+def entry_to_item(e: RankingEntry, compact: bool = False) -> Dict[str, Any]:
+    item = {
+        'position': e.position,
+        'username': e.username,
+        'score': e.score,
+        'bonus': e.bonus,
+        'medals': e.medals,
+        'submitted_at': e.submitted_at.isoformat(),
+    }
+    if not compact:
+        item['email'] = e.email
+        item['breakdown'] = e.breakdown
+    return item
+
+
+def encode_cursor(e: RankingEntry) -> str:
+    return signing.dumps([e.score, e.submitted_at.isoformat(), e.prediction_id], salt=CURSOR_SALT, compress=True)
+
+
+def decode_cursor(cursor: str):
+    try:
+        score, submitted, pid = signing.loads(cursor, salt=CURSOR_SALT)
+        submitted_at = parse_datetime(submitted)
+        if submitted_at is None:
+            raise ValueError('fecha inválida')
+        return float(score), submitted_at, int(pid)
+    except Exception as e:
+        raise InvalidCursor(str(e))
+
+
+def ranking_page(qs: QuerySet, limit: int, cursor: Optional[str] = None):
+    """Página por keyset sobre (score desc, submitted_at asc, prediction asc).
+
+    Devuelve (entries, next_cursor); next_cursor es None en la última página.
+    """
+    return _split_page(list(_keyset(qs, cursor)[:limit + 1]), limit)
+
+
+async def aranking_page(qs: QuerySet, limit: int, cursor: Optional[str] = None):
+    return _split_page([e async for e in _keyset(qs, cursor)[:limit + 1]], limit)
+
+
+def _keyset(qs: QuerySet, cursor: Optional[str]) -> QuerySet:
+    qs = qs.order_by(*KEYSET_ORDER)
+    if cursor:
+        score, submitted_at, pid = decode_cursor(cursor)
+        qs = qs.filter(
+            Q(score__lt=score)
+            | Q(score=score, submitted_at__gt=submitted_at)
+            | Q(score=score, submitted_at=submitted_at, prediction_id__gt=pid)
+        )
+    return qs
+
+
+def _split_page(entries: List[RankingEntry], limit: int):
+    next_cursor = encode_cursor(entries[limit - 1]) if len(entries) > limit else None
+    return entries[:limit], next_cursor
+
+
+def ranking_window(res: OfficialResults, email: str, radius: int):
+    """Posición de `email` y sus vecinos (`radius` arriba y abajo).
+
+    Devuelve (entry_propio | None, entries_de_la_ventana).
+    """
+    me = RankingEntry.objects.filter(results=res, email=email).order_by('position').first()
+    if me is None:
+        return None, []
+    return me, list(_window(res, me, radius))
+
+
+async def aranking_window(res: OfficialResults, email: str, radius: int):
+    me = await RankingEntry.objects.filter(results=res, email=email).order_by('position').afirst()
+    if me is None:
+        return None, []
+    return me, [e async for e in _window(res, me, radius)]
+
+
+def _window(res: OfficialResults, me: RankingEntry, radius: int) -> QuerySet:
+    lo = max(1, me.position - radius)
+    hi = me.position + radius
+    return RankingEntry.objects.filter(results=res, position__gte=lo, position__lte=hi).order_by('position')
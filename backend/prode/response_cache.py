@@ -0,0 +1,141 @@
+"""Cache de respuestas casi estáticas (`/api/results`, `/api/metadata`, `/api/consensus`).
+
+El cuerpo JSON se guarda ya serializado junto con un ETag fuerte derivado de
+la versión de los datos (id/updated_at del último resultado publicado, o mtime
+de los JSON estáticos). Las vistas responden 304 ante `If-None-Match` sin
+tocar la base ni volver a serializar. Bajo ASGI, `aresults_body` resuelve
+los hits en el event loop y solo pasa a un hilo para armar el cuerpo (ídem
+`aconsensus_body`).
+"""
+import hashlib
+import json
+from typing import Any, Callable, Dict, Tuple
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+
+from prode_backend import settings as app_settings
+from .consensus import consensus_payload
+from .metrics import cache_lookup
+from .profiling import span
+from .ranking import latest_published_results
+from .serializers import OfficialResultsSerializer
+from .validators import get_schema
+
+RESULTS_CACHE_KEY = 'prode:results'
+METADATA_CACHE_KEY = 'prode:metadata'
+CONSENSUS_CACHE_KEY = 'prode:consensus'
+
+# (etag, body)
+CachedBody = Tuple[str, bytes]
+
+EMPTY_RESULTS_PAYLOAD = {
+    'national_percentages': {},
+    'participation': None,
+    'margin_1_2': None,
+    'blanco_nulo_impugnado': None,
+    'total_votes': None,
+    'provinciales': {},
+}
+
+
+def strong_etag(token: str) -> str:
+    return '"%s"' % hashlib.sha1(token.encode('utf-8')).hexdigest()
+
+
+def _encode(payload: Dict[str, Any]) -> bytes:
+    with span('serialize'):
+        return json.dumps(payload, cls=DjangoJSONEncoder).encode('utf-8')
+
+
+def _get_or_build(name: str, key: str, build: Callable[[], Tuple[str, Dict[str, Any]]], ttl: int) -> CachedBody:
+    entry = cache.get(key)
+    cache_lookup(name, entry is not None)
+    if entry is None:
+        token, payload = build()
+        entry = (strong_etag(token), _encode(payload))
+        cache.set(key, entry, ttl)
+    return entry
+
+
+def conditional_response(request, entry: CachedBody, max_age: int) -> HttpResponse:
+    etag, body = entry
+    client_tags = parse_etags(request.headers.get('If-None-Match') or '')
+    if '*' in client_tags or etag in client_tags or f'W/{etag}' in client_tags:
+        resp = HttpResponseNotModified()
+    else:
+        resp = HttpResponse(body, content_type='application/json')
+    resp['ETag'] = etag
+    resp['Cache-Control'] = f'public, max-age={max_age}'
+    patch_vary_headers(resp, ['Origin'])
+    return resp
+
+
+def results_body(wait_detail: str) -> CachedBody:
+    def build():
+        obj = latest_published_results()
+        if not obj:
+            return 'empty', dict(EMPTY_RESULTS_PAYLOAD, detail=wait_detail)
+        return f'{obj.id}:{obj.updated_at.isoformat()}', OfficialResultsSerializer(obj).data
+
+    return _get_or_build('results', RESULTS_CACHE_KEY, build, app_settings.RESULTS_CACHE_TTL)
+
+
+async def aresults_body(wait_detail: str) -> CachedBody:
+    # LocMem: la lectura es en memoria y no bloquea el loop
+    entry = cache.get(RESULTS_CACHE_KEY)
+    if entry is not None:
+        cache_lookup('results', True)
+        return entry
+    # Miss: el camino sync vuelve a mirar el cache (otro request pudo llenarlo) y cuenta el resultado
+    return await sync_to_async(results_body)(wait_detail)
+
+
+def metadata_body() -> CachedBody:
+    # La clave incluye los mtime de los JSON estáticos (versión del schema) y el
+    # deadline: si algo cambia se arma una entrada nueva y las viejas expiran solas.
+    schema = get_schema()
+    token = f'{schema.mtimes}:{app_settings.DEADLINE}'
+    key = f'{METADATA_CACHE_KEY}:{strong_etag(token)}'
+
+    def build():
+        return token, {
+            'fuerzas': list(schema.fuerzas_sorted),
+            'provincias': list(schema.provincias_sorted),
+            'fuerzas_por_provincia': {prov: list(vals) for prov, vals in schema.fuerzas_por_provincia_sorted.items()},
+            'deadline': app_settings.DEADLINE,
+        }
+
+    return _get_or_build('metadata', key, build, app_settings.METADATA_CACHE_TTL)
+
+
+def consensus_body() -> CachedBody:
+    # El consenso cambia con cada envío: no se invalida, se rearma al vencer el TTL
+    def build():
+        payload = consensus_payload()
+        return json.dumps(payload, sort_keys=True), payload
+
+    return _get_or_build('consensus', CONSENSUS_CACHE_KEY, build, app_settings.CONSENSUS_CACHE_TTL)
+
+
+async def aconsensus_body() -> CachedBody:
+    entry = cache.get(CONSENSUS_CACHE_KEY)
+    if entry is not None:
+        cache_lookup('consensus', True)
+        return entry
+    return await sync_to_async(consensus_body)()
+
+
+def prime_results_cache(obj) -> None:
+    """Guarda el snapshot recién publicado (ya en memoria) sin volver a leerlo de la base."""
+    token = f'{obj.id}:{obj.updated_at.isoformat()}'
+    cache.set(RESULTS_CACHE_KEY, (strong_etag(token), _encode(OfficialResultsSerializer(obj).data)),
+              app_settings.RESULTS_CACHE_TTL)
+
+
+def invalidate_results_cache() -> None:
+    cache.delete(RESULTS_CACHE_KEY)
@@ -0,0 +1,121 @@
+"""Escrutinios parciales: deltas sobre `OfficialResults`.
+
+Un delta trae solo lo que cambió respecto de la versión vigente:
+
+    {"national_percentages": {"LLA": 41.2}, "participation": 68.1,
+     "provinciales": {"CABA": {"percentages": {"LLA": 50.3}, "winner": "LLA"}}}
+
+Las fuerzas o provincias con valor `null` se eliminan. `apply_delta` devuelve
+el snapshot consolidado y qué partes cambiaron, para que ranking y caches se
+actualicen solo en lo necesario.
+"""
+import copy
+from dataclasses import dataclass, field
+from typing import Any, Dict, Set, Tuple
+
+from .models import OfficialResults
+
+# Campos nacionales que afectan el puntaje; el resto no requiere re-puntuar
+SCORING_FIELDS = ('national_percentages', 'participation', 'margin_1_2')
+SCALAR_FIELDS = ('participation', 'margin_1_2', 'blanco_nulo_impugnado', 'total_votes')
+SNAPSHOT_FIELDS = ('national_percentages',) + SCALAR_FIELDS + ('provinciales',)
+
+
+class DeltaError(Exception):
+    pass
+
+
+@dataclass
+class ResultsChange:
+    fields: Set[str] = field(default_factory=set)      # campos de primer nivel modificados
+    provinces: Set[str] = field(default_factory=set)   # provincias agregadas, modificadas o quitadas
+
+    @property
+    def national(self) -> bool:
+        return any(f in self.fields for f in SCORING_FIELDS)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {'fields': sorted(self.fields), 'provinces': sorted(self.provinces)}
+
+
+def snapshot_of(res: OfficialResults) -> Dict[str, Any]:
+    return {f: copy.deepcopy(getattr(res, f)) for f in SNAPSHOT_FIELDS}
+
+
+def apply_delta(snapshot: Dict[str, Any], delta: Dict[str, Any]) -> Tuple[Dict[str, Any], ResultsChange]:
+    """Aplica `delta` sobre una copia de `snapshot`. No toca la base."""
+    if not isinstance(delta, dict):
+        raise DeltaError('El delta debe ser un objeto')
+    unknown = sorted(set(delta) - set(SNAPSHOT_FIELDS))
+    if unknown:
+        raise DeltaError(f'Campos desconocidos en el delta: {", ".join(unknown)}')
+
+    merged = copy.deepcopy(snapshot)
+    change = ResultsChange()
+
+    for f in SCALAR_FIELDS:
+        if f in delta and delta[f] != merged.get(f):
+            merged[f] = delta[f]
+            change.fields.add(f)
+
+    if 'national_percentages' in delta:
+        nat = dict(merged.get('national_percentages') or {})
+        if _merge_values(nat, delta['national_percentages'], 'national_percentages'):
+            merged['national_percentages'] = nat
+            change.fields.add('national_percentages')
+
+    if 'provinciales' in delta:
+        prov_delta = delta['provinciales']
+        if not isinstance(prov_delta, dict):
+            raise DeltaError('provinciales debe ser un objeto')
+        provs = dict(merged.get('provinciales') or {})
+        for name, pdelta in prov_delta.items():
+            if pdelta is None:
+                if provs.pop(name, None) is not None:
+                    change.provinces.add(name)
+                continue
+            if not isinstance(pdelta, dict):
+                raise DeltaError(f'provinciales.{name} debe ser un objeto')
+            before = provs.get(name) if isinstance(provs.get(name), dict) else {}
+            after = _merge_province(before, pdelta, name)
+            if after != before:
+                provs[name] = after
+                change.provinces.add(name)
+        if change.provinces:
+            merged['provinciales'] = provs
+            change.fields.add('provinciales')
+
+    return merged, change
+
+
+def _merge_values(target: Dict[str, Any], values: Any, label: str) -> bool:
+    if not isinstance(values, dict):
+        raise DeltaError(f'{label} debe ser un objeto')
+    changed = False
+    for k, v in values.items():
+        if v is None:
+            changed |= target.pop(k, None) is not None
+        elif target.get(k) != v:
+            target[k] = v
+            changed = True
+    return changed
+
+
+def _merge_province(before: Dict[str, Any], pdelta: Dict[str, Any], name: str) -> Dict[str, Any]:
+    after = copy.deepcopy(before)
+    # Se respeta el alias que ya use la provincia (percentages/porcentajes, winner/ganador)
+    pct_key = 'porcentajes' if 'porcentajes' in before and 'percentages' not in before else 'percentages'
+    win_key = 'ganador' if 'ganador' in before and 'winner' not in before else 'winner'
+    pcts = pdelta.get('percentages', pdelta.get('porcentajes'))
+    if pcts is not None:
+        values = dict(after.get(pct_key) or {})
+        _merge_values(values, pcts, f'provinciales.{name}.percentages')
+        after[pct_key] = values
+    for key in ('winner', 'ganador'):
+        if key in pdelta:
+            if pdelta[key] is None:
+                after.pop(win_key, None)
+            else:
+                after[win_key] = pdelta[key]
+            break
+    return after
@@ -0,0 +1,260 @@
+"""Scoring de pronósticos contra resultados oficiales.
+
+Funciones puras (sin acceso a base) compartidas por el ranking materializado,
+las vistas y el export CSV.
+"""
+from typing import Any, Dict, FrozenSet, List, Mapping, NamedTuple, Optional, Tuple
+
+from .models import Prediction, OfficialResults
+from .validators import _read_json
+
+# Claves escalares de `breakdown`, en el orden en que se exportan
+BREAKDOWN_FIELDS = (
+    'mae_national', 'participation_error', 'margin_error', 'top3_points',
+    'national_score', 'provincial_points', 'provincial_winners', 'provincial_mae',
+)
+
+# Provinciales: por cada provincia pronosticada se suman puntos por acertar el
+# ganador y hasta PROV_ACCURACY_POINTS según el MAE (0 puntos con MAE >= PROV_MAE_CAP).
+PROV_WINNER_POINTS = 2.0
+PROV_ACCURACY_POINTS = 1.0
+PROV_MAE_CAP = 10.0
+
+
+# Preguntas bonus: cada respuesta es una provincia; BONUS_POINTS por acierto
+BONUS_KEYS = ('mas_renida', 'cambia_ganador', 'fit_mayor', 'lla_mas_crece', 'fuerza_patria_mayor')
+BONUS_POINTS = 5.0
+FIT_FORCE = 'FIT-U'
+LLA_FORCE = 'LLA'
+FUERZA_PATRIA_FORCE = 'Fuerza Patria'
+# JSON estático con los resultados provinciales de la elección anterior (mismo formato que `provinciales`)
+BASELINE_FILE = 'elecciones_anteriores'
+
+
+class OfficialProvince(NamedTuple):
+    name: str
+    forces: List[str]
+    reals: List[float]
+    winner: Optional[str]
+
+
+class ScoringContext(NamedTuple):
+    """Datos derivados de un `OfficialResults`, calculados una vez por publicación."""
+    provinces: List[OfficialProvince]
+    answers: Mapping[str, FrozenSet[str]]
+
+
+def scoring_context(res: OfficialResults, baseline: Optional[List[OfficialProvince]] = None) -> ScoringContext:
+    provinces = official_provinces(res)
+    if baseline is None:
+        baseline = load_baseline()
+    return ScoringContext(provinces, resolve_bonus_answers(provinces, baseline))
+
+
+def score_prediction(p: Prediction, res: OfficialResults, ctx: Optional[ScoringContext] = None) -> Dict[str, Any]:
+    """Puntaje total = puntaje nacional (0-100) + puntos provinciales + bonus.
+
+    `ctx` permite reutilizar `scoring_context(res)` entre filas.
+    """
+    nat_real = res.national_percentages or {}
+    mae_nat = mae_national(p, nat_real)
+    part_err = abs_error(p.participation, res.participation)
+    margin_err = abs_error(p.margin_1_2, res.margin_1_2)
+    top3_pts = top3_points(p.top3 or [], nat_real)
+    top3_err = 30.0 - top3_pts
+
+    err = (mae_nat * 0.5) + (part_err * 0.25) + (margin_err * 0.25) + (top3_err * (2.0/3.0))
+    national = max(0.0, 100.0 - err)
+
+    if ctx is None:
+        ctx = scoring_context(res)
+    prov = provincial_scores(p.provinciales, ctx.provinces)
+    bonus, medals = score_bonus(p.bonus, ctx.answers)
+    score = round(national + prov['points'] + bonus, 2)
+
+    return {
+        'score': score,
+        'bonus': bonus,
+        'medals': medals,
+        'breakdown': {
+            'mae_national': round(mae_nat, 2),
+            'participation_error': round(part_err, 2),
+            'margin_error': round(margin_err, 2),
+            'top3_points': round(top3_pts, 2),
+            'national_score': round(national, 2),
+            'provincial_points': round(prov['points'], 2),
+            'provincial_winners': prov['winners'],
+            'provincial_mae': round(prov['mae'], 2),
+            'provincias': prov['provincias'],
+        }
+    }
+
+
+def official_provinces(res: OfficialResults) -> List[OfficialProvince]:
+    return normalize_provinces(res.provinciales)
+
+
+def load_baseline() -> List[OfficialProvince]:
+    """Resultados provinciales de la elección anterior (vacío si no hay archivo)."""
+    return normalize_provinces(_read_json(BASELINE_FILE))
+
+
+def normalize_provinces(data: Any) -> List[OfficialProvince]:
+    """Normaliza un mapa provincial (alias percentages/porcentajes, winner/ganador).
+
+    Si no viene ganador se toma la fuerza con mayor porcentaje.
+    """
+    out: List[OfficialProvince] = []
+    data = data or {}
+    if not isinstance(data, dict):
+        return out
+    for name, payload in data.items():
+        if not isinstance(payload, dict):
+            continue
+        pcts = payload.get('percentages') or payload.get('porcentajes') or {}
+        if not isinstance(pcts, dict):
+            pcts = {}
+        forces = list(pcts.keys())
+        reals = [to_float_or_zero(pcts[f]) for f in forces]
+        winner = payload.get('winner') or payload.get('ganador')
+        if not winner and forces:
+            winner = max(zip(forces, reals), key=lambda kv: kv[1])[0]
+        if not forces and not winner:
+            continue
+        out.append(OfficialProvince(name, forces, reals, winner or None))
+    return out
+
+
+def provincial_scores(pred_prov: Any, provinces: List[OfficialProvince]) -> Dict[str, Any]:
+    """Puntos, aciertos de ganador y MAE medio sobre las provincias pronosticadas."""
+    pred_prov = pred_prov or {}
+    total = 0.0
+    winners = 0
+    mae_sum = 0.0
+    mae_n = 0
+    per_prov: Dict[str, float] = {}
+    for off in provinces:
+        payload = pred_prov.get(off.name)
+        if not isinstance(payload, dict) or not payload:
+            continue
+        pts = 0.0
+        if off.winner is not None and (payload.get('winner') or payload.get('ganador')) == off.winner:
+            pts += PROV_WINNER_POINTS
+            winners += 1
+        if off.forces:
+            pcts = payload.get('porcentajes') or payload.get('percentages') or {}
+            abs_sum = 0.0
+            for f, real_v in zip(off.forces, off.reals):
+                abs_sum += abs(to_float_or_zero(pcts.get(f, 0)) - real_v)
+            mae = abs_sum / len(off.forces)
+            pts += PROV_ACCURACY_POINTS * max(0.0, 1.0 - mae / PROV_MAE_CAP)
+            mae_sum += mae
+            mae_n += 1
+        total += pts
+        per_prov[off.name] = round(pts, 2)
+    return {
+        'points': total,
+        'winners': winners,
+        'mae': mae_sum / mae_n if mae_n else 0.0,
+        'provincias': per_prov,
+    }
+
+
+def resolve_bonus_answers(provinces: List[OfficialProvince],
+                          baseline: List[OfficialProvince]) -> Dict[str, FrozenSet[str]]:
+    """Respuestas correctas de cada bonus; en caso de empate valen todas las provincias.
+
+    Un bonus sin datos suficientes queda con un conjunto vacío y nadie suma.
+    """
+    margins = {}
+    for off in provinces:
+        if len(off.reals) >= 2:
+            first, second = sorted(off.reals, reverse=True)[:2]
+            margins[off.name] = first - second
+
+    prev = {b.name: b for b in baseline}
+    prev_lla = _shares(baseline, LLA_FORCE)
+    growth = {name: v - prev_lla[name] for name, v in _shares(provinces, LLA_FORCE).items() if name in prev_lla}
+
+    return {
+        'mas_renida': _best(margins, min),
+        'cambia_ganador': frozenset(
+            off.name for off in provinces
+            if off.winner and off.name in prev and prev[off.name].winner
+            and prev[off.name].winner != off.winner
+        ),
+        'fit_mayor': _best(_shares(provinces, FIT_FORCE), max),
+        'lla_mas_crece': _best(growth, max),
+        'fuerza_patria_mayor': _best(_shares(provinces, FUERZA_PATRIA_FORCE), max),
+    }
+
+
+def _shares(provinces: List[OfficialProvince], force: str) -> Dict[str, float]:
+    return {off.name: off.reals[off.forces.index(force)] for off in provinces if force in off.forces}
+
+
+def _best(values: Dict[str, float], pick) -> FrozenSet[str]:
+    if not values:
+        return frozenset()
+    target = pick(values.values())
+    return frozenset(name for name, v in values.items() if v == target)
+
+
+def score_bonus(pred_bonus: Any, answers: Mapping[str, FrozenSet[str]]) -> Tuple[float, List[str]]:
+    """Puntos bonus y medallas (claves acertadas, en el orden de BONUS_KEYS)."""
+    if not isinstance(pred_bonus, dict) or not pred_bonus:
+        return 0.0, []
+    medals = [
+        k for k in BONUS_KEYS
+        if isinstance(pred_bonus.get(k), str) and pred_bonus[k] in answers.get(k, ())
+    ]
+    return BONUS_POINTS * len(medals), medals
+
+
+def mae_national(p: Prediction, nat_real: Dict[str, Any]) -> float:
+    forces = list(nat_real.keys())
+    if not forces:
+        return 0.0
+    abs_sum = 0.0
+    preds = p.national_percentages or {}
+    for f in forces:
+        pred_v = to_float_or_zero(preds.get(f, 0))
+        real_v = to_float_or_zero(nat_real.get(f, 0))
+        abs_sum += abs(pred_v - real_v)
+    return abs_sum / len(forces)
+
+
+def to_float_or_zero(x: Any) -> float:
+    try:
+        return float(x or 0)
+    except Exception:
+        return 0.0
+
+
+def abs_error(pred: Any, real: Any) -> float:
+    try:
+        r = float(real)
+    except Exception:
+        return 0.0
+    try:
+        p = float(pred)
+    except Exception:
+        p = 100.0
+    return abs(p - r)
+
+
+def top3_points(predicted_top3: List[str], nat_real: Dict[str, Any]) -> float:
+    official_top3 = official_top3_of(nat_real)
+    points = 0.0
+    for i in range(min(3, len(predicted_top3))):
+        f = predicted_top3[i]
+        if i < len(official_top3) and f == official_top3[i]:
+            points += 10.0
+        elif f in official_top3:
+            points += 5.0
+    return points
+
+
+def official_top3_of(nat_real: Dict[str, Any]) -> List[str]:
+    official_sorted = sorted(nat_real.items(), key=lambda kv: to_float_or_zero(kv[1]), reverse=True)
+    return [k for k, _ in official_sorted[:3]]
@@ -0,0 +1,129 @@
+"""Datos simulados: resultados oficiales y jugadores con ruido sobre el real.
+
+Lo usan `seed_prode` y el benchmark (`bench_api`). Los pronósticos se escriben
+con `bulk_create` por lotes, completando a mano lo que en un guardado normal
+hacen las señales: `is_completed`, store columnar, consenso y contadores de jugadores.
+"""
+import random
+from typing import Any, Dict, List, Optional, Sequence
+
+from django.db import transaction
+from django.utils import timezone
+
+from .columns import sync_columns
+from .consensus import added_consensus_delta, apply_consensus_delta
+from .models import OfficialResults, Prediction, compute_completed
+from .players import recount_players
+from .validators import get_schema
+
+BULK_BATCH_SIZE = 1000
+# Para instalaciones sin JSON estáticos
+DEFAULT_FUERZAS = ('FIT', 'FP', 'JxC', 'LLA', 'UxP')
+DEFAULT_PROVINCIAS = ('Buenos Aires', 'CABA', 'Córdoba', 'Santa Fe')
+
+
+def player_email(i: int) -> str:
+    return f'jugador{i + 1:03d}@example.com'
+
+
+def official_payload(rng: random.Random) -> Dict[str, Any]:
+    """Campos de un `OfficialResults` simulado (sin guardar)."""
+    schema = get_schema()
+    fuerzas = list(schema.fuerzas_sorted or DEFAULT_FUERZAS)
+    provincias = list(schema.provincias_sorted or DEFAULT_PROVINCIAS)
+
+    nat_real = random_percentages(fuerzas, rng)
+    # margen 1-2 según top 2 del nacional
+    sorted_nat = sorted(nat_real.items(), key=lambda kv: kv[1], reverse=True)
+    margin_1_2 = round(abs(sorted_nat[0][1] - sorted_nat[1][1]), 1) if len(sorted_nat) >= 2 else 0.0
+
+    provinciales = {}
+    for prov in provincias:
+        permitidas = sorted(schema.permitidas(prov, frozenset(fuerzas)))
+        prov_pcts = random_percentages(permitidas, rng)
+        winner = max(prov_pcts.items(), key=lambda kv: kv[1])[0]
+        provinciales[prov] = {'percentages': prov_pcts, 'winner': winner}
+
+    return {
+        'national_percentages': nat_real,
+        'participation': round(rng.uniform(60, 80), 1),
+        'margin_1_2': margin_1_2,
+        'blanco_nulo_impugnado': round(rng.uniform(1, 4), 1),
+        'total_votes': rng.randint(15_000_000, 26_000_000),
+        'provinciales': provinciales,
+    }
+
+
+def player_payload(i: int, official: Dict[str, Any], rng: random.Random) -> Dict[str, Any]:
+    """Pronóstico del jugador `i`: el real con ruido, válido para `/api/predictions`."""
+    # ruido sobre el real (para que haya dispersión); se renormaliza a 100
+    nat_pred = normalize({k: v + rng.uniform(-5, 5) for k, v in official['national_percentages'].items()})
+    top3 = [k for k, _ in sorted(nat_pred.items(), key=lambda kv: kv[1], reverse=True)[:3]]
+
+    provinciales = {}
+    for prov, payload in official['provinciales'].items():
+        jitter = {k: clip(v + rng.uniform(-6, 6)) for k, v in payload['percentages'].items()}
+        win = max(jitter.items(), key=lambda kv: kv[1])[0]
+        provinciales[prov] = {'percentages': jitter, 'winner': win}
+
+    return {
+        'username': f'Jugador {i + 1:03d}',
+        'email': player_email(i),
+        'top3': top3,
+        'national_percentages': nat_pred,
+        'participation': clip(official['participation'] + rng.uniform(-5, 5)),
+        'margin_1_2': clip(official['margin_1_2'] + rng.uniform(-3, 3)),
+        'blanco_nulo_impugnado': clip(official['blanco_nulo_impugnado'] + rng.uniform(-1, 1)),
+        'total_votes': int(official['total_votes'] * rng.uniform(0.95, 1.05)),
+        'provinciales': provinciales,
+        'bonus': {},
+    }
+
+
+def seed(players: int, publish: bool = False, rng: Optional[random.Random] = None,
+         batch_size: int = BULK_BATCH_SIZE) -> OfficialResults:
+    """Crea un `OfficialResults` y `players` pronósticos. No borra nada antes."""
+    rng = rng or random.Random()
+    official = official_payload(rng)
+    res = OfficialResults.objects.create(
+        is_published=publish,
+        published_at=timezone.now() if publish else None,
+        **official,
+    )
+    for start in range(0, players, batch_size):
+        write_players(
+            [player_payload(i, official, rng) for i in range(start, min(players, start + batch_size))],
+        )
+    recount_players()
+    return res
+
+
+def write_players(payloads: Sequence[Dict[str, Any]]) -> List[Prediction]:
+    objs = [Prediction(**p) for p in payloads]
+    for o in objs:
+        o.is_completed = compute_completed(o.username, o.top3, o.national_percentages, o.provinciales)
+    with transaction.atomic():
+        Prediction.objects.bulk_create(objs)
+        apply_consensus_delta(added_consensus_delta((o.national_percentages, o.provinciales) for o in objs))
+        if any(o.pk is None for o in objs):
+            ids = dict(Prediction.objects.filter(email__in=[o.email for o in objs]).values_list('email', 'id'))
+            for o in objs:
+                o.pk = ids.get(o.email)
+        sync_columns(objs)
+    return objs
+
+
+def random_percentages(keys: Sequence[str], rng: random.Random) -> Dict[str, float]:
+    weights = [rng.uniform(5, 40) for _ in keys]
+    s = sum(weights)
+    return {k: round(100.0 * w / s, 1) for k, w in zip(keys, weights)}
+
+
+def normalize(values: Dict[str, float]) -> Dict[str, float]:
+    clipped = {k: max(0.0, v) for k, v in values.items()}
+    s = sum(clipped.values()) or 1.0
+    return {k: round(100.0 * v / s, 1) for k, v in clipped.items()}
+
+
+def clip(v: float) -> float:
+    return round(max(0.0, min(100.0, float(v))), 1)
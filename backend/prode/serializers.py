@@ -1,10 +1,10 @@
 from rest_framework import serializers
 from .models import Prediction, OfficialResults
 from .validators import (
-    get_fuerzas,
-    get_provincias,
+    get_schema,
     validate_national_fuerzas,
     validate_provinciales,
+    validate_top3,
 )
 
 class PredictionSerializer(serializers.ModelSerializer):
@@ -33,9 +33,13 @@ class PredictionSerializer(serializers.ModelSerializer):
             total += fv
         if not (95 <= total <= 105):
             raise serializers.ValidationError({"national_percentages": f"La suma es {round(total,2)}; debería estar cerca de 100% (95-105)"})
-        t3 = data.get('top3') or []
-        if len(t3) > 3:
-            raise serializers.ValidationError({"top3": "Top-3 debe tener hasta 3 fuerzas"})
+
+    def _validate_top3(self, data):
+        if 'top3' not in data:
+            return
+        err = validate_top3(data.get('top3'), get_schema().fuerzas)
+        if err:
+            raise serializers.ValidationError({"top3": err})
 
     def _validate_percent_fields(self, data, fields):
         for field in fields:
@@ -71,15 +75,23 @@ class PredictionSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError({field: f"{suffix} fuera de rango {lo}-{hi}"})
 
 
+class PredictionUpsertSerializer(PredictionSerializer):
+    """Validación para el upsert por email: la unicidad la resuelve la base
+    (`ON CONFLICT`), así que no se consulta si el email ya existe."""
+
+    class Meta(PredictionSerializer.Meta):
+        extra_kwargs = {'email': {'validators': []}}
+
+
 class OfficialResultsSerializer(serializers.ModelSerializer):
     class Meta:
         model = OfficialResults
         fields = [
             'id', 'created_at', 'updated_at', 'published_at', 'is_published',
             'national_percentages', 'participation', 'margin_1_2', 'blanco_nulo_impugnado', 'total_votes',
-            'provinciales',
+            'provinciales', 'version', 'parent',
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'created_at', 'updated_at', 'version', 'parent']
 
     def validate(self, data):
         self._validate_percent_fields(data, ['participation', 'margin_1_2', 'blanco_nulo_impugnado'])
@@ -144,8 +156,9 @@ class OfficialResultsSerializer(serializers.ModelSerializer):
 
     def _validate_domain_rules(self, data):
         # Validamos nombres de fuerzas y restricciones por provincia
-        fuerzas = get_fuerzas()
-        provincias = get_provincias()
+        schema = get_schema()
+        fuerzas = schema.fuerzas
+        provincias = schema.provincias
         err = validate_national_fuerzas(data.get('national_percentages') or {}, fuerzas)
         if err:
             raise serializers.ValidationError({"national_percentages": err})
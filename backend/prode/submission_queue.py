@@ -0,0 +1,302 @@
+"""Cola write-behind para `/api/predictions` (opt-in con `WRITE_BEHIND=1`).
+
+Cerca del `DEADLINE` los envíos llegan en ráfaga y cada uno retiene una
+conexión a la base mientras escribe. En modo write-behind la vista valida,
+agrega el envío a una cola SQLite local (modo WAL: sobrevive a reinicios) y
+responde 202 con un recibo. Un worker (un hilo por proceso, o el comando
+`flush_submissions`) vacía la cola en lotes:
+
+- los envíos del mismo email se combinan en uno (los campos presentes en el
+  más nuevo pisan a los anteriores, igual que el upsert);
+- cada lote se escribe en una sola transacción, un `upsert_prediction` por email;
+- un lease en la propia cola deja un único drenador a la vez entre procesos,
+  para que dos envíos del mismo email no se escriban en orden invertido; el
+  drenador lo renueva mientras escribe, así un lote lento no lo pierde;
+- un envío que falla `MAX_ATTEMPTS` veces pasa a `dead_letters` (no se
+  descarta: ya tiene recibo). `flush_submissions --dead-letters` los lista y
+  `--replay` los vuelve a encolar.
+
+`pending_for(email)` devuelve lo encolado y todavía no escrito; con eso
+`/api/predictions/mine` muestra los cambios con `sync_pending: true`.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from prode_backend import settings as app_settings
+from .predictions import WRITABLE_FIELDS, upsert_prediction
+
+logger = logging.getLogger(__name__)
+
+LEASE_SECONDS = 30   # un drenador caído libera la cola pasado este tiempo
+LEASE_RENEW_SECONDS = LEASE_SECONDS / 3
+MAX_ATTEMPTS = 5     # envíos que fallan más veces pasan a dead_letters
+
+_SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS submissions ('
+    ' id INTEGER PRIMARY KEY AUTOINCREMENT,'
+    ' receipt TEXT NOT NULL,'
+    ' email TEXT NOT NULL,'
+    ' payload TEXT NOT NULL,'
+    ' received_at TEXT NOT NULL,'
+    ' attempts INTEGER NOT NULL DEFAULT 0)',
+    'CREATE INDEX IF NOT EXISTS submissions_email_idx ON submissions (email, id)',
+    'CREATE TABLE IF NOT EXISTS lease (id INTEGER PRIMARY KEY CHECK (id = 1), holder TEXT NOT NULL, expires REAL NOT NULL)',
+    # Mismas columnas que submissions (el id original se conserva para reencolar en orden)
+    'CREATE TABLE IF NOT EXISTS dead_letters ('
+    ' id INTEGER PRIMARY KEY,'
+    ' receipt TEXT NOT NULL,'
+    ' email TEXT NOT NULL,'
+    ' payload TEXT NOT NULL,'
+    ' received_at TEXT NOT NULL,'
+    ' attempts INTEGER NOT NULL,'
+    ' error TEXT NOT NULL,'
+    ' failed_at TEXT NOT NULL)',
+)
+
+
+class LeaseLost(Exception):
+    """Otro drenador tomó la cola a mitad de un lote (el lote se revierte)."""
+
+_local = threading.local()
+
+
+def _connect() -> sqlite3.Connection:
+    """Conexión a la cola, una por hilo y por archivo (autocommit; transacciones explícitas)."""
+    path = app_settings.WRITE_BEHIND_PATH
+    conns = getattr(_local, 'conns', None)
+    if conns is None:
+        conns = _local.conns = {}
+    conn = conns.get(path)
+    if conn is None:
+        conn = sqlite3.connect(path, timeout=10, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        # Un recibo entregado tiene que sobrevivir a un corte: fsync en cada commit
+        conn.execute('PRAGMA synchronous=FULL')
+        for stmt in _SCHEMA:
+            conn.execute(stmt)
+        conns[path] = conn
+    return conn
+
+
+def close() -> None:
+    """Cierra las conexiones del hilo actual (tests y fin de comandos)."""
+    for conn in getattr(_local, 'conns', {}).values():
+        conn.close()
+    _local.conns = {}
+
+
+def enqueue(values: Dict[str, Any]) -> Dict[str, str]:
+    """Encola un envío ya validado (debe incluir `email`) y devuelve su recibo."""
+    payload = {k: v for k, v in values.items() if k in WRITABLE_FIELDS}
+    receipt = uuid.uuid4().hex
+    received_at = timezone.now().isoformat()
+    _connect().execute(
+        'INSERT INTO submissions (receipt, email, payload, received_at) VALUES (?, ?, ?, ?)',
+        (receipt, values['email'], json.dumps(payload), received_at),
+    )
+    ensure_worker()
+    return {'receipt': receipt, 'received_at': received_at}
+
+
+def pending_for(email: str) -> Optional[Dict[str, Any]]:
+    """Envíos de `email` aún no escritos, combinados; None si no hay."""
+    rows = _connect().execute(
+        'SELECT payload, receipt, received_at FROM submissions WHERE email = ? ORDER BY id', (email,)
+    ).fetchall()
+    if not rows:
+        return None
+    ensure_worker()
+    values: Dict[str, Any] = {}
+    for payload, _, _ in rows:
+        values.update(json.loads(payload))
+    return {'values': values, 'receipt': rows[-1][1], 'received_at': rows[-1][2], 'count': len(rows)}
+
+
+def pending_count() -> int:
+    return _connect().execute('SELECT COUNT(*) FROM submissions').fetchone()[0]
+
+
+def coalesce(rows: List[Tuple[int, str, str]]) -> Dict[str, Tuple[List[int], Dict[str, Any]]]:
+    """Agrupa filas `(id, email, payload)` por email, en orden de llegada."""
+    groups: Dict[str, Tuple[List[int], Dict[str, Any]]] = {}
+    for row_id, email, payload in rows:
+        ids, values = groups.setdefault(email, ([], {}))
+        ids.append(row_id)
+        values.update(json.loads(payload))
+    return groups
+
+
+def flush(batch: Optional[int] = None) -> Dict[str, int]:
+    """Escribe hasta `batch` envíos encolados. No hace nada si otro proceso tiene el lease."""
+    batch = batch or app_settings.WRITE_BEHIND_BATCH
+    conn = _connect()
+    holder = f'{os.getpid()}:{threading.get_ident()}'
+    stats = {'submissions': 0, 'written': 0, 'failed': 0}
+    if not _acquire_lease(conn, holder):
+        return stats
+    try:
+        rows = conn.execute('SELECT id, email, payload FROM submissions ORDER BY id LIMIT ?', (batch,)).fetchall()
+        done: List[int] = []
+        failed: Dict[int, str] = {}
+        renewed = time.monotonic()
+        try:
+            with transaction.atomic():
+                for email, (ids, values) in coalesce(rows).items():
+                    if time.monotonic() - renewed > LEASE_RENEW_SECONDS:
+                        _renew_lease(conn, holder)
+                        renewed = time.monotonic()
+                    try:
+                        # upsert_prediction abre un savepoint: una falla no tira el resto del lote
+                        upsert_prediction(dict(values, email=email))
+                        done += ids
+                        stats['written'] += 1
+                    except Exception as e:
+                        # Sin el email ni el payload en el log: los ids alcanzan para ubicarlos
+                        logger.warning("write-behind upsert failed ids=%s: %s", ids, type(e).__name__)
+                        failed.update({i: type(e).__name__ for i in ids})
+                        stats['failed'] += 1
+        except LeaseLost:
+            logger.warning("write-behind lease lost mid-batch; %d submissions left queued", len(rows))
+            return {'submissions': 0, 'written': 0, 'failed': 0}
+        stats['submissions'] = len(rows)
+        # La base ya confirmó: recién ahora se sacan de la cola
+        _delete(conn, done)
+        _retry_or_dead_letter(conn, failed)
+    finally:
+        conn.execute('UPDATE lease SET expires = 0 WHERE holder = ?', (holder,))
+    return stats
+
+
+def drain(batch: Optional[int] = None) -> Dict[str, int]:
+    """Vacía la cola completa (lotes sucesivos). Si otro proceso drena, devuelve sin esperar."""
+    batch = batch or app_settings.WRITE_BEHIND_BATCH
+    total = {'submissions': 0, 'written': 0, 'failed': 0}
+    while True:
+        stats = flush(batch)
+        for k, v in stats.items():
+            total[k] += v
+        if stats['submissions'] < batch or not stats['written']:
+            return total
+
+
+def _acquire_lease(conn: sqlite3.Connection, holder: str) -> bool:
+    now = time.time()
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        row = conn.execute('SELECT holder, expires FROM lease WHERE id = 1').fetchone()
+        if row and row[0] != holder and row[1] > now:
+            return False
+        conn.execute(
+            'INSERT INTO lease (id, holder, expires) VALUES (1, ?, ?) '
+            'ON CONFLICT (id) DO UPDATE SET holder = excluded.holder, expires = excluded.expires',
+            (holder, now + LEASE_SECONDS),
+        )
+        return True
+    finally:
+        conn.execute('COMMIT')
+
+
+def _renew_lease(conn: sqlite3.Connection, holder: str) -> None:
+    renewed = conn.execute(
+        'UPDATE lease SET expires = ? WHERE id = 1 AND holder = ?', (time.time() + LEASE_SECONDS, holder),
+    ).rowcount
+    if not renewed:
+        raise LeaseLost()
+
+
+def _delete(conn: sqlite3.Connection, ids: List[int]) -> None:
+    if ids:
+        conn.execute(f'DELETE FROM submissions WHERE id IN ({",".join("?" * len(ids))})', ids)
+
+
+def _retry_or_dead_letter(conn: sqlite3.Connection, errors: Dict[int, str]) -> None:
+    """Suma un intento a los envíos fallidos; los agotados pasan a dead_letters."""
+    if not errors:
+        return
+    ids = list(errors)
+    marks = ','.join('?' * len(ids))
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        conn.execute(f'UPDATE submissions SET attempts = attempts + 1 WHERE id IN ({marks})', ids)
+        exhausted = [r[0] for r in conn.execute(
+            f'SELECT id FROM submissions WHERE id IN ({marks}) AND attempts >= ?', ids + [MAX_ATTEMPTS]
+        )]
+        failed_at = timezone.now().isoformat()
+        for row_id in exhausted:
+            conn.execute(
+                'INSERT INTO dead_letters (id, receipt, email, payload, received_at, attempts, error, failed_at) '
+                'SELECT id, receipt, email, payload, received_at, attempts, ?, ? FROM submissions WHERE id = ?',
+                (errors[row_id], failed_at, row_id),
+            )
+        _delete(conn, exhausted)
+        conn.execute('COMMIT')
+    except BaseException:
+        conn.execute('ROLLBACK')
+        raise
+    if exhausted:
+        logger.error("write-behind moved ids=%s to dead_letters after %d attempts", exhausted, MAX_ATTEMPTS)
+
+
+def dead_letters() -> List[Dict[str, Any]]:
+    """Envíos agotados (con recibo entregado) a la espera de revisión."""
+    rows = _connect().execute(
+        'SELECT id, receipt, email, received_at, attempts, error, failed_at FROM dead_letters ORDER BY id'
+    ).fetchall()
+    keys = ('id', 'receipt', 'email', 'received_at', 'attempts', 'error', 'failed_at')
+    return [dict(zip(keys, r)) for r in rows]
+
+
+def replay(ids: Optional[List[int]] = None) -> int:
+    """Vuelve a encolar dead letters (todas si `ids` es None) con sus ids originales,
+    así quedan en su lugar respecto de los envíos todavía pendientes."""
+    conn = _connect()
+    where, params = ('', []) if ids is None else (f' WHERE id IN ({",".join("?" * len(ids))})', list(ids))
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        moved = conn.execute(
+            'INSERT INTO submissions (id, receipt, email, payload, received_at, attempts) '
+            f'SELECT id, receipt, email, payload, received_at, 0 FROM dead_letters{where}', params,
+        ).rowcount
+        conn.execute(f'DELETE FROM dead_letters{where}', params)
+        conn.execute('COMMIT')
+    except BaseException:
+        conn.execute('ROLLBACK')
+        raise
+    return moved
+
+
+# --- Worker ------------------------------------------------------------------
+
+_worker: Optional[threading.Thread] = None
+_worker_lock = threading.Lock()
+
+
+def ensure_worker() -> None:
+    """Arranca (una vez por proceso) el hilo que drena la cola cada `WRITE_BEHIND_INTERVAL`."""
+    global _worker
+    if _worker is not None and _worker.is_alive():
+        return
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_run, name='prode-write-behind', daemon=True)
+            _worker.start()
+
+
+def _run() -> None:
+    while True:
+        # La espera es la ventana de coalescencia: los reenvíos del mismo email se juntan
+        time.sleep(app_settings.WRITE_BEHIND_INTERVAL)
+        try:
+            close_old_connections()
+            drain()
+        except Exception:
+            logger.exception("write-behind worker error")
@@ -0,0 +1,65 @@
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.test import RequestFactory, TestCase
+from django.utils import timezone
+from rest_framework import exceptions
+
+from prode.auth import ADMIN_TOKEN_SALT, AdminBearerAuthentication, invalidate_staff
+from prode.models import AdminLogout
+
+
+class AdminBearerCacheTests(TestCase):
+    def setUp(self):
+        invalidate_staff()
+        self.user = get_user_model().objects.create_user('staff', password='x', is_staff=True)
+        now = int(timezone.now().timestamp())
+        self.token = signing.dumps({'u': 'staff', 's': True, 'iat': now, 'exp': now + 60}, salt=ADMIN_TOKEN_SALT)
+
+    def _authenticate(self):
+        request = RequestFactory().get('/api/admin/overview', HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        return AdminBearerAuthentication().authenticate(request)
+
+    def test_second_request_skips_users_table(self):
+        with self.assertNumQueries(1):
+            self._authenticate()
+        with self.assertNumQueries(0):
+            user, _ = self._authenticate()
+        self.assertEqual(user.pk, self.user.pk)
+
+    def test_staff_change_invalidates(self):
+        self._authenticate()
+        self.user.is_staff = False
+        self.user.save()
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            self._authenticate()
+
+    def test_logout_revokes_earlier_tokens(self):
+        self._authenticate()
+        res = self.client.post('/api/admin/logout', HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        self.assertEqual(res.status_code, 200)
+        with self.assertRaisesMessage(exceptions.AuthenticationFailed, 'Token revoked'):
+            self._authenticate()
+        # También en otro proceso sin el token en cache (con cache, al vencer el TTL)
+        invalidate_staff()
+        with self.assertRaisesMessage(exceptions.AuthenticationFailed, 'Token revoked'):
+            self._authenticate()
+
+        later = int(AdminLogout.objects.get(user=self.user).logged_out_at.timestamp()) + 1
+        self.token = signing.dumps({'u': 'staff', 's': True, 'iat': later, 'exp': later + 60}, salt=ADMIN_TOKEN_SALT)
+        user, _ = self._authenticate()
+        self.assertEqual(user.pk, self.user.pk)
+
+    def test_cached_hits_get_their_own_user(self):
+        first, _ = self._authenticate()
+        first.is_staff = False
+        with self.assertNumQueries(0):
+            second, _ = self._authenticate()
+        self.assertIsNot(first, second)
+        self.assertTrue(second.is_staff)
+        self.assertEqual(second.get_username(), 'staff')
+
+    def test_expired_token_is_rejected(self):
+        now = int(timezone.now().timestamp())
+        self.token = signing.dumps({'u': 'staff', 's': True, 'iat': now - 120, 'exp': now - 60}, salt=ADMIN_TOKEN_SALT)
+        with self.assertRaisesMessage(exceptions.AuthenticationFailed, 'Token expired'):
+            self._authenticate()
@@ -0,0 +1,92 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+
+from prode import admin_stats
+from prode.models import OfficialResults, Prediction
+from prode.validators import get_schema
+
+
+class AdminOverviewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        Prediction.objects.create(username='Ana', email='ana@example.com', provinciales={'CABA': {'LLA': 40}, 'Entre Ríos': {}})
+        Prediction.objects.create(username='Beto', email='beto@example.com', provinciales={'CABA': {'LLA': 30}})
+        Prediction.objects.create(username='', email='anon@example.com')
+        OfficialResults.objects.create(is_published=True)
+
+    def test_single_aggregate_then_cached(self):
+        # Aggregate condicional sobre pronósticos + último resultado publicado
+        with self.assertNumQueries(2):
+            stats = admin_stats.overview()
+        with self.assertNumQueries(0):
+            admin_stats.overview()
+        self.assertEqual(stats['predictions_total'], 3)
+        self.assertEqual(stats['predictions_completed'], 2)
+        self.assertTrue(stats['results_published'])
+        self.assertEqual(stats['submissions_last_minute'], 3)
+        self.assertEqual(stats['province_coverage']['CABA'], {'count': 2, 'ratio': 0.6667})
+        self.assertEqual(stats['province_coverage']['Entre Ríos']['count'], 1)
+        self.assertEqual(stats['province_coverage']['Salta']['count'], 0)
+
+    def test_endpoint_reports_validation_rejections(self):
+        before = admin_stats.validation_stats()
+        bad = {'username': 'Caro', 'email': 'caro@example.com', 'top3': ['Inexistente']}
+        self.assertEqual(self.client.post('/api/predictions', bad, content_type='application/json').status_code, 400)
+
+        self.assertEqual(self.client.get('/api/admin/overview').status_code, 403)
+        staff = get_user_model().objects.create_user('staff', password='x', is_staff=True)
+        self.client.force_login(staff)
+        stats = self.client.get('/api/admin/overview').json()
+        self.assertEqual(stats['validation']['attempts'], before['attempts'] + 1)
+        self.assertEqual(stats['validation']['rejected'], before['rejected'] + 1)
+        self.assertEqual(stats['validation']['by_field']['top3'], before['by_field'].get('top3', 0) + 1)
+        self.assertIn('deadline', stats)
+
+
+class AdminAnalyticsTests(TestCase):
+    NOW = datetime(2025, 10, 26, 20, 30, 15, tzinfo=dt_timezone.utc)
+
+    def setUp(self):
+        cache.clear()
+        rows = [
+            # (email, national_percentages, creado hace, editado hace) en minutos
+            ('a@example.com', {'LLA': 40, 'Fuerza Patria': '30'}, 3, 1),
+            ('b@example.com', {'LLA': 45.5}, 3, 3),
+            ('c@example.com', {'LLA': 60}, 0, 0),
+        ]
+        for email, nat, created, edited in rows:
+            p = Prediction.objects.create(username=email[0], email=email, national_percentages=nat)
+            Prediction.objects.filter(pk=p.pk).update(
+                created_at=self.NOW - timedelta(minutes=created), updated_at=self.NOW - timedelta(minutes=edited),
+            )
+
+    def test_series_and_distribution_are_aggregated_in_the_db(self):
+        with mock.patch('django.utils.timezone.now', return_value=self.NOW):
+            # Dos GROUP BY para la serie + uno por fuerza para la distribución
+            with self.assertNumQueries(2 + len(get_schema().fuerzas_sorted)):
+                out = admin_stats.analytics('minute', span=5, bins=10)
+        series = out['series']
+        self.assertEqual([b['t'][11:16] for b in series], ['20:26', '20:27', '20:28', '20:29', '20:30'])
+        self.assertEqual([b['submissions'] for b in series], [0, 2, 0, 0, 1])
+        self.assertEqual([b['edits'] for b in series], [0, 0, 0, 1, 0])
+
+        lla = out['national']['LLA']
+        self.assertEqual(lla['count'], 3)
+        self.assertEqual(lla['mean'], 48.5)
+        self.assertEqual(lla['quantiles']['0.5'], 45.5)
+        self.assertEqual([h['count'] for h in lla['histogram'] if h['count']], [2, 1])
+        self.assertEqual(lla['histogram'][4], {'from': 40.0, 'to': 50.0, 'count': 2})
+        self.assertEqual(out['national']['Fuerza Patria']['mean'], 30.0)
+
+    def test_endpoint_is_staff_only_and_validates_bucket(self):
+        self.assertEqual(self.client.get('/api/admin/analytics').status_code, 403)
+        self.client.force_login(get_user_model().objects.create_user('staff', password='x', is_staff=True))
+        self.assertEqual(self.client.get('/api/admin/analytics', {'bucket': 'day'}).status_code, 400)
+        with mock.patch('django.utils.timezone.now', return_value=self.NOW):
+            out = self.client.get('/api/admin/analytics', {'bucket': 'hour', 'span': 3}).json()
+        self.assertEqual(len(out['series']), 3)
+        self.assertEqual(sum(b['submissions'] for b in out['series']), 3)
@@ -0,0 +1,70 @@
+from asgiref.sync import iscoroutinefunction
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.signing import dumps
+from django.test import TestCase
+from django.utils import timezone
+
+from prode.auth import ADMIN_TOKEN_SALT
+from prode.metrics import MetricsMiddleware
+from prode.models import OfficialResults, Prediction
+from prode.ranking import rebuild_ranking
+
+
+class AsyncPublicViewsTests(TestCase):
+    """Vistas públicas atendidas por el handler ASGI (AsyncClient)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(3):
+            Prediction.objects.create(
+                username=f'P{i}', email=f'p{i}@example.com', top3=['LLA'],
+                national_percentages={'LLA': 40 + i, 'Fuerza Patria': 60 - i},
+            )
+        cls.res = OfficialResults.objects.create(is_published=True, national_percentages={'LLA': 42, 'Fuerza Patria': 58})
+        rebuild_ranking(cls.res)
+
+    def setUp(self):
+        cache.clear()
+
+    async def test_public_reads(self):
+        res = await self.async_client.get('/api/results')
+        self.assertEqual(res.status_code, 200)
+        again = await self.async_client.get('/api/results', headers={'If-None-Match': res['ETag']})
+        self.assertEqual(again.status_code, 304)
+
+        ranking = (await self.async_client.get('/api/ranking', {'limit': 2})).json()
+        self.assertEqual([it['position'] for it in ranking['results']], [1, 2])
+        self.assertTrue(ranking['next_cursor'])
+        mine = (await self.async_client.get('/api/ranking', {'email': 'p1@example.com', 'window': 1})).json()
+        self.assertEqual(mine['me']['username'], 'P1')
+
+        players = (await self.async_client.get('/api/players', {'limit': 2})).json()
+        self.assertEqual(players['usernames'], ['P0', 'P1'])
+        self.assertEqual(players['count_completed'], 3)
+
+        pred = (await self.async_client.get('/api/predictions/mine', {'email': 'P2@example.com'})).json()
+        self.assertEqual(pred['username'], 'P2')
+        self.assertEqual((await self.async_client.get('/api/health')).json()['db'], 'ok')
+
+    async def test_results_writes_still_go_through_drf(self):
+        staff = await get_user_model().objects.acreate(username='staff', is_staff=True)
+        now = int(timezone.now().timestamp())
+        token = dumps({'u': staff.username, 's': True, 'iat': now, 'exp': now + 60}, salt=ADMIN_TOKEN_SALT)
+        denied = await self.async_client.patch('/api/results', {'participation': 71}, content_type='application/json')
+        self.assertEqual(denied.status_code, 403)
+        res = await self.async_client.patch(
+            '/api/results', {'participation': 71}, content_type='application/json',
+            headers={'Authorization': f'Bearer {token}'},
+        )
+        self.assertEqual(res.status_code, 201, res.content)
+        self.assertEqual(res.json()['version'], self.res.version + 1)
+
+
+class HybridMiddlewareTests(TestCase):
+    def test_metrics_middleware_stays_async_under_asgi(self):
+        async def get_response(request):
+            return None
+
+        self.assertTrue(iscoroutinefunction(MetricsMiddleware(get_response)))
+        self.assertFalse(iscoroutinefunction(MetricsMiddleware(lambda request: None)))
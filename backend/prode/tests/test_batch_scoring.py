@@ -0,0 +1,152 @@
+import random
+
+from django.test import SimpleTestCase
+
+from prode.batch_scoring import score_rows
+from prode.models import Prediction, OfficialResults
+from prode.scoring import (
+    ScoringContext, normalize_provinces, official_provinces, provincial_scores, resolve_bonus_answers,
+    score_bonus, score_prediction,
+)
+
+
+class BatchScoringTests(SimpleTestCase):
+    def setUp(self):
+        self.res = OfficialResults(
+            national_percentages={'LLA': 40.7, 'Fuerza Patria': 34.94, 'Provincias Unidas': 14.13, 'FIT-U': 5.03, 'Otros': 5.2},
+            participation=67.85,
+            margin_1_2=5.76,
+            provinciales={
+                'CABA': {'percentages': {'LLA': 50.1, 'Fuerza Patria': 27.3, 'Provincias Unidas': 12.6}},
+                'Buenos Aires': {'porcentajes': {'Fuerza Patria': 41.5, 'LLA': 39.9}, 'ganador': 'Fuerza Patria'},
+                'Salta': {'winner': 'LLA'},
+            },
+        )
+
+    def _expected(self, row):
+        t3, nat, part, marg, prov, bonus = row
+        p = Prediction(top3=t3, national_percentages=nat, participation=part, margin_1_2=marg,
+                       provinciales=prov, bonus=bonus)
+        try:
+            return score_prediction(p, self.res)
+        except Exception:
+            return None
+
+    def test_matches_per_row_scoring_on_random_rows(self):
+        rnd = random.Random(42)
+        forces = list(self.res.national_percentages.keys()) + ['Unión Federal']
+        rows = []
+        for _ in range(500):
+            nat = {f: round(rnd.uniform(0, 50), rnd.choice([0, 1, 2, 3])) for f in rnd.sample(forces, rnd.randint(0, len(forces)))}
+            t3 = rnd.sample(forces, rnd.randint(0, 3))
+            part = rnd.choice([None, round(rnd.uniform(40, 90), 2)])
+            marg = rnd.choice([None, round(rnd.uniform(0, 20), 2)])
+            prov = {}
+            for name in rnd.sample(['CABA', 'Buenos Aires', 'Salta', 'Jujuy'], rnd.randint(0, 4)):
+                key = rnd.choice(['percentages', 'porcentajes'])
+                prov[name] = {
+                    key: {f: round(rnd.uniform(0, 60), 1) for f in rnd.sample(forces, rnd.randint(0, 3))},
+                    rnd.choice(['winner', 'ganador']): rnd.choice(forces),
+                }
+            bonus = {k: rnd.choice(['CABA', 'Buenos Aires', 'Salta']) for k in rnd.sample(
+                ['mas_renida', 'fit_mayor', 'fuerza_patria_mayor'], rnd.randint(0, 3))}
+            rows.append((t3, nat, part, marg, prov, bonus))
+        self.assertEqual(score_rows(rows, self.res), [self._expected(r) for r in rows])
+
+    def test_matches_per_row_scoring_on_atypical_rows(self):
+        rows = [
+            ([], {}, None, None, None, None),
+            (None, None, None, None, {}, {}),
+            (['LLA', 'LLA', 'Inexistente'], {'LLA': '40.7', 'Otros': ''}, 67.85, 5.76, {'CABA': {}}, {'mas_renida': 'CABA'}),
+            ([{'x': 1}, 'Fuerza Patria'], {'LLA': 'abc'}, None, 3, {'CABA': {'winner': ['LLA']}}, {'fit_mayor': ['CABA']}),
+            ('LLA', {'LLA': 40}, 60, 5, ['CABA'], 'CABA'),
+            (['LLA'], ['no', 'es', 'dict'], 60, 5, {}, None),
+            (['LLA'], {'LLA': 40}, 60, 5, {'CABA': {'percentages': ['LLA']}}, {}),
+            (['LLA'], {'LLA': 40}, 60, 5, {'Salta': {'percentages': 'x', 'winner': 'LLA'}}, {'mas_renida': 'Salta'}),
+            (['LLA'], {'LLA': 40}, 60, 5, {'CABA': {'percentages': {'LLA': 'abc', 'Fuerza Patria': None}}}, {'fuerza_patria_mayor': 'Buenos Aires'}),
+        ]
+        # Las filas que rompen el scoring puntúan None y quedan registradas
+        with self.assertLogs('prode.batch_scoring', 'WARNING') as logs:
+            got = score_rows(rows, self.res)
+        self.assertEqual(got, [self._expected(r) for r in rows])
+        self.assertTrue(all('score_rows row error' in line for line in logs.output))
+
+    def test_official_with_fewer_than_three_forces(self):
+        self.res.national_percentages = {'LLA': 55, 'Fuerza Patria': 45}
+        self.res.participation = None
+        rows = [(['Fuerza Patria', 'LLA', 'Otros'], {'LLA': 50, 'Fuerza Patria': 50}, 70, None, None, None)]
+        self.assertEqual(score_rows(rows, self.res), [self._expected(r) for r in rows])
+
+
+class ProvincialScoringTests(SimpleTestCase):
+    def test_winner_and_accuracy_points(self):
+        res = OfficialResults(provinciales={
+            'CABA': {'percentages': {'LLA': 50, 'Fuerza Patria': 30}},
+            'Salta': {'ganador': 'LLA'},
+            'Jujuy': {'percentages': {'LLA': 40, 'Fuerza Patria': 45}},
+        })
+        provinces = official_provinces(res)
+        self.assertEqual([(p.name, p.winner) for p in provinces],
+                         [('CABA', 'LLA'), ('Salta', 'LLA'), ('Jujuy', 'Fuerza Patria')])
+        out = provincial_scores({
+            'CABA': {'porcentajes': {'LLA': 45, 'Fuerza Patria': 35}, 'ganador': 'LLA'},  # MAE 5 => 2 + 0.5
+            'Salta': {'winner': 'Fuerza Patria'},                                          # sin acierto
+        }, provinces)
+        self.assertEqual(out['points'], 2.5)
+        self.assertEqual(out['winners'], 1)
+        self.assertEqual(out['mae'], 5.0)
+        self.assertEqual(out['provincias'], {'CABA': 2.5, 'Salta': 0.0})
+
+    def test_score_adds_provincial_points_to_national(self):
+        res = OfficialResults(
+            national_percentages={'LLA': 40, 'Fuerza Patria': 35, 'Provincias Unidas': 25},
+            participation=70, margin_1_2=5,
+            provinciales={'CABA': {'percentages': {'LLA': 50, 'Fuerza Patria': 30}}},
+        )
+        p = Prediction(
+            top3=['LLA', 'Fuerza Patria', 'Provincias Unidas'],
+            national_percentages={'LLA': 40, 'Fuerza Patria': 35, 'Provincias Unidas': 25},
+            participation=70, margin_1_2=5,
+            provinciales={'CABA': {'percentages': {'LLA': 50, 'Fuerza Patria': 30}, 'winner': 'LLA'}},
+        )
+        out = score_prediction(p, res)
+        self.assertEqual(out['score'], 103.0)
+        self.assertEqual(out['breakdown']['national_score'], 100.0)
+        self.assertEqual(out['breakdown']['provincias'], {'CABA': 3.0})
+
+
+class BonusResolverTests(SimpleTestCase):
+    def setUp(self):
+        self.provinces = normalize_provinces({
+            'CABA': {'percentages': {'LLA': 50, 'Fuerza Patria': 30, 'FIT-U': 4}},
+            'Buenos Aires': {'percentages': {'Fuerza Patria': 41, 'LLA': 40, 'FIT-U': 5}},
+            'Salta': {'percentages': {'LLA': 45, 'Fuerza Patria': 44}},
+        })
+        self.baseline = normalize_provinces({
+            'CABA': {'percentages': {'LLA': 30, 'Fuerza Patria': 40}},
+            'Buenos Aires': {'winner': 'Fuerza Patria', 'percentages': {'LLA': 35}},
+        })
+
+    def test_answers_from_official_and_baseline(self):
+        answers = resolve_bonus_answers(self.provinces, self.baseline)
+        self.assertEqual(answers['mas_renida'], {'Buenos Aires', 'Salta'})  # empate de 1 punto
+        self.assertEqual(answers['fit_mayor'], {'Buenos Aires'})
+        self.assertEqual(answers['fuerza_patria_mayor'], {'Salta'})
+        self.assertEqual(answers['cambia_ganador'], {'CABA'})
+        self.assertEqual(answers['lla_mas_crece'], {'CABA'})
+
+    def test_without_baseline_history_questions_have_no_answer(self):
+        answers = resolve_bonus_answers(self.provinces, [])
+        self.assertEqual(answers['cambia_ganador'], frozenset())
+        self.assertEqual(answers['lla_mas_crece'], frozenset())
+
+    def test_bonus_points_and_medals_reach_the_score(self):
+        ctx = ScoringContext(self.provinces, resolve_bonus_answers(self.provinces, self.baseline))
+        self.assertEqual(score_bonus({'fit_mayor': 'Buenos Aires', 'cambia_ganador': 'Salta', 'mas_renida': 'Salta'},
+                                     ctx.answers), (10.0, ['mas_renida', 'fit_mayor']))
+        res = OfficialResults(national_percentages={'LLA': 50, 'Fuerza Patria': 50})
+        p = Prediction(top3=[], national_percentages={}, bonus={'lla_mas_crece': 'CABA'})
+        out = score_prediction(p, res, ctx)
+        self.assertEqual(out['bonus'], 5.0)
+        self.assertEqual(out['medals'], ['lla_mas_crece'])
+        self.assertEqual(score_rows([(p.top3, p.national_percentages, None, None, None, p.bonus)], res, ctx), [out])
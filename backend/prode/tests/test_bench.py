@@ -0,0 +1,63 @@
+import random
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+
+from prode.bench import (
+    ClientTransport,
+    build_requests,
+    compare,
+    percentile,
+    run_requests,
+    summarize,
+)
+from prode.models import Prediction, PredictionColumns
+from prode.players import get_counters
+from prode.seeding import seed
+
+
+def _report(p50=1.0, p95=2.0, queries=3.0, rps=100.0, errors=0):
+    endpoint = {
+        'requests': 10, 'errors': errors, 'p50_ms': p50, 'p95_ms': p95, 'p99_ms': p95,
+        'rps': rps, 'queries_per_request': queries,
+    }
+    return {'config': {}, 'scenarios': {'deadline': {'rps': rps, 'endpoints': {'/api/predictions': endpoint}}}}
+
+
+class BenchReportTests(SimpleTestCase):
+    def test_percentile_nearest_rank(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([7.0], 95), 7.0)
+        self.assertEqual(percentile([], 95), 0.0)
+
+    def test_compare_flags_regressions_above_noise(self):
+        base = _report()
+        self.assertEqual(compare(_report(p95=3.5), base, tolerance=0.5), [])  # +1.5 ms: ruido
+        problems = compare(_report(p95=10.0, queries=5.0, rps=40.0, errors=1), base, tolerance=0.5)
+        self.assertEqual(len(problems), 4, problems)
+
+
+class BenchRunTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_bulk_seed_keeps_derived_state(self):
+        seed(30, rng=random.Random(1))
+        self.assertEqual(PredictionColumns.objects.count(), 30)
+        self.assertEqual(get_counters().total, 30)
+        self.assertEqual(get_counters().completed, Prediction.objects.filter(is_completed=True).count())
+
+    def test_scenarios_hit_every_endpoint_without_errors(self):
+        res = seed(20, rng=random.Random(1))
+        rng = random.Random(2)
+        samples, wall = run_requests(ClientTransport(), build_requests('deadline', 40, 20, rng))
+        res.is_published = True
+        res.save()
+        more, _ = run_requests(ClientTransport(), build_requests('results', 40, 20, rng))
+        report = summarize(samples + more, wall)
+        self.assertEqual(set(report['endpoints']), {'/api/predictions', '/api/ranking', '/api/players', '/api/results'})
+        for endpoint, row in report['endpoints'].items():
+            self.assertEqual(row['errors'], 0, endpoint)
+            self.assertIsNotNone(row['queries_per_request'])
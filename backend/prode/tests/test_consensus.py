@@ -0,0 +1,118 @@
+import importlib
+import io
+import random
+import threading
+from unittest import mock
+
+from django.apps import apps
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+
+from prode.consensus import consensus_payload, rebuild_consensus
+from prode.ingest import ingest, iter_rows
+from prode.models import ConsensusStat, Prediction
+from prode.players import delete_predictions
+from prode.predictions import upsert_prediction
+from prode.seeding import seed
+
+
+def stats():
+    return {
+        (s.province, s.force): (s.count, round(s.total, 6), round(s.total_sq, 6))
+        for s in ConsensusStat.objects.filter(count__gt=0)
+    }
+
+
+class ConsensusTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_upsert_replaces_previous_contribution(self):
+        upsert_prediction({'email': 'a@example.com', 'username': 'A', 'national_percentages': {'LLA': 40, 'Fuerza Patria': 30}})
+        upsert_prediction({'email': 'b@example.com', 'username': 'B', 'national_percentages': {'LLA': 50},
+                           'provinciales': {'CABA': {'porcentajes': {'LLA': 35}, 'winner': 'LLA'}}})
+        upsert_prediction({'email': 'a@example.com', 'national_percentages': {'LLA': 44}})
+        # Envío sin porcentajes: lo previo se conserva y no cambia el consenso
+        upsert_prediction({'email': 'b@example.com', 'participation': 70})
+
+        self.assertEqual(stats(), {
+            ('', 'LLA'): (2, 94.0, 44 ** 2 + 50 ** 2),
+            ('CABA', 'LLA'): (1, 35.0, 35 ** 2),
+        })
+        out = consensus_payload()
+        self.assertEqual(out['national']['LLA'], {'count': 2, 'mean': 47.0, 'stddev': 3.0})
+        self.assertEqual(out['provinces']['CABA']['LLA']['stddev'], 0.0)
+
+    def test_orm_save_and_delete(self):
+        p = Prediction.objects.create(username='A', email='a@example.com', national_percentages={'LLA': 40})
+        p = Prediction.objects.get(pk=p.pk)
+        p.national_percentages = {'LLA': 20}
+        p.save()
+        Prediction.objects.create(username='B', email='b@example.com', national_percentages={'LLA': 60})
+        self.assertEqual(stats(), {('', 'LLA'): (2, 80.0, 20 ** 2 + 60 ** 2)})
+
+        delete_predictions(Prediction.objects.filter(email='b@example.com'))
+        self.assertEqual(stats(), {('', 'LLA'): (1, 20.0, 400.0)})
+
+    def test_save_without_loaded_state_rereads_the_row(self):
+        p = Prediction.objects.create(username='A', email='a@example.com', national_percentages={'LLA': 40})
+        with mock.patch('prode.consensus.rebuild_consensus') as rebuild:
+            Prediction(id=p.pk, created_at=p.created_at, username='A', email='a@example.com',
+                       national_percentages={'LLA': 30}).save()
+            partial = Prediction.objects.only('id', 'username').get(pk=p.pk)
+            partial.national_percentages = {'LLA': 25}
+            partial.save()
+        rebuild.assert_not_called()
+        self.assertEqual(stats(), {('', 'LLA'): (1, 25.0, 625.0)})
+
+    def test_incremental_matches_rebuild(self):
+        seed(15, rng=random.Random(3))
+        ingest(iter_rows(io.StringIO(
+            '{"email": "jugador001@example.com", "username": "X", "national_percentages": {"LLA": 10}}\n'
+            '{"email": "nuevo@example.com", "username": "N", "provinciales": {"Salta": {"percentages": {"LLA": 55}}}}\n'
+        ), 'jsonl'))
+        upsert_prediction({'email': 'jugador002@example.com', 'national_percentages': {'LLA': 33.3}})
+        delete_predictions(Prediction.objects.filter(email='jugador003@example.com'))
+
+        incremental = stats()
+        rebuild_consensus()
+        self.assertEqual(stats(), incremental)
+        self.assertEqual(incremental[('Salta', 'LLA')][0], Prediction.objects.filter(provinciales__has_key='Salta').count())
+
+    def test_migration_backfill_matches_incremental(self):
+        seed(10, rng=random.Random(5))
+        incremental = stats()
+        ConsensusStat.objects.all().delete()
+        importlib.import_module('prode.migrations.0011_consensusstat').backfill_consensus(apps, None)
+        self.assertEqual(stats(), incremental)
+
+    def test_endpoint_is_cached(self):
+        upsert_prediction({'email': 'a@example.com', 'username': 'A', 'national_percentages': {'LLA': 40}})
+        res = self.client.get('/api/consensus')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json()['national']['LLA']['mean'], 40.0)
+        with self.assertNumQueries(0):
+            again = self.client.get('/api/consensus', HTTP_IF_NONE_MATCH=res['ETag'])
+        self.assertEqual(again.status_code, 304)
+
+
+class ConcurrentConsensusTests(TransactionTestCase):
+    def test_concurrent_first_submits_contribute_once(self):
+        barrier = threading.Barrier(2)
+
+        def submit(pct):
+            try:
+                barrier.wait()
+                upsert_prediction({'email': 'race@example.com', 'username': 'Race', 'national_percentages': {'LLA': pct}})
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=submit, args=(pct,)) for pct in (40, 50)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        final = Prediction.objects.get().national_percentages['LLA']
+        self.assertEqual(stats(), {('', 'LLA'): (1, float(final), float(final) ** 2)})
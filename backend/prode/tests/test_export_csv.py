@@ -0,0 +1,72 @@
+import csv
+import gzip
+import io
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from prode.exports import accepts_gzip
+from prode.models import Prediction, OfficialResults
+from prode.ranking import rebuild_ranking
+
+
+class ExportRankingCsvTests(TestCase):
+    def setUp(self):
+        staff = get_user_model().objects.create_user('staff', password='x', is_staff=True)
+        self.client.force_login(staff)
+        for i in range(3):
+            Prediction.objects.create(
+                username=f'P{i}', email=f'p{i}@example.com', top3=['LLA'],
+                national_percentages={'LLA': 40 + i, 'Fuerza Patria': 60 - i}, participation=70, margin_1_2=5,
+            )
+        res = OfficialResults.objects.create(
+            is_published=True, national_percentages={'LLA': 42, 'Fuerza Patria': 58}, participation=70, margin_1_2=5,
+        )
+        rebuild_ranking(res)
+        self.url = '/api/admin/export/ranking.csv'
+
+    def _rows(self, body: bytes):
+        return list(csv.reader(io.StringIO(body.decode('utf-8'))))
+
+    def test_streams_plain_csv_in_ranking_order(self):
+        res = self.client.get(self.url)
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(res.streaming)
+        rows = self._rows(b''.join(res.streaming_content))
+        self.assertEqual(rows[0], ['posicion', 'usuario', 'email', 'puntaje', 'bonus', 'enviado'])
+        self.assertEqual([r[1] for r in rows[1:]], ['P2', 'P1', 'P0'])
+
+    def test_extra_breakdown_columns_and_gzip(self):
+        res = self.client.get(self.url, {'extra': 'breakdown', 'gzip': 1})
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+        rows = self._rows(gzip.decompress(b''.join(res.streaming_content)))
+        self.assertIn('mae_national', rows[0])
+        self.assertEqual(len(rows[1]), len(rows[0]))
+
+    def test_accept_encoding_q_values(self):
+        res = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip;q=0, identity')
+        self.assertFalse(res.has_header('Content-Encoding'))
+        self.assertEqual(self._rows(b''.join(res.streaming_content))[0][0], 'posicion')
+        res = self.client.get(self.url, HTTP_ACCEPT_ENCODING='br, GZIP; q=0.5')
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+        self.assertEqual(self._rows(gzip.decompress(b''.join(res.streaming_content)))[0][0], 'posicion')
+
+        self.assertTrue(accepts_gzip('*'))
+        self.assertFalse(accepts_gzip('*, gzip;q=0'))
+        self.assertFalse(accepts_gzip('gzip;q=0.000, deflate'))
+        self.assertFalse(accepts_gzip('x-gzip-lite'))
+
+    def test_requires_staff(self):
+        self.client.logout()
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    def test_extra_provincias_adds_one_column_per_official_province(self):
+        res = OfficialResults.objects.get()
+        res.provinciales = {'CABA': {'winner': 'LLA'}, 'Salta': {'winner': 'Fuerza Patria'}}
+        res.save()
+        Prediction.objects.filter(email='p0@example.com').update(provinciales={'CABA': {'winner': 'LLA'}})
+        rebuild_ranking(res)
+        rows = self._rows(b''.join(self.client.get(self.url, {'extra': 'provincias'}).streaming_content))
+        self.assertEqual(rows[0][-2:], ['prov:CABA', 'prov:Salta'])
+        by_user = {r[1]: r[-2:] for r in rows[1:]}
+        self.assertEqual(by_user['P0'], ['2.0', ''])
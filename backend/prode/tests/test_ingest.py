@@ -0,0 +1,73 @@
+import io
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase
+
+from prode.ingest import ingest, iter_rows
+from prode.models import Prediction
+
+
+class IngestTests(TestCase):
+    def test_jsonl_reports_row_errors_without_aborting(self):
+        Prediction.objects.create(username='Viejo', email='ya@example.com')
+        lines = [
+            {'username': 'Ya', 'email': 'YA@example.com', 'top3': ['LLA']},
+            {'username': 'Nuevo', 'email': 'nuevo@example.com', 'participation': 70},
+            {'username': 'Malo', 'email': 'malo@example.com', 'top3': ['Inexistente']},
+            {'username': 'Rango', 'email': 'rango@example.com', 'participation': 140},
+        ]
+        body = '\n'.join(json.dumps(x) for x in lines) + '\n{no es json\n'
+        report = ingest(iter_rows(io.StringIO(body), 'jsonl'), batch_size=2)
+        self.assertEqual((report.rows, report.created, report.updated, report.failed), (5, 1, 1, 3))
+        self.assertEqual([e['line'] for e in report.errors], [3, 4, 5])
+        self.assertEqual(Prediction.objects.get(email='ya@example.com').username, 'Ya')
+        self.assertFalse(Prediction.objects.filter(email='malo@example.com').exists())
+
+    def test_csv_parses_json_columns(self):
+        body = 'username,email,top3,national_percentages,participation\n' \
+               'Csv,csv@example.com,"[""LLA""]","{""LLA"": 60, ""Fuerza Patria"": 40}",71.5\n'
+        report = ingest(iter_rows(io.StringIO(body), 'csv'))
+        self.assertEqual(report.created, 1, report.errors)
+        p = Prediction.objects.get(email='csv@example.com')
+        self.assertEqual(p.top3, ['LLA'])
+        self.assertEqual(p.participation, 71.5)
+
+    def test_management_command_dry_run(self):
+        path = self._tmp_jsonl([{'username': 'Cmd', 'email': 'cmd@example.com'}])
+        out = io.StringIO()
+        call_command('import_predictions', path, dry_run=True, stdout=out)
+        self.assertIn('1 nuevas', out.getvalue())
+        self.assertFalse(Prediction.objects.exists())
+
+    def test_staff_endpoint_accepts_uploaded_file(self):
+        staff = get_user_model().objects.create_user('staff', password='x', is_staff=True)
+        self.client.force_login(staff)
+        upload = SimpleUploadedFile('p.jsonl', b'{"username": "Up", "email": "up@example.com"}\n')
+        res = self.client.post('/api/admin/predictions/import', {'file': upload})
+        self.assertEqual(res.status_code, 200, res.content)
+        self.assertEqual(res.json()['created'], 1)
+        self.assertTrue(Prediction.objects.filter(email='up@example.com').exists())
+
+    def test_staff_endpoint_requires_staff(self):
+        res = self.client.post('/api/admin/predictions/import', data='{}', content_type='application/x-ndjson')
+        self.assertEqual(res.status_code, 403)
+
+    def _tmp_jsonl(self, rows):
+        import tempfile
+        f = tempfile.NamedTemporaryFile('w', suffix='.jsonl', delete=False, encoding='utf-8')
+        with f:
+            for r in rows:
+                f.write(json.dumps(r) + '\n')
+        self.addCleanup(lambda: __import__('os').unlink(f.name))
+        return f.name
+
+    def test_staff_endpoint_accepts_raw_body(self):
+        staff = get_user_model().objects.create_user('staff', password='x', is_staff=True)
+        self.client.force_login(staff)
+        body = 'username,email\nRaw,raw@example.com\n'
+        res = self.client.post('/api/admin/predictions/import?file_format=csv', data=body, content_type='text/csv')
+        self.assertEqual(res.status_code, 200, res.content)
+        self.assertEqual(res.json()['created'], 1)
@@ -0,0 +1,67 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+
+from prode import metrics
+from prode.models import OfficialResults, Prediction
+from prode.ranking import rebuild_ranking
+from prode_backend import settings as app_settings
+
+
+class MetricsEndpointTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def _scrape(self) -> str:
+        res = self.client.get('/api/metrics')
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(res['Content-Type'].startswith('text/plain'))
+        return res.content.decode('utf-8')
+
+    def test_exposes_app_metrics(self):
+        failures = metrics.VALIDATION_FAILURES.value('top3')
+        hits = metrics.CACHE_REQUESTS.value('results', 'hit')
+        upserts = metrics.UPSERT_SECONDS.child().snapshot()['count']
+
+        payload = {'username': 'Ana', 'email': 'ana@example.com', 'top3': ['Inexistente']}
+        self.assertEqual(self.client.post('/api/predictions', payload, content_type='application/json').status_code, 400)
+        payload['top3'] = ['LLA']
+        self.assertEqual(self.client.post('/api/predictions', payload, content_type='application/json').status_code, 201)
+        self.client.get('/api/results')
+        self.client.get('/api/results')
+        rebuild_ranking(OfficialResults.objects.create(is_published=True, national_percentages={'LLA': 100}))
+
+        self.assertEqual(metrics.VALIDATION_FAILURES.value('top3'), failures + 1)
+        self.assertEqual(metrics.CACHE_REQUESTS.value('results', 'hit'), hits + 1)
+        self.assertEqual(metrics.UPSERT_SECONDS.child().snapshot()['count'], upserts + 1)
+        body = self._scrape()
+        self.assertIn('prode_http_requests_total{view="PredictionUpsertView",status="201"}', body)
+        self.assertIn('prode_ranking_compute_duration_seconds_count{kind="rebuild"}', body)
+        self.assertIn('prode_prediction_upsert_duration_seconds_bucket{le="+Inf"}', body)
+        self.assertIn('prode_sse_connections 0', body)
+
+    def test_token_is_required_when_configured(self):
+        with mock.patch.object(app_settings, 'METRICS_TOKEN', 'sekret'):
+            self.assertEqual(self.client.get('/api/metrics').status_code, 403)
+            res = self.client.get('/api/metrics', HTTP_AUTHORIZATION='Bearer sekret')
+            self.assertEqual(res.status_code, 200)
+
+    def test_health_does_not_touch_tables(self):
+        Prediction.objects.create(username='Ana', email='ana@example.com')
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get('/api/health')
+        self.assertEqual(res.json()['db'], 'ok')
+        self.assertEqual([q['sql'] for q in ctx.captured_queries], ['SELECT 1'])
+
+
+class HistogramExpositionTests(SimpleTestCase):
+    def test_cumulative_buckets(self):
+        h = metrics.Histogram((0.1, 1))
+        for v in (0.05, 0.5, 5):
+            h.observe(v)
+        snap = h.snapshot()
+        self.assertEqual(snap['buckets'], {'0.1': 1, '1': 2, '+Inf': 3})
+        self.assertEqual(snap['p50'], 1)
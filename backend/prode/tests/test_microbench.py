@@ -0,0 +1,33 @@
+from django.test import SimpleTestCase
+
+from prode.microbench import benchmark_cases, compare, find_entry, measure, synthetic_payloads
+from prode.validators import get_schema, override_schema
+
+
+class MicrobenchTests(SimpleTestCase):
+    def test_payloads_are_real_sized_and_valid(self):
+        payloads = synthetic_payloads()
+        self.assertEqual(len(payloads.prediction['provinciales']), 24)
+        self.assertEqual(len(payloads.schema.fuerzas), 8)
+        before = get_schema()
+        with override_schema(payloads.schema):
+            cases = benchmark_cases(payloads)
+            # Los validadores miden el camino feliz: ninguno devuelve error
+            self.assertIsNone(cases['validate_provinciales']())
+            self.assertIsNone(cases['validate_top3']())
+            self.assertTrue(cases['PredictionUpsertSerializer.is_valid']())
+            cases['OfficialResultsSerializer.validate']()
+            self.assertGreater(cases['score_prediction']()['breakdown']['provincial_points'], 0)
+        self.assertIs(get_schema(), before)
+
+    def test_measure_and_compare_against_history(self):
+        stats = measure(lambda: None, rounds=3, min_time=0.001)
+        self.assertEqual(stats['rounds'], 3)
+        self.assertLessEqual(stats['min_us'], stats['median_us'])
+        history = [
+            {'commit': 'aaa111', 'results': {'case': {'median_us': 10.0}}},
+            {'commit': 'bbb222', 'results': {'case': {'median_us': 20.0}}},
+        ]
+        self.assertEqual(find_entry(history, None)['commit'], 'bbb222')
+        ref = find_entry(history, 'aaa')
+        self.assertEqual(compare({'case': {'median_us': 15.0}}, ref), {'case': 0.5})
@@ -1,6 +1,12 @@
+import io
+
+from django.core.cache import cache
 from django.test import TestCase
 
+from prode.ingest import ingest, iter_rows
 from prode.models import Prediction
+from prode.players import delete_predictions, get_counters
+from prode.predictions import upsert_prediction
 from prode.validators import get_fuerzas, get_provincias, get_fuerzas_por_provincia
 
 
@@ -13,6 +19,8 @@ class PlayersViewTests(TestCase):
         provincias = list(get_provincias()) or ['Provincia X']
         # Not completed: only username/email
         Prediction.objects.create(username='OnlyUser', email='only@example.com')
+        # Not completed: data without username
+        Prediction.objects.create(username='', email='anon@example.com', top3=['LLA'])
 
         # Completed by top3 (usa hasta 3 fuerzas disponibles)
         top3 = fuerzas[:3] if len(fuerzas) >= 3 else fuerzas[:1]
@@ -47,3 +55,70 @@ class PlayersViewTests(TestCase):
         self.assertIn('NatUser', names)
         self.assertIn('ProvUser', names)
         self.assertNotIn('OnlyUser', names)
+        self.assertNotIn('', names)
+        self.assertEqual(js['count_completed'], 3)
+
+
+class PlayerCountersTests(TestCase):
+    url = '/api/players'
+
+    def setUp(self):
+        cache.clear()
+
+    def _counters(self):
+        c = get_counters()
+        return c.total, c.completed
+
+    def test_counters_follow_every_write_path(self):
+        Prediction.objects.create(username='Orm', email='orm@example.com', top3=['LLA'])
+        upsert_prediction({'email': 'up@example.com', 'username': 'Up'})
+        self.assertEqual(self._counters(), (2, 1))
+        # Un upsert parcial conserva lo ya cargado y pasa a completado
+        upsert_prediction({'email': 'up@example.com', 'national_percentages': {'LLA': 40}})
+        upsert_prediction({'email': 'up@example.com', 'participation': 70})
+        self.assertTrue(Prediction.objects.get(email='up@example.com').is_completed)
+        self.assertEqual(self._counters(), (2, 2))
+        ingest(iter_rows(io.StringIO(
+            '{"email": "bulk@example.com", "username": "Bulk"}\n'
+            '{"email": "orm@example.com", "username": "Orm"}\n'
+        ), 'jsonl'))
+        # La fila importada reemplaza la previa: orm deja de estar completado
+        self.assertEqual(self._counters(), (3, 1))
+        delete_predictions(Prediction.objects.filter(email='up@example.com'))
+        self.assertEqual(self._counters(), (2, 0))
+        self.assertEqual(self._counters(), (
+            Prediction.objects.count(), Prediction.objects.filter(is_completed=True).count(),
+        ))
+
+    def test_save_without_loaded_state_rereads_the_row(self):
+        p = Prediction.objects.create(username='A', email='a@example.com', top3=['LLA'])
+        Prediction(id=p.pk, created_at=p.created_at, username='A', email='a@example.com', top3=['FIT-U']).save()
+        self.assertEqual(self._counters(), (1, 1))
+        partial = Prediction.objects.only('id', 'email').get(pk=p.pk)
+        partial.top3 = []
+        partial.save()
+        self.assertEqual(self._counters(), (1, 0))
+        upsert_prediction({'email': 'b@example.com', 'username': '', 'top3': ['LLA']})
+        self.assertEqual(self._counters(), (2, 0))
+
+    def test_pages_with_cursor(self):
+        for name in ('c', 'a', 'b', 'd'):
+            Prediction.objects.create(username=name, email=f'{name}@example.com', top3=['LLA'])
+        first = self.client.get(self.url, {'limit': 3}).json()
+        self.assertEqual(first['usernames'], ['a', 'b', 'c'])
+        self.assertEqual(first['count_completed'], 4)
+        second = self.client.get(self.url, {'limit': 3, 'cursor': first['next_cursor']}).json()
+        self.assertEqual(second['usernames'], ['d'])
+        self.assertIsNone(second['next_cursor'])
+        self.assertEqual(self.client.get(self.url, {'cursor': 'x'}).status_code, 400)
+
+    def test_cached_page_changes_with_counters_version(self):
+        Prediction.objects.create(username='Ana', email='ana@example.com', top3=['LLA'])
+        with self.assertNumQueries(2):
+            self.client.get(self.url)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(self.url).json()['usernames'], ['Ana'])
+        p = Prediction.objects.get()
+        p.username = 'Ana B'
+        p.save()
+        self.assertEqual(self.client.get(self.url).json()['usernames'], ['Ana B'])
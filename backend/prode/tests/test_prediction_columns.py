@@ -0,0 +1,88 @@
+import importlib
+import io
+import random
+from unittest import mock
+
+from django.apps import apps
+from django.db import DatabaseError, transaction
+from django.test import SimpleTestCase, TestCase
+
+from prode.batch_scoring import Columnar, score_rows
+from prode.columns import current_layout, pack_prediction, encode_national
+from prode.ingest import ingest, iter_rows
+from prode.models import OfficialResults, Prediction, PredictionColumns
+from prode.predictions import upsert_prediction
+from prode.ranking import _scoring_inputs
+from prode.scoring import scoring_context
+
+
+class ColumnarScoringTests(SimpleTestCase):
+    def test_columnar_rows_score_like_json_rows(self):
+        res = OfficialResults(
+            national_percentages={'LLA': 40.7, 'Fuerza Patria': 34.94, 'Provincias Unidas': 14.13, 'FIT-U': 5.03},
+            participation=67.85, margin_1_2=5.76,
+        )
+        forces, _ = current_layout()
+        rnd = random.Random(7)
+        json_rows, mixed_rows = [], []
+        for i in range(300):
+            nat = {f: round(rnd.uniform(0, 50), 2) for f in rnd.sample(forces, rnd.randint(0, len(forces)))}
+            t3 = [rnd.choice(list(forces) + [None]) for _ in range(rnd.randint(0, 3))]
+            row = (t3, nat, rnd.choice([None, 70.0, '65']), 5.0, None, None)
+            json_rows.append(row)
+            vals, picks, exotic = pack_prediction(t3, nat, forces)
+            self.assertFalse(exotic)
+            # Mitad de las filas desde el store: se mezclan ambos orígenes
+            mixed_rows.append((tuple(picks), Columnar(encode_national(vals), forces)) + row[2:] if i % 2 else row)
+        self.assertEqual(score_rows(mixed_rows, res), score_rows(json_rows, res))
+
+    def test_unknown_forces_are_flagged_exotic(self):
+        forces, _ = current_layout()
+        self.assertTrue(pack_prediction(['Nueva'], {}, forces)[2])
+        self.assertTrue(pack_prediction([], {'Nueva': 3}, forces)[2])
+        self.assertTrue(pack_prediction('LLA', {}, forces)[2])
+
+
+class PredictionColumnsSyncTests(TestCase):
+    def test_every_write_path_keeps_store_in_sync(self):
+        created = Prediction.objects.create(username='Orm', email='orm@example.com', top3=['LLA'])
+        upserted = upsert_prediction({'email': 'up@example.com', 'username': 'Up', 'national_percentages': {'LLA': 40}})
+        ingest(iter_rows(io.StringIO('{"email": "bulk@example.com", "username": "Bulk", "top3": ["LLA"]}\n'), 'jsonl'))
+        for p in Prediction.objects.all():
+            cols = PredictionColumns.objects.get(prediction=p)
+            self.assertEqual(cols.synced_at, p.updated_at, p.email)
+            self.assertTrue(p.is_completed)
+        self.assertEqual(PredictionColumns.objects.get(prediction=created).pick1,
+                         current_layout()[0].index('LLA'))
+        self.assertIsNotNone(upserted.pk)
+
+    def test_migration_backfill_matches_sync_columns(self):
+        Prediction.objects.create(username='A', email='a@example.com', top3=['LLA', 'Otra'], national_percentages={'LLA': 40.5})
+        Prediction.objects.create(username='B', email='b@example.com', national_percentages=['raro'])
+        fields = ('prediction_id', 'layout', 'synced_at', 'national', 'pick1', 'pick2', 'pick3', 'exotic')
+        live = sorted(PredictionColumns.objects.values_list(*fields))
+        PredictionColumns.objects.all().delete()
+        importlib.import_module('prode.migrations.0009_prediction_columns').backfill_columns(apps, None)
+        self.assertEqual(sorted(PredictionColumns.objects.values_list(*fields)), live)
+
+    def test_failed_sync_only_rolls_back_its_savepoint(self):
+        def broken(preds, model=None):
+            Prediction.objects.filter(pk=preds[0].pk).update(username='Parcial')
+            raise DatabaseError('boom')
+
+        with mock.patch('prode.columns.sync_columns', side_effect=broken), \
+                self.assertLogs('prode.columns', 'ERROR'):
+            with transaction.atomic():
+                p = Prediction.objects.create(username='Ana', email='ana@example.com', top3=['LLA'])
+                # La transacción de quien llama sigue usable
+                self.assertEqual(Prediction.objects.count(), 1)
+        self.assertEqual(Prediction.objects.get(pk=p.pk).username, 'Ana')
+        self.assertFalse(PredictionColumns.objects.filter(prediction=p).exists())
+
+    def test_stale_rows_are_read_from_json(self):
+        p = Prediction.objects.create(username='A', email='a@example.com', top3=['LLA'], national_percentages={'LLA': 50})
+        Prediction.objects.create(username='B', email='b@example.com', top3=['LLA'])
+        PredictionColumns.objects.filter(prediction=p).delete()
+        _, rows = _scoring_inputs(scoring_context(OfficialResults()))
+        self.assertEqual(rows[0][:2], (['LLA'], {'LLA': 50}))
+        self.assertIsInstance(rows[1][1], Columnar)
@@ -0,0 +1,65 @@
+import json
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from prode import profiling
+from prode.models import Prediction
+
+AUTH = 'django.contrib.auth.middleware.AuthenticationMiddleware'
+PROFILED_MIDDLEWARE = list(settings.MIDDLEWARE)
+if 'prode.profiling.ProfilingMiddleware' not in PROFILED_MIDDLEWARE:
+    PROFILED_MIDDLEWARE.insert(PROFILED_MIDDLEWARE.index(AUTH) + 1, 'prode.profiling.ProfilingMiddleware')
+
+
+@override_settings(MIDDLEWARE=PROFILED_MIDDLEWARE)
+class ProfilingMiddlewareTests(TestCase):
+    def setUp(self):
+        profiling.reset()
+        Prediction.objects.create(username='Ana', email='ana@example.com', top3=['LLA'])
+
+    def test_server_timing_log_line_and_histograms(self):
+        with self.assertLogs('prode.requests', 'INFO') as logs:
+            res = self.client.get('/api/predictions/mine', {'email': 'ana@example.com'})
+        self.assertEqual(res.status_code, 200)
+        timing = res['Server-Timing']
+        self.assertIn('total;dur=', timing)
+        self.assertIn('db;dur=', timing)
+        self.assertIn('serialize;dur=', timing)
+        line = json.loads(logs.records[0].getMessage())
+        self.assertEqual(line['view'], 'PredictionMineView')
+        self.assertGreaterEqual(line['queries'], 1)
+        self.assertEqual(line['bytes'], len(res.content))
+        view = profiling.snapshot()['views']['PredictionMineView']
+        self.assertEqual(view['wall_ms']['count'], 1)
+        self.assertEqual(view['statuses'], {'200': 1})
+
+    async def test_async_view_counts_queries_from_orm_thread(self):
+        with self.assertLogs('prode.requests', 'INFO') as logs:
+            res = await self.async_client.get('/api/predictions/mine', {'email': 'ana@example.com'})
+        self.assertEqual(res.status_code, 200)
+        line = json.loads(logs.records[0].getMessage())
+        self.assertGreaterEqual(line['queries'], 1)
+        self.assertNotIn('desc="0 queries"', res['Server-Timing'])
+
+    def test_cprofile_only_for_staff(self):
+        staff = get_user_model().objects.create_user('staff', password='x', is_staff=True)
+        with self.assertLogs('prode.requests', 'INFO') as logs:
+            res = self.client.get('/api/players', HTTP_X_PRODE_PROFILE='1')
+            self.assertNotIn(profiling.PROFILE_ID_HEADER, res)
+
+            self.client.force_login(staff)
+            res = self.client.get('/api/players', HTTP_X_PRODE_PROFILE='1')
+            pid = res[profiling.PROFILE_ID_HEADER]
+            dump = self.client.get('/api/admin/profiling', {'profile': pid}).json()
+            overview = self.client.get('/api/admin/profiling').json()
+        self.assertEqual(len(logs.records), 4)
+        self.assertEqual(dump['view'], 'PlayersView')
+        self.assertIn('function calls', dump['stats'])
+        self.assertIn('PlayersView', overview['views'])
+        self.assertEqual([p['id'] for p in overview['profiles']], [pid])
+
+    def test_endpoint_requires_staff(self):
+        with self.assertLogs('prode.requests', 'INFO'):
+            self.assertEqual(self.client.get('/api/admin/profiling').status_code, 403)
@@ -0,0 +1,79 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+
+from prode.models import Prediction, OfficialResults, RankingEntry
+from prode.ranking import rebuild_ranking, rescore_prediction
+
+
+class IncrementalRescoreTests(TestCase):
+    def setUp(self):
+        self.staff = get_user_model().objects.create_user('staff', password='x', is_staff=True)
+        # LLA real = 40: P0 erra por 0, P1 por 2, ... => orden P0..P4
+        for i in range(5):
+            Prediction.objects.create(
+                username=f'P{i}', email=f'p{i}@example.com', top3=['LLA', 'Fuerza Patria'],
+                national_percentages={'LLA': 40 + 2 * i, 'Fuerza Patria': 60 - 2 * i},
+                participation=70, margin_1_2=5,
+            )
+        self.res = OfficialResults.objects.create(
+            is_published=True, published_at=timezone.now(),
+            national_percentages={'LLA': 40, 'Fuerza Patria': 60}, participation=70, margin_1_2=5,
+        )
+        rebuild_ranking(self.res)
+
+    def _order(self):
+        return list(RankingEntry.objects.order_by('position').values_list('username', 'position'))
+
+    def _assert_matches_full_rebuild(self):
+        incremental = self._order()
+        scores = dict(RankingEntry.objects.values_list('username', 'score'))
+        rebuild_ranking(self.res)
+        self.assertEqual(incremental, self._order())
+        self.assertEqual(scores, dict(RankingEntry.objects.values_list('username', 'score')))
+
+    def _edit(self, username, lla):
+        p = Prediction.objects.get(username=username)
+        p.national_percentages = {'LLA': lla, 'Fuerza Patria': 100 - lla}
+        p.save()
+        return p
+
+    def test_moves_row_up_and_shifts_neighbours(self):
+        p = self._edit('P4', 41)
+        self.assertEqual(rescore_prediction(self.res, p), 2)
+        self.assertEqual([u for u, _ in self._order()], ['P0', 'P4', 'P1', 'P2', 'P3'])
+        self._assert_matches_full_rebuild()
+
+    def test_moves_row_down(self):
+        p = self._edit('P0', 49)
+        self.assertEqual(rescore_prediction(self.res, p), 5)
+        self._assert_matches_full_rebuild()
+
+    def test_tie_breaks_by_submission_time(self):
+        p = self._edit('P0', 44)  # mismo score que P2 pero enviado después
+        self.assertEqual(rescore_prediction(self.res, p), 3)
+        self._assert_matches_full_rebuild()
+
+    def test_falls_back_to_rebuild_when_other_predictions_changed(self):
+        other = self._edit('P3', 40)
+        other.updated_at = timezone.now() + timedelta(seconds=1)
+        Prediction.objects.filter(id=other.id).update(updated_at=other.updated_at)
+        p = self._edit('P4', 40)
+        rescore_prediction(self.res, p)
+        self.assertEqual(RankingEntry.objects.get(username='P3').score, RankingEntry.objects.get(username='P0').score)
+        self._assert_matches_full_rebuild()
+
+    def test_admin_patch_updates_ranking_in_place(self):
+        self.client.force_login(self.staff)
+        pid = Prediction.objects.get(username='P3').id
+        untouched = RankingEntry.objects.get(username='P0').computed_at
+        res = self.client.patch(f'/api/admin/predictions/{pid}', data={
+            'national_percentages': {'LLA': 40, 'Fuerza Patria': 60},
+        }, content_type='application/json')
+        self.assertEqual(res.status_code, 200, res.content)
+        self.assertEqual(RankingEntry.objects.get(username='P3').position, 2)
+        self.assertEqual(RankingEntry.objects.get(username='P0').computed_at, untouched)
+        js = self.client.get('/api/ranking').json()
+        self.assertEqual([r['username'] for r in js['results']], ['P0', 'P3', 'P1', 'P2', 'P4'])
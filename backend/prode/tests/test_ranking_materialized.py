@@ -0,0 +1,103 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+
+from prode.models import Prediction, OfficialResults, RankingEntry
+from prode.ranking import REBUILD_LOCK_KEY
+
+
+class RankingMaterializedTests(TestCase):
+    def setUp(self):
+        self.staff = get_user_model().objects.create_user('staff', password='x', is_staff=True)
+        Prediction.objects.create(
+            username='Exacto', email='exacto@example.com', top3=['LLA', 'Fuerza Patria', 'Provincias Unidas'],
+            national_percentages={'LLA': 40, 'Fuerza Patria': 35, 'Provincias Unidas': 25},
+            participation=70, margin_1_2=5,
+        )
+        Prediction.objects.create(
+            username='Lejano', email='lejano@example.com', top3=['Provincias Unidas'],
+            national_percentages={'LLA': 10, 'Fuerza Patria': 30, 'Provincias Unidas': 60},
+            participation=50, margin_1_2=20,
+        )
+
+    def _results_payload(self, published=True):
+        return {
+            'is_published': published,
+            'national_percentages': {'LLA': 40, 'Fuerza Patria': 35, 'Provincias Unidas': 25},
+            'participation': 70,
+            'margin_1_2': 5,
+            'provinciales': {},
+        }
+
+    def test_publish_materializes_ranking(self):
+        self.client.force_login(self.staff)
+        res = self.client.post('/api/results', data=self._results_payload(), content_type='application/json')
+        self.assertEqual(res.status_code, 201, res.content)
+        entries = list(RankingEntry.objects.order_by('position'))
+        self.assertEqual([e.username for e in entries], ['Exacto', 'Lejano'])
+        self.assertEqual(entries[0].score, 100.0)
+        self.assertEqual(entries[0].results_id, res.json()['id'])
+
+        js = self.client.get('/api/ranking').json()
+        self.assertEqual(js['count'], 2)
+        self.assertEqual(js['results'][0]['username'], 'Exacto')
+        self.assertEqual(js['results'][1]['position'], 2)
+
+    def test_draft_does_not_materialize_until_admin_publishes(self):
+        self.client.force_login(self.staff)
+        res = self.client.post('/api/results', data=self._results_payload(published=False), content_type='application/json')
+        self.assertEqual(res.status_code, 201)
+        self.assertFalse(RankingEntry.objects.exists())
+
+        pub = self.client.post('/api/admin/results', data={'id': res.json()['id']}, content_type='application/json')
+        self.assertEqual(pub.status_code, 200, pub.content)
+        self.assertEqual(pub.json()['ranking_count'], 2)
+        self.assertTrue(OfficialResults.objects.get(id=res.json()['id']).is_published)
+
+    def test_filter_keeps_global_position(self):
+        self.client.force_login(self.staff)
+        self.client.post('/api/results', data=self._results_payload(), content_type='application/json')
+        js = self.client.get('/api/ranking', {'q': 'lejano'}).json()
+        self.assertEqual(js['count'], 1)
+        self.assertEqual(js['results'][0]['position'], 2)
+
+    def test_ranking_rebuilt_lazily_after_invalidation(self):
+        self.client.force_login(self.staff)
+        self.client.post('/api/results', data=self._results_payload(), content_type='application/json')
+        pid = Prediction.objects.get(email='lejano@example.com').id
+        self.client.delete('/api/admin/predictions', data={'ids': [pid]}, content_type='application/json')
+        self.assertFalse(RankingEntry.objects.exists())
+        js = self.client.get('/api/ranking').json()
+        self.assertEqual(js['count'], 1)
+        self.assertEqual(RankingEntry.objects.count(), 1)
+
+    def test_ranking_refreshed_when_prediction_changes_after_publication(self):
+        self.client.force_login(self.staff)
+        self.client.post('/api/results', data=self._results_payload(), content_type='application/json')
+        self.client.post('/api/predictions', data={
+            'username': 'Lejano', 'email': 'lejano@example.com', 'top3': ['LLA', 'Fuerza Patria', 'Provincias Unidas'],
+            'national_percentages': {'LLA': 40, 'Fuerza Patria': 35, 'Provincias Unidas': 25},
+            'participation': 70, 'margin_1_2': 5,
+        }, content_type='application/json')
+        js = self.client.get('/api/ranking', {'q': 'lejano'}).json()
+        self.assertEqual(js['results'][0]['score'], 100.0)
+
+    def test_concurrent_readers_serve_existing_rows_while_one_rebuilds(self):
+        cache.clear()
+        self.client.force_login(self.staff)
+        res_id = self.client.post('/api/results', data=self._results_payload(), content_type='application/json').json()['id']
+        Prediction.objects.filter(email='lejano@example.com').update(username='Renombrado')
+        Prediction.objects.filter(email='lejano@example.com').first().save()  # updated_at posterior al ranking
+
+        # Otro request tiene el lock: este no recalcula y sirve las filas vigentes
+        cache.add(REBUILD_LOCK_KEY.format(res_id), 1)
+        with mock.patch('prode.ranking.rebuild_ranking') as rebuild:
+            js = self.client.get('/api/ranking').json()
+        rebuild.assert_not_called()
+        self.assertEqual([it['username'] for it in js['results']], ['Exacto', 'Lejano'])
+
+        cache.delete(REBUILD_LOCK_KEY.format(res_id))
+        js = self.client.get('/api/ranking').json()
+        self.assertEqual(js['results'][1]['username'], 'Renombrado')
@@ -0,0 +1,56 @@
+from django.test import TestCase
+
+from prode.models import Prediction, OfficialResults
+from prode.ranking import rebuild_ranking
+
+
+class RankingPaginationTests(TestCase):
+    def setUp(self):
+        for i in range(7):
+            Prediction.objects.create(
+                username=f'P{i}', email=f'p{i}@example.com', top3=['LLA'],
+                # Empates a propósito para ejercitar el desempate por fecha/id
+                national_percentages={'LLA': 40 + (i // 2), 'Fuerza Patria': 60 - (i // 2)},
+                participation=70, margin_1_2=5,
+            )
+        self.res = OfficialResults.objects.create(
+            is_published=True, national_percentages={'LLA': 45, 'Fuerza Patria': 55}, participation=70, margin_1_2=5,
+        )
+        rebuild_ranking(self.res)
+
+    def test_keyset_pages_cover_full_ranking_in_order(self):
+        full = [it['username'] for it in self.client.get('/api/ranking').json()['results']]
+        seen = []
+        cursor = None
+        while True:
+            params = {'limit': 3}
+            if cursor:
+                params['cursor'] = cursor
+            js = self.client.get('/api/ranking', params).json()
+            seen.extend(it['username'] for it in js['results'])
+            cursor = js['next_cursor']
+            if not cursor:
+                break
+        self.assertEqual(seen, full)
+        self.assertEqual(len(seen), 7)
+
+    def test_invalid_cursor_is_rejected(self):
+        res = self.client.get('/api/ranking', {'limit': 3, 'cursor': 'no-firmado'})
+        self.assertEqual(res.status_code, 400)
+
+    def test_my_position_returns_neighbour_window(self):
+        full = self.client.get('/api/ranking').json()['results']
+        target = full[3]
+        js = self.client.get('/api/ranking', {'email': target['email'].upper(), 'window': 1}).json()
+        self.assertEqual(js['me']['position'], 4)
+        self.assertEqual([it['position'] for it in js['results']], [3, 4, 5])
+
+    def test_my_position_unknown_email(self):
+        js = self.client.get('/api/ranking', {'email': 'nadie@example.com'}).json()
+        self.assertIsNone(js['me'])
+        self.assertEqual(js['results'], [])
+
+    def test_compact_omits_breakdown_and_email(self):
+        js = self.client.get('/api/ranking', {'limit': 2, 'compact': 1}).json()
+        self.assertNotIn('breakdown', js['results'][0])
+        self.assertNotIn('email', js['results'][0])
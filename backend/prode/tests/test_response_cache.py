@@ -0,0 +1,51 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+
+
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.staff = get_user_model().objects.create_user('staff', password='x', is_staff=True)
+
+    def _publish(self, lla=40):
+        self.client.force_login(self.staff)
+        res = self.client.post('/api/results', data={
+            'is_published': True,
+            'national_percentages': {'LLA': lla, 'Fuerza Patria': 100 - lla},
+            'provinciales': {},
+        }, content_type='application/json')
+        self.assertEqual(res.status_code, 201, res.content)
+        self.client.logout()
+
+    def test_results_etag_and_not_modified(self):
+        first = self.client.get('/api/results')
+        self.assertEqual(first.status_code, 200)
+        etag = first['ETag']
+        self.assertTrue(etag.startswith('"'))
+        again = self.client.get('/api/results', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again['ETag'], etag)
+
+    def test_publication_invalidates_results(self):
+        empty = self.client.get('/api/results')
+        self.assertIn('detail', empty.json())
+        self._publish(lla=40)
+        fresh = self.client.get('/api/results', HTTP_IF_NONE_MATCH=empty['ETag'])
+        self.assertEqual(fresh.status_code, 200)
+        self.assertEqual(fresh.json()['national_percentages']['LLA'], 40)
+        self.assertNotEqual(fresh['ETag'], empty['ETag'])
+
+    def test_results_served_from_cache_without_queries(self):
+        self._publish()
+        self.client.get('/api/results')
+        with self.assertNumQueries(0):
+            res = self.client.get('/api/results')
+        self.assertEqual(res.status_code, 200)
+
+    def test_metadata_etag_and_not_modified(self):
+        first = self.client.get('/api/metadata')
+        self.assertEqual(first.status_code, 200)
+        self.assertIn('fuerzas', first.json())
+        again = self.client.get('/api/metadata', HTTP_IF_NONE_MATCH=f'W/{first["ETag"]}')
+        self.assertEqual(again.status_code, 304)
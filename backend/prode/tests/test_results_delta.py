@@ -0,0 +1,155 @@
+import threading
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.signing import dumps
+from django.db import connection
+from django.test import Client, SimpleTestCase, TestCase, TransactionTestCase
+from django.utils import timezone
+
+from prode.auth import ADMIN_TOKEN_SALT
+from prode.models import Prediction, OfficialResults, RankingEntry
+from prode.ranking import rebuild_ranking
+from prode.results_delta import DeltaError, apply_delta
+
+
+class ApplyDeltaTests(SimpleTestCase):
+    def setUp(self):
+        self.snapshot = {
+            'national_percentages': {'LLA': 40, 'Fuerza Patria': 35, 'Otros': 25},
+            'participation': 60, 'margin_1_2': 5, 'blanco_nulo_impugnado': None, 'total_votes': None,
+            'provinciales': {
+                'CABA': {'percentages': {'LLA': 50, 'Fuerza Patria': 30}, 'winner': 'LLA'},
+                'Salta': {'porcentajes': {'LLA': 45}, 'ganador': 'LLA'},
+            },
+        }
+
+    def test_merges_only_changed_forces_and_provinces(self):
+        merged, change = apply_delta(self.snapshot, {
+            'provinciales': {'Salta': {'percentages': {'Fuerza Patria': 46}, 'winner': 'Fuerza Patria'}},
+        })
+        self.assertEqual(merged['provinciales']['Salta'], {
+            'porcentajes': {'LLA': 45, 'Fuerza Patria': 46}, 'ganador': 'Fuerza Patria',
+        })
+        self.assertEqual(merged['provinciales']['CABA'], self.snapshot['provinciales']['CABA'])
+        self.assertEqual(change.provinces, {'Salta'})
+        self.assertFalse(change.national)
+        self.assertEqual(self.snapshot['provinciales']['Salta']['porcentajes'], {'LLA': 45})  # no muta la base
+
+    def test_null_removes_and_national_change_is_flagged(self):
+        merged, change = apply_delta(self.snapshot, {
+            'national_percentages': {'Otros': None, 'LLA': 65}, 'provinciales': {'CABA': None},
+        })
+        self.assertEqual(merged['national_percentages'], {'LLA': 65, 'Fuerza Patria': 35})
+        self.assertNotIn('CABA', merged['provinciales'])
+        self.assertTrue(change.national)
+        self.assertEqual(change.provinces, {'CABA'})
+
+    def test_unchanged_values_produce_no_change(self):
+        _, change = apply_delta(self.snapshot, {'participation': 60, 'provinciales': {'CABA': {'winner': 'LLA'}}})
+        self.assertEqual(change.as_dict(), {'fields': [], 'provinces': []})
+
+    def test_rejects_unknown_fields(self):
+        with self.assertRaises(DeltaError):
+            apply_delta(self.snapshot, {'is_published': False})
+
+
+class PartialPublicationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        staff = get_user_model().objects.create_user('staff', password='x', is_staff=True)
+        self.client.force_login(staff)
+        nat = {'LLA': 40, 'Fuerza Patria': 35, 'Provincias Unidas': 25}
+        picks = [
+            ('Caba', {'CABA': {'percentages': {'LLA': 50, 'Fuerza Patria': 30}, 'winner': 'LLA'}}, {}),
+            ('Salta', {'Salta': {'percentages': {'LLA': 45, 'Fuerza Patria': 40}, 'winner': 'LLA'}}, {}),
+            ('Bonus', {}, {'mas_renida': 'Salta'}),
+            ('Nada', {}, {}),
+        ]
+        for name, prov, bonus in picks:
+            Prediction.objects.create(
+                username=name, email=f'{name.lower()}@example.com', top3=['LLA', 'Fuerza Patria'],
+                national_percentages=nat, participation=70, margin_1_2=5, provinciales=prov, bonus=bonus,
+            )
+        self.base = OfficialResults.objects.create(
+            is_published=True, published_at=timezone.now(), national_percentages=nat, participation=70, margin_1_2=5,
+            provinciales={
+                'CABA': {'percentages': {'LLA': 50, 'Fuerza Patria': 30}},
+                'Salta': {'percentages': {'LLA': 45, 'Fuerza Patria': 40}},
+            },
+        )
+        rebuild_ranking(self.base)
+
+    def _ranking(self):
+        return list(RankingEntry.objects.order_by('position').values_list('username', 'score', 'bonus', 'position'))
+
+    def _patch(self, data):
+        return self.client.patch('/api/results', data=data, content_type='application/json')
+
+    def test_province_delta_rescores_only_affected_rows(self):
+        untouched = RankingEntry.objects.get(username='Nada').computed_at
+        res = self._patch({'provinciales': {'Salta': {'percentages': {'LLA': 41, 'Fuerza Patria': 44}}}})
+        self.assertEqual(res.status_code, 201, res.content)
+        js = res.json()
+        self.assertEqual((js['version'], js['parent']), (2, self.base.id))
+        self.assertEqual(js['changes'], {'fields': ['provinciales'], 'provinces': ['Salta']})
+        new = OfficialResults.objects.get(id=js['id'])
+        self.assertEqual(new.provinciales['CABA'], self.base.provinciales['CABA'])
+
+        self.assertEqual(RankingEntry.objects.get(username='Nada').computed_at, untouched)
+        self.assertFalse(RankingEntry.objects.filter(results=self.base).exists())
+        incremental = self._ranking()
+        rebuild_ranking(new)
+        self.assertEqual(incremental, self._ranking())
+
+        served = self.client.get('/api/results').json()
+        self.assertEqual(served['id'], new.id)
+        self.assertEqual(served['provinciales']['Salta']['percentages'], {'LLA': 41, 'Fuerza Patria': 44})
+
+    def test_national_delta_rebuilds_ranking(self):
+        res = self._patch({'national_percentages': {'LLA': 30, 'Fuerza Patria': 45}})
+        self.assertEqual(res.status_code, 201, res.content)
+        incremental = self._ranking()
+        rebuild_ranking(OfficialResults.objects.get(id=res.json()['id']))
+        self.assertEqual(incremental, self._ranking())
+
+    def test_stale_base_is_rejected(self):
+        self.assertEqual(self._patch({'participation': 71}).status_code, 201)
+        res = self._patch({'base': self.base.id, 'participation': 72})
+        self.assertEqual(res.status_code, 409)
+
+    def test_invalid_delta_and_permissions(self):
+        self.assertEqual(self._patch({'version': 9}).status_code, 400)
+        self.assertEqual(self._patch({'national_percentages': {'LLA': 90}}).status_code, 400)  # total > 102
+        self.client.logout()
+        self.assertEqual(self._patch({'participation': 71}).status_code, 403)
+
+
+class ConcurrentPartialPublicationTests(TransactionTestCase):
+    def test_concurrent_patches_on_same_base_create_one_version(self):
+        get_user_model().objects.create_user('staff', password='x', is_staff=True)
+        now = int(timezone.now().timestamp())
+        token = dumps({'u': 'staff', 's': True, 'iat': now, 'exp': now + 60}, salt=ADMIN_TOKEN_SALT)
+        base = OfficialResults.objects.create(is_published=True, published_at=timezone.now(), participation=70)
+        barrier = threading.Barrier(2)
+        statuses = []
+
+        def patch(participation):
+            try:
+                barrier.wait()
+                res = Client().patch(
+                    '/api/results', {'base': base.id, 'participation': participation},
+                    content_type='application/json', HTTP_AUTHORIZATION=f'Bearer {token}',
+                )
+                statuses.append(res.status_code)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=patch, args=(p,)) for p in (71, 72)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(sorted(statuses), [201, 409])
+        self.assertEqual(OfficialResults.objects.filter(parent=base).count(), 1)
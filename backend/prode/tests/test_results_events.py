@@ -0,0 +1,90 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.test import TestCase, SimpleTestCase
+
+from prode.events import Broadcaster, broadcaster, format_event, ranking_diff, results_version
+from prode.models import OfficialResults, Prediction
+from prode.publication import after_results_published
+
+
+class BroadcasterTests(SimpleTestCase):
+    def test_publish_fans_out_and_dedups_versions(self):
+        async def scenario():
+            b = Broadcaster(queue_size=2)
+            q1, q2 = b.subscribe(), b.subscribe()
+            self.assertEqual(b.connections, 2)
+            self.assertTrue(b.publish(1, 'v1'))
+            self.assertFalse(b.publish(1, 'v1 otra vez'))
+            await asyncio.sleep(0)
+            got = (q1.get_nowait(), q2.get_nowait())
+            b.unsubscribe(q1)
+            b.unsubscribe(q2)
+            return got, b.connections
+
+        got, remaining = asyncio.run(scenario())
+        self.assertEqual(got, ('v1', 'v1'))
+        self.assertEqual(remaining, 0)
+
+    def test_slow_client_keeps_latest_messages(self):
+        async def scenario():
+            b = Broadcaster(queue_size=2)
+            q = b.subscribe()
+            for v in (1, 2, 3):
+                b.publish(v, f'v{v}')
+            await asyncio.sleep(0)
+            out = [q.get_nowait(), q.get_nowait()]
+            b.unsubscribe(q)
+            return out
+
+        self.assertEqual(asyncio.run(scenario()), ['v2', 'v3'])
+
+    def test_ranking_diff_reports_moves_and_entries(self):
+        before = [{'id': 1, 'username': 'A', 'position': 1, 'score': 90}, {'id': 2, 'username': 'B', 'position': 2, 'score': 80}]
+        after = [{'id': 2, 'username': 'B', 'position': 1, 'score': 95}, {'id': 3, 'username': 'C', 'position': 2, 'score': 85}]
+        diff = ranking_diff(before, after)
+        self.assertEqual([(d['username'], d['prev_position']) for d in diff], [('B', 2), ('C', None)])
+
+    def test_format_event(self):
+        self.assertEqual(format_event('results', {'version': 3}, event_id=3), 'id: 3\nevent: results\ndata: {"version":3}\n\n')
+
+
+class ResultsEventsViewTests(TestCase):
+    def setUp(self):
+        # El broadcaster es global al proceso: se limpia lo dejado por otros tests
+        broadcaster.last_version = None
+        broadcaster.last_message = None
+
+    def test_older_draft_or_republication_is_broadcast(self):
+        self.client.force_login(get_user_model().objects.create_user('staff', password='x', is_staff=True))
+        older = OfficialResults.objects.create(national_percentages={'LLA': 40, 'Fuerza Patria': 60})
+        newer = OfficialResults.objects.create(national_percentages={'LLA': 50, 'Fuerza Patria': 50})
+        versions = []
+        for res in (newer, older, newer):
+            pub = self.client.post('/api/admin/results', data={'id': res.id}, content_type='application/json')
+            self.assertEqual(pub.status_code, 200, pub.content)
+            self.assertIn(f'"id":{res.id},', broadcaster.last_message)
+            versions.append(broadcaster.last_version)
+        self.assertEqual(versions, sorted(set(versions)))
+
+    def test_wsgi_request_is_rejected(self):
+        self.assertEqual(self.client.get('/api/events').status_code, 503)
+
+    async def test_stream_sends_current_version_on_connect(self):
+        def setup():
+            Prediction.objects.create(username='A', email='a@example.com', top3=['LLA'], national_percentages={'LLA': 50})
+            res = OfficialResults.objects.create(is_published=True, national_percentages={'LLA': 50, 'Fuerza Patria': 50})
+            after_results_published(res)
+            return results_version(res)
+        version = await sync_to_async(setup)()
+
+        resp = await self.async_client.get('/api/events')
+        self.assertEqual(resp['Content-Type'], 'text/event-stream')
+        chunks = aiter(resp.streaming_content)
+        first = (await anext(chunks)).decode()
+        second = (await anext(chunks)).decode()
+        await chunks.aclose()
+        self.assertTrue(first.startswith('retry:'))
+        self.assertIn(f'id: {version}\nevent: results', second)
+        self.assertIn('"username":"A"', second)
@@ -0,0 +1,121 @@
+import io
+import os
+import tempfile
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from prode import submission_queue
+from prode.models import PlayerCounters, Prediction
+from prode_backend import settings as app_settings
+
+
+class WriteBehindTests(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.addCleanup(submission_queue.close)
+        for patcher in (
+            mock.patch.object(app_settings, 'WRITE_BEHIND', True),
+            mock.patch.object(app_settings, 'WRITE_BEHIND_PATH', os.path.join(tmp.name, 'queue.sqlite3')),
+            # Sin hilo: los tests drenan a mano dentro de su transacción
+            mock.patch.object(submission_queue, 'ensure_worker'),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _post(self, **extra):
+        payload = {'username': 'Ana', 'email': 'Ana@Example.com', 'top3': ['LLA']}
+        payload.update(extra)
+        return self.client.post('/api/predictions', payload, content_type='application/json')
+
+    def _mine(self):
+        return self.client.get('/api/predictions/mine', {'email': 'ana@example.com', 'soft': 1}).json()
+
+    def test_accepts_without_touching_the_database(self):
+        with self.assertNumQueries(0):
+            res = self._post(participation=70)
+        self.assertEqual(res.status_code, 202, res.content)
+        js = res.json()
+        self.assertTrue(js['sync_pending'])
+        self.assertTrue(js['receipt'])
+        self.assertEqual(js['email'], 'ana@example.com')
+        self.assertFalse(Prediction.objects.exists())
+
+        mine = self._mine()
+        self.assertTrue(mine['exists'])
+        self.assertTrue(mine['prediction']['sync_pending'])
+        self.assertEqual(mine['prediction']['participation'], 70)
+        self.assertEqual(mine['prediction']['receipt'], js['receipt'])
+
+    def test_flush_coalesces_saves_per_email(self):
+        self._post(participation=70)
+        self._post(top3=['Fuerza Patria', 'LLA'])
+        self._post(username='Beto', email='beto@example.com')
+        self.assertEqual(submission_queue.pending_count(), 3)
+
+        stats = submission_queue.drain()
+        self.assertEqual(stats, {'submissions': 3, 'written': 2, 'failed': 0})
+        self.assertEqual(submission_queue.pending_count(), 0)
+        ana = Prediction.objects.get(email='ana@example.com')
+        # Campos del primer envío que el segundo no trae se conservan
+        self.assertEqual(ana.participation, 70)
+        self.assertEqual(ana.top3, ['Fuerza Patria', 'LLA'])
+        self.assertEqual(PlayerCounters.objects.get(pk=1).completed, 2)
+
+        mine = self._mine()
+        self.assertFalse(mine['prediction']['sync_pending'])
+        self.assertNotIn('receipt', mine['prediction'])
+
+    def test_pending_overlays_stored_prediction(self):
+        Prediction.objects.create(username='Ana', email='ana@example.com', top3=['LLA'], participation=60)
+        self._post(margin_1_2=5)
+        pred = self._mine()['prediction']
+        self.assertTrue(pred['sync_pending'])
+        self.assertEqual(pred['participation'], 60)
+        self.assertEqual(pred['margin_1_2'], 5)
+
+    def test_lease_keeps_a_single_drainer(self):
+        self._post()
+        with mock.patch.object(submission_queue.time, 'time', return_value=0):
+            conn = submission_queue._connect()
+            self.assertTrue(submission_queue._acquire_lease(conn, 'otro-proceso'))
+            self.assertEqual(submission_queue.flush()['submissions'], 0)
+        self.assertEqual(submission_queue.pending_count(), 1)
+
+    def test_exhausted_submissions_go_to_dead_letters_and_replay(self):
+        receipt = self._post().json()['receipt']
+        with mock.patch.object(submission_queue, 'upsert_prediction', side_effect=RuntimeError('boom')):
+            with self.assertLogs('prode.submission_queue', 'WARNING') as logs:
+                for _ in range(submission_queue.MAX_ATTEMPTS):
+                    submission_queue.flush()
+        self.assertEqual(submission_queue.pending_count(), 0)
+        self.assertFalse(any('ana@example.com' in line for line in logs.output))
+        [dead] = submission_queue.dead_letters()
+        self.assertEqual((dead['receipt'], dead['error']), (receipt, 'RuntimeError'))
+
+        call_command('flush_submissions', '--replay', stdout=io.StringIO())
+        self.assertEqual(submission_queue.dead_letters(), [])
+        self.assertEqual(Prediction.objects.get().email, 'ana@example.com')
+
+    def test_lease_is_renewed_during_a_slow_batch(self):
+        self._post()
+        self._post(email='beto@example.com')
+        clock = iter(range(0, 1000, 20))
+        conn = submission_queue._connect()
+        with mock.patch.object(submission_queue.time, 'monotonic', side_effect=lambda: next(clock)), \
+                mock.patch.object(submission_queue, '_renew_lease', wraps=submission_queue._renew_lease) as renew:
+            self.assertEqual(submission_queue.flush()['written'], 2)
+        self.assertEqual(renew.call_count, 2)
+        # Liberado al terminar
+        self.assertEqual(conn.execute('SELECT expires FROM lease').fetchone()[0], 0)
+
+    def test_lost_lease_rolls_back_the_batch(self):
+        self._post()
+        with mock.patch.object(submission_queue, '_renew_lease', side_effect=submission_queue.LeaseLost), \
+                mock.patch.object(submission_queue.time, 'monotonic', side_effect=[0, 100, 200]), \
+                self.assertLogs('prode.submission_queue', 'WARNING'):
+            self.assertEqual(submission_queue.flush()['written'], 0)
+        self.assertEqual(submission_queue.pending_count(), 1)
+        self.assertFalse(Prediction.objects.exists())
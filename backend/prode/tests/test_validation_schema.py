@@ -0,0 +1,57 @@
+import json
+import os
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from prode import validators
+
+
+class ValidationSchemaTests(SimpleTestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self._write('fuerzas', ['LLA', 'Fuerza Patria', 'Local'])
+        self._write('provincias', ['CABA', 'Chubut'])
+        self._write('fuerzas_por_provincia', {'CABA': ['LLA', 'Fuerza Patria']})
+        patcher = mock.patch.object(validators, '_static_path', lambda name: Path(self.tmp.name) / f'{name}.json')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self._reset()
+        self.addCleanup(self._reset)
+
+    def _reset(self):
+        validators._schema = None
+        validators._schema_checked_at = 0.0
+
+    def _write(self, name, data, mtime=None):
+        path = Path(self.tmp.name) / f'{name}.json'
+        path.write_text(json.dumps(data), encoding='utf-8')
+        if mtime is not None:
+            os.utime(path, ns=(mtime, mtime))
+
+    def test_schema_is_immutable_and_presorted(self):
+        schema = validators.get_schema()
+        self.assertIsInstance(schema.fuerzas, frozenset)
+        self.assertEqual(schema.fuerzas_sorted, ('Fuerza Patria', 'LLA', 'Local'))
+        with self.assertRaises(TypeError):
+            schema.fuerzas_por_provincia['Chubut'] = frozenset()
+        self.assertIs(validators.get_schema(), schema)
+
+    def test_per_province_table_with_global_fallback(self):
+        schema = validators.get_schema()
+        err = validators.validate_provinciales({'CABA': {'porcentajes': {'Local': 5}}}, schema.provincias, schema.fuerzas)
+        self.assertIn('CABA', err)
+        self.assertIsNone(validators.validate_provinciales({'Chubut': {'percentages': {'Local': 5}}}, schema.provincias, schema.fuerzas))
+
+    def test_reloads_when_static_files_change(self):
+        old = validators.get_schema()
+        self._write('fuerzas', ['LLA'], mtime=old.mtimes[0] + 10**9)
+        validators.reload_static()
+        new = validators.get_schema()
+        self.assertIsNot(new, old)
+        self.assertEqual(new.fuerzas, frozenset({'LLA'}))
+        # La referencia vieja sigue siendo coherente
+        self.assertIn('Local', old.fuerzas)
@@ -1,56 +1,148 @@
 import json
+import math
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional, Set, Dict
+from types import MappingProxyType
+from typing import Iterator, Optional, FrozenSet, Mapping, Tuple
 from prode_backend.settings import BASE_DIR
 
-_cache = {}
+STATIC_FILES = ('fuerzas', 'provincias', 'fuerzas_por_provincia')
+# Cada cuánto (segundos) se miran los mtime de los JSON para recargar el schema
+SCHEMA_CHECK_INTERVAL = 2.0
 
-def _load_json(name: str):
-    if name in _cache:
-        return _cache[name]
-    path = Path(BASE_DIR) / 'prode' / 'static' / f'{name}.json'
-    data = []
-    if path.exists():
-        data = json.loads(path.read_text(encoding='utf-8'))
-    _cache[name] = data
-    return data
 
-def get_fuerzas() -> Set[str]:
-    return set(_load_json('fuerzas'))
+@dataclass(frozen=True)
+class ValidationSchema:
+    """Reglas de validación compiladas a partir de los JSON estáticos.
 
-def get_provincias() -> Set[str]:
-    return set(_load_json('provincias'))
+    Inmutable: se reemplaza entero (asignación atómica) cuando cambian los
+    archivos, así que quien tenga una referencia siempre ve un estado coherente.
+    """
+    fuerzas: FrozenSet[str]
+    provincias: FrozenSet[str]
+    fuerzas_por_provincia: Mapping[str, FrozenSet[str]]
+    fuerzas_sorted: Tuple[str, ...]
+    provincias_sorted: Tuple[str, ...]
+    fuerzas_por_provincia_sorted: Mapping[str, Tuple[str, ...]]
+    mtimes: Tuple[int, ...]
+
+    def permitidas(self, prov: str, fuerzas: FrozenSet[str]) -> FrozenSet[str]:
+        return self.fuerzas_por_provincia.get(prov) or fuerzas
+
+
+_schema: Optional[ValidationSchema] = None
+_schema_checked_at = 0.0
+_schema_lock = threading.Lock()
+
+
+def _static_path(name: str) -> Path:
+    return Path(BASE_DIR) / 'prode' / 'static' / f'{name}.json'
+
+def _read_json(name: str):
+    path = _static_path(name)
+    if not path.exists():
+        return []
+    return json.loads(path.read_text(encoding='utf-8'))
+
+def static_mtimes() -> tuple:
+    """mtime de cada JSON estático (0 si no existe); sirve como versión."""
+    out = []
+    for name in STATIC_FILES:
+        try:
+            out.append(_static_path(name).stat().st_mtime_ns)
+        except OSError:
+            out.append(0)
+    return tuple(out)
+
+def _names(arr) -> FrozenSet[str]:
+    return frozenset(sys.intern(str(x)) for x in (arr or []))
 
-def get_fuerzas_por_provincia() -> Dict[str, Set[str]]:
-    """Devuelve un mapa {provincia -> set(fuerzas permitidas)}.
+def compile_schema() -> ValidationSchema:
+    mtimes = static_mtimes()
+    return build_schema(_read_json('fuerzas'), _read_json('provincias'), _read_json('fuerzas_por_provincia'), mtimes)
+
+def build_schema(fuerzas_raw, provincias_raw, fpp_raw, mtimes: Tuple[int, ...] = ()) -> ValidationSchema:
+    fuerzas = _names(fuerzas_raw)
+    provincias = _names(provincias_raw)
+    fpp = {}
+    if isinstance(fpp_raw, dict):
+        for prov, arr in fpp_raw.items():
+            try:
+                fpp[sys.intern(str(prov))] = _names(arr)
+            except Exception:
+                # Ignoramos filas inválidas para no romper validación
+                continue
+    return ValidationSchema(
+        fuerzas=fuerzas,
+        provincias=provincias,
+        fuerzas_por_provincia=MappingProxyType(fpp),
+        fuerzas_sorted=tuple(sorted(fuerzas)),
+        provincias_sorted=tuple(sorted(provincias)),
+        fuerzas_por_provincia_sorted=MappingProxyType({prov: tuple(sorted(v)) for prov, v in fpp.items()}),
+        mtimes=mtimes,
+    )
+
+def get_schema() -> ValidationSchema:
+    """Schema vigente; se recompila si algún JSON estático cambió de mtime."""
+    global _schema, _schema_checked_at
+    now = time.monotonic()
+    if _schema is not None and now - _schema_checked_at < SCHEMA_CHECK_INTERVAL:
+        return _schema
+    with _schema_lock:
+        if _schema is None or static_mtimes() != _schema.mtimes:
+            _schema = compile_schema()
+        _schema_checked_at = now
+        return _schema
+
+def reload_static() -> None:
+    """Fuerza recompilar el schema en el próximo acceso."""
+    global _schema_checked_at
+    with _schema_lock:
+        _schema_checked_at = 0.0
+
+@contextmanager
+def override_schema(schema: ValidationSchema) -> Iterator[ValidationSchema]:
+    """Usa `schema` en lugar de los JSON estáticos (benchmarks con datos sintéticos)."""
+    global _schema, _schema_checked_at
+    with _schema_lock:
+        saved = (_schema, _schema_checked_at)
+        _schema, _schema_checked_at = schema, math.inf
+    try:
+        yield schema
+    finally:
+        with _schema_lock:
+            _schema, _schema_checked_at = saved
+
+def get_fuerzas() -> FrozenSet[str]:
+    return get_schema().fuerzas
+
+def get_provincias() -> FrozenSet[str]:
+    return get_schema().provincias
+
+def get_fuerzas_por_provincia() -> Mapping[str, FrozenSet[str]]:
+    """Devuelve un mapa {provincia -> frozenset(fuerzas permitidas)}.
 
     Si el archivo no existe o está vacío, retorna {} y se usa el conjunto
     global de fuerzas como fallback.
     """
-    data = _load_json('fuerzas_por_provincia')
-    if not isinstance(data, dict):
-        return {}
-    out: Dict[str, Set[str]] = {}
-    for prov, arr in data.items():
-        try:
-            out[str(prov)] = set(arr or [])
-        except Exception:
-            # Ignoramos filas inválidas para no romper validación
-            continue
-    return out
+    return get_schema().fuerzas_por_provincia
 
-def validate_national_fuerzas(national: dict, fuerzas: Set[str]) -> Optional[str]:
+def validate_national_fuerzas(national: dict, fuerzas: FrozenSet[str]) -> Optional[str]:
     for k in national.keys():
         if k not in fuerzas:
             return f'Fuerza "{k}" inválida'
     return None
 
-def validate_provinciales(provinciales: dict, provincias: Set[str], fuerzas: Set[str]) -> Optional[str]:
+def validate_provinciales(provinciales: dict, provincias: FrozenSet[str], fuerzas: FrozenSet[str]) -> Optional[str]:
+    schema = get_schema()
     for prov, payload in provinciales.items():
         if prov not in provincias:
             return f'Provincia "{prov}" inválida'
-        fuerzas_por_prov = get_fuerzas_por_provincia()
-        permitidas = fuerzas_por_prov.get(prov) or fuerzas
+        permitidas = schema.permitidas(prov, fuerzas)
         porcentajes = payload.get('porcentajes') or payload.get('percentages') or {}
         for k in porcentajes.keys():
             if k not in permitidas:
@@ -60,7 +152,7 @@ def validate_provinciales(provinciales: dict, provincias: Set[str], fuerzas: Set
             return f'Ganador "{winner}" inválido en {prov}'
     return None
 
-def validate_top3(top3, fuerzas: Set[str]) -> Optional[str]:
+def validate_top3(top3, fuerzas: FrozenSet[str]) -> Optional[str]:
     if top3 is None:
         return None
     if not isinstance(top3, list):
@@ -76,7 +168,7 @@ def validate_top3(top3, fuerzas: Set[str]) -> Optional[str]:
             return f'Fuerza "{f}" inválida en Top-3'
     return None
 
-def validate_bonus(bonus: dict, provincias: Set[str]) -> Optional[str]:
+def validate_bonus(bonus: dict, provincias: FrozenSet[str]) -> Optional[str]:
     if not bonus:
         return None
     # All bonus fields in this MVP are province names when provided
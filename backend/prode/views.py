@@ -1,72 +1,114 @@
 import os
-from django.http import JsonResponse, HttpResponseForbidden
+import codecs
+import asyncio
+import logging
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.views import View
+from django.http import HttpResponse, HttpResponseForbidden
 from rest_framework.views import APIView
 from rest_framework.request import Request
-from .serializers import PredictionSerializer, OfficialResultsSerializer
-from .models import Prediction, OfficialResults
+from .serializers import PredictionSerializer, PredictionUpsertSerializer, OfficialResultsSerializer
+from .predictions import upsert_prediction
+from . import submission_queue
+from .players import InvalidCursor as PlayersInvalidCursor, aplayers_body, delete_predictions
+# JsonResponse que mide la codificación para ProfilingMiddleware
+from .profiling import TimedJsonResponse as JsonResponse, get_profile as get_request_profile, reset as reset_profiling, snapshot as profiling_snapshot, span
+from .metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, VALIDATION_FAILURES, render as render_metrics
+from .models import Prediction, OfficialResults, RankingEntry
+from .ranking import (
+    InvalidCursor,
+    aensure_ranking,
+    alatest_published_results,
+    aranking_page,
+    aranking_window,
+    ensure_ranking,
+    latest_published_results,
+    invalidate_ranking,
+    rescore_prediction,
+    entry_to_item,
+)
+from .response_cache import aconsensus_body, aresults_body, conditional_response, metadata_body, invalidate_results_cache
+from .publication import after_results_delta, after_results_published
+from .results_delta import DeltaError, apply_delta, snapshot_of
+from .events import broadcaster, build_results_event
+from .ingest import FORMATS as INGEST_FORMATS, ingest, iter_rows
+from .admin_stats import BUCKETS as ANALYTICS_BUCKETS, analytics as admin_analytics, overview as admin_overview
+from .exports import accepts_gzip, parse_extra_columns, ranking_csv_lines, encode_stream
 from prode_backend import settings as app_settings
 from .validators import (
-    get_fuerzas,
-    get_provincias,
-    get_fuerzas_por_provincia,
+    get_schema,
     validate_national_fuerzas,
     validate_provinciales,
     validate_top3,
     validate_bonus,
 )
 from django.utils import timezone
-from typing import Dict, Any, List
+from typing import Dict, Any
 from django.contrib.auth import authenticate, login as auth_login, logout as auth_logout
 from django.middleware.csrf import get_token
-from django.http import HttpResponse
+from django.http import StreamingHttpResponse
+from django.db import connection, transaction
 from django.db.models import Q
-import csv
+from django.utils.crypto import constant_time_compare
+from django.utils.decorators import method_decorator
+from django.views.decorators.csrf import csrf_exempt
 from django.core.management import call_command
 from django.core import signing
 from .auth import ADMIN_TOKEN_SALT, AdminBearerAuthentication
 from rest_framework.authentication import SessionAuthentication
 
+logger = logging.getLogger(__name__)
+
 MSG_WAIT_RESULTS = 'A la espera de resultados oficiales'
 MSG_STAFF_ONLY = 'Solo staff'
 MSG_NOT_FOUND = 'No encontrado'
 
+# Cache-Control max-age (segundos) para navegador/CDN; la revalidación usa ETag
+RESULTS_MAX_AGE = 10
+METADATA_MAX_AGE = 300
+CONSENSUS_MAX_AGE = 10
+
+# /api/players: usernames por página
+PLAYERS_PAGE_SIZE = 200
+PLAYERS_MAX_PAGE_SIZE = 1000
+
 
 class MetadataView(APIView):
     def get(self, request: Request):
-        # Convertimos el mapa de sets a listas serializables
-        fpp_raw = get_fuerzas_por_provincia()
-        fpp = {prov: sorted(vals) for prov, vals in fpp_raw.items()}
-        return JsonResponse({
-            'fuerzas': sorted(get_fuerzas()),
-            'provincias': sorted(get_provincias()),
-            'fuerzas_por_provincia': fpp,
-            'deadline': app_settings.DEADLINE,
-        })
+        # Cuerpo cacheado por mtime de los JSON estáticos; 304 si el ETag coincide
+        return conditional_response(request, metadata_body(), max_age=METADATA_MAX_AGE)
 
 
-class PredictionMineView(APIView):
-    def get(self, request: Request):
+class PredictionMineView(View):
+    async def get(self, request):
         email = request.GET.get('email')
         if not email:
             return JsonResponse({'detail': 'email requerido'}, status=400)
         email = email.strip().lower()
         soft = request.GET.get('soft')
-        # Evitar 500 por duplicados: tomamos el último por updated_at
+        # Email único y normalizado; el índice (email, updated_at) cubre la consulta
         try:
-            p = (
-                Prediction.objects.filter(email=email)
-                .order_by('-updated_at')
-                .first()
-            )
-        except Exception as e:
-            # Log simple para Render
-            print(f"PredictionMineView error querying email={email}: {type(e).__name__}: {e}")
+            p = await Prediction.objects.filter(email=email).order_by('-updated_at').afirst()
+        except Exception:
+            logger.exception("PredictionMineView error querying the prediction")
             p = None
-        if not p:
+        # Envíos aceptados por la cola write-behind que el worker todavía no escribió
+        pending = None
+        if app_settings.WRITE_BEHIND:
+            # Lectura de la cola SQLite local: en un hilo del pool, sin tomar el hilo del ORM
+            pending = await sync_to_async(submission_queue.pending_for, thread_sensitive=False)(email)
+        if not p and not pending:
             if soft:
                 return JsonResponse({'exists': False, 'prediction': None})
             return JsonResponse({'detail': 'no encontrado'}, status=404)
-        data = PredictionSerializer(p).data
+        with span('serialize'):
+            data = PredictionSerializer(p or Prediction(email=email)).data
+        if pending:
+            data.update(pending['values'])
+            data['updated_at'] = pending['received_at']
+            data['sync_pending'] = True
+            data['receipt'] = pending['receipt']
         if soft:
             return JsonResponse({'exists': True, 'prediction': data})
         return JsonResponse(data)
@@ -87,50 +129,59 @@ class PredictionUpsertView(APIView):
         if data.get('bonus') is None:
             data['bonus'] = {}
 
-        fuerzas = get_fuerzas()
-        provincias = get_provincias()
+        schema = get_schema()
+        fuerzas = schema.fuerzas
+        provincias = schema.provincias
 
         err = validate_national_fuerzas(data.get('national_percentages') or {}, fuerzas)
         if err:
-            return JsonResponse({'national_percentages': err}, status=400)
+            return _validation_failed({'national_percentages': err})
 
         err = validate_provinciales(data.get('provinciales') or {}, provincias, fuerzas)
         if err:
-            return JsonResponse({'provinciales': err}, status=400)
+            return _validation_failed({'provinciales': err})
 
         err = validate_top3(data.get('top3'), fuerzas)
         if err:
-            return JsonResponse({'top3': err}, status=400)
+            return _validation_failed({'top3': err})
 
         err = validate_bonus(data.get('bonus') or {}, provincias)
         if err:
-            return JsonResponse({'bonus': err}, status=400)
-
-        # Evitar 500 si hay duplicados históricos del mismo email: tomar el último actualizado
-        inst = (
-            Prediction.objects.filter(email=data.get('email'))
-            .order_by('-updated_at')
-            .first()
-        )
-        if inst is not None:
-            serializer = PredictionSerializer(inst, data=data, partial=True)
-        else:
-            serializer = PredictionSerializer(data=data)
+            return _validation_failed({'bonus': err})
 
+        # Upsert por email en un solo viaje (INSERT … ON CONFLICT); los campos
+        # ausentes en el payload conservan su valor si el pronóstico ya existía
+        serializer = PredictionUpsertSerializer(data=data)
         if serializer.is_valid():
-            obj = serializer.save()
-            return JsonResponse(PredictionSerializer(obj).data, status=201)
-        return JsonResponse(serializer.errors, status=400)
+            if app_settings.WRITE_BEHIND:
+                return _accept_write_behind(serializer.validated_data)
+            obj = upsert_prediction(serializer.validated_data)
+            with span('serialize'):
+                data = PredictionSerializer(obj).data
+            return JsonResponse(data, status=201)
+        return _validation_failed(serializer.errors)
 
 
-class HealthView(APIView):
-    authentication_classes = []
-    permission_classes = []
+def _accept_write_behind(values: Dict[str, Any]):
+    """202 con recibo: el envío quedó en la cola y se escribe en el próximo lote."""
+    ticket = submission_queue.enqueue(values)
+    data = dict(values)
+    data.update(updated_at=ticket['received_at'], sync_pending=True, receipt=ticket['receipt'])
+    return JsonResponse(data, status=202)
 
-    def get(self, request: Request):
-        # Minimal health: app up, db reachable
+
+def _validation_failed(errors: Dict[str, Any]):
+    """400 de `/api/predictions`, contando el motivo (campo) para `/api/metrics`."""
+    for field in errors:
+        VALIDATION_FAILURES.inc(field)
+    return JsonResponse(errors, status=400)
+
+
+class HealthView(View):
+    async def get(self, request):
+        # Minimal health: app up, db reachable (SELECT 1: no recorre ninguna tabla)
         try:
-            _ = Prediction.objects.count()
+            await sync_to_async(_ping_db)()
             db = 'ok'
         except Exception as e:
             db = f'error: {type(e).__name__}'
@@ -141,82 +192,79 @@ class HealthView(APIView):
         })
 
 
-class PlayersView(APIView):
+def _ping_db() -> None:
+    # El ORM async no expone cursores: el SELECT 1 corre en el hilo de la base
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1')
+        cursor.fetchone()
+
+
+class MetricsView(APIView):
+    """Métricas en formato de exposición de Prometheus (de este proceso).
+
+    Si `METRICS_TOKEN` está configurado se exige `Authorization: Bearer <token>`.
+    """
+    authentication_classes = []
+    permission_classes = []
+
     def get(self, request: Request):
+        token = app_settings.METRICS_TOKEN
+        if token:
+            header = request.headers.get('Authorization') or ''
+            if not constant_time_compare(header, f'Bearer {token}'):
+                return HttpResponseForbidden('Token de métricas inválido')
+        return HttpResponse(render_metrics(), content_type=METRICS_CONTENT_TYPE)
+
+
+class PlayersView(View):
+    """Contadores + una página (keyset por username) de quienes completaron.
+
+    Query params: `limit` (default 200, máx 1000) y `cursor` (`next_cursor` de la página anterior).
+    """
+
+    async def get(self, request):
+        limit = _int_param(request.GET.get('limit'), default=PLAYERS_PAGE_SIZE, lo=1, hi=PLAYERS_MAX_PAGE_SIZE)
         try:
-            names = _compute_completed_usernames()
-            total = Prediction.objects.count()
-            return JsonResponse({'count_completed': len(names), 'usernames': names, 'count_total': total})
-        except Exception as e:
-            print(f"PlayersView failed: {type(e).__name__}: {e}")
-            total = _safe_count_predictions()
-            return JsonResponse({'count_completed': 0, 'usernames': [], 'count_total': total})
+            return JsonResponse(await aplayers_body(limit, request.GET.get('cursor') or None))
+        except PlayersInvalidCursor:
+            return JsonResponse({'detail': 'cursor inválido'}, status=400)
+        except Exception:
+            logger.exception("PlayersView failed")
+            return JsonResponse({'count_completed': 0, 'usernames': [], 'count_total': 0, 'next_cursor': None})
 
 
-def _safe_count_predictions() -> int:
-    try:
-        return Prediction.objects.count()
-    except Exception:
-        return 0
+class ConsensusView(View):
+    """Consenso de los jugadores: media, desvío y cantidad por fuerza, nacional y por provincia.
 
+    Sale de `ConsensusStat` (sumas corrientes), no de recorrer pronósticos.
+    """
 
-def _compute_completed_usernames() -> List[str]:
-    """Criterio MVP: usuario completó Top-3 o algún dato relevante."""
-    names: List[str] = []
-    qs = Prediction.objects.order_by('-updated_at').only('username','top3','national_percentages','provinciales')
-    for p in qs.iterator():
+    async def get(self, request):
         try:
-            if not p.username:
-                continue
-            t3 = p.top3 or []
-            nat = p.national_percentages or {}
-            prov = p.provinciales or {}
-            nat_sum = 0.0
-            try:
-                nat_values = getattr(nat, 'values', lambda: [])()
-                nat_sum = sum(float(v) for v in nat_values) if nat else 0.0
-            except Exception:
-                nat_sum = 0.0
-            if (len(t3) > 0) or (nat_sum > 0) or (bool(prov)):
-                names.append(p.username)
-        except Exception as row_err:
-            print(f"PlayersView row error id={getattr(p, 'id', None)}: {type(row_err).__name__}: {row_err}")
-            continue
-    return names
-
-
-class OfficialResultsView(APIView):
-    # Acepta token Bearer o sesión para POST (GET es público)
-    authentication_classes = [AdminBearerAuthentication, SessionAuthentication]
+            return conditional_response(request, await aconsensus_body(), max_age=CONSENSUS_MAX_AGE)
+        except Exception:
+            logger.exception("ConsensusView failed")
+            return JsonResponse({'national': {}, 'provinces': {}})
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class OfficialResultsView(View):
     """
-    GET: público, devuelve el último resultado oficial publicado.
-    POST: solo staff, crea una nueva publicación de resultados.
+    GET: público (async), devuelve el último resultado oficial publicado.
+    POST/PATCH: solo staff, los atiende `OfficialResultsWriteView` (DRF, sync).
+    La exención de CSRF es la misma que da DRF: `SessionAuthentication` lo
+    exige para las sesiones.
     """
 
-    def get(self, request: Request):
+    async def get(self, request):
         """Devuelve 200 siempre; si no hay resultados publicados, responde
         un payload vacío para evitar errores en consola del browser.
         """
         try:
-            obj = (
-                OfficialResults.objects.filter(is_published=True)
-                .order_by('-published_at', '-created_at')
-                .first()
-            )
-            if not obj:
-                return JsonResponse({
-                    'national_percentages': {},
-                    'participation': None,
-                    'margin_1_2': None,
-                    'blanco_nulo_impugnado': None,
-                    'total_votes': None,
-                    'provinciales': {},
-                    'detail': MSG_WAIT_RESULTS,
-                })
-            return JsonResponse(OfficialResultsSerializer(obj).data)
-        except Exception as e:
+            return conditional_response(request, await aresults_body(MSG_WAIT_RESULTS), max_age=RESULTS_MAX_AGE)
+        except Exception:
             # En producción preferimos respuesta controlada sin stacktrace
-            print(f"OfficialResultsView get failed: {type(e).__name__}: {e}")
+            logger.exception("OfficialResultsView get failed")
             return JsonResponse({
                 'national_percentages': {},
                 'participation': None,
@@ -227,6 +275,22 @@ class OfficialResultsView(APIView):
                 'detail': MSG_WAIT_RESULTS,
             })
 
+    async def post(self, request, *args, **kwargs):
+        return await _results_write_view(request, *args, **kwargs)
+
+    async def patch(self, request, *args, **kwargs):
+        return await _results_write_view(request, *args, **kwargs)
+
+
+class OfficialResultsWriteView(APIView):
+    # Acepta token Bearer o sesión
+    authentication_classes = [AdminBearerAuthentication, SessionAuthentication]
+    """
+    POST: solo staff, crea una nueva publicación de resultados.
+    PATCH: solo staff, escrutinio parcial: aplica un delta sobre la versión
+    vigente (o `base`) y publica el snapshot consolidado como versión nueva.
+    """
+
     def post(self, request: Request):
         # Requiere staff (vía token o sesión)
         if not _is_staff(request):
@@ -241,42 +305,166 @@ class OfficialResultsView(APIView):
                 obj.published_at = timezone.now()
                 obj.save(update_fields=['published_at'])
 
-            # Nota: aquí podría gatillarse el proceso de scoring y la sincronización con Sheets.
+            # Scoring: se materializa el ranking una sola vez por publicación
+            if obj.is_published:
+                after_results_published(obj)
             return JsonResponse(OfficialResultsSerializer(obj).data, status=201)
         return JsonResponse(serializer.errors, status=400)
 
+    def patch(self, request: Request):
+        if not _is_staff(request):
+            return HttpResponseForbidden(MSG_STAFF_ONLY)
+
+        delta = dict(request.data)
+        base_id = delta.pop('base', None)
+        if base_id is None:
+            latest = latest_published_results()
+            base_id = latest.id if latest is not None else None
+
+        with transaction.atomic():
+            # Lock de la versión base hasta guardar la nueva: dos PATCH simultáneos
+            # sobre la misma base no pueden pasar ambos el chequeo de abajo
+            base = OfficialResults.objects.select_for_update().filter(id=base_id).first() if base_id else None
+            if base is None:
+                return JsonResponse({'detail': MSG_NOT_FOUND}, status=404)
+            if base.children.exists():
+                # Otro parcial ya se cargó sobre esta versión: evitamos pisarlo
+                return JsonResponse({'detail': 'La versión base ya fue reemplazada; recargá y reintentá'}, status=409)
+
+            try:
+                merged, change = apply_delta(snapshot_of(base), delta)
+            except DeltaError as e:
+                return JsonResponse({'detail': str(e)}, status=400)
+            if not change.fields:
+                return JsonResponse(dict(OfficialResultsSerializer(base).data, changes=change.as_dict()))
+
+            serializer = OfficialResultsSerializer(data=dict(merged, is_published=base.is_published))
+            if not serializer.is_valid():
+                return JsonResponse(serializer.errors, status=400)
+            obj = serializer.save(
+                parent=base,
+                version=base.version + 1,
+                delta=delta,
+                published_at=timezone.now() if base.is_published else None,
+            )
+        if obj.is_published:
+            after_results_delta(base, obj, change)
+        return JsonResponse(dict(OfficialResultsSerializer(obj).data, changes=change.as_dict()), status=201)
+
+
+_results_write_view = sync_to_async(OfficialResultsWriteView.as_view())
 
-class RankingView(APIView):
-    """Ranking público calculado on-the-fly a partir del último resultado publicado.
+
+class ResultsEventsView(View):
+    """Stream SSE (`text/event-stream`) con cada publicación de resultados.
+
+    Evento `results`: {id, version, published_at, top, diff}. Al conectar se envía
+    el estado vigente si difiere de `Last-Event-ID`. Solo funciona bajo ASGI;
+    con WSGI responde 503 para no bloquear un worker por conexión.
+    """
+
+    async def get(self, request):
+        if not isinstance(request, ASGIRequest):
+            return JsonResponse({'detail': 'SSE requiere servidor ASGI'}, status=503)
+
+        q = broadcaster.subscribe()
+        current = broadcaster.last_message
+        if current is None:
+            payload = await sync_to_async(build_results_event)()
+            current = payload[1] if payload else None
+        last_seen = request.headers.get('Last-Event-ID')
+
+        async def stream():
+            try:
+                yield f'retry: {app_settings.SSE_POLL_SECONDS * 1000}\n\n'
+                if current and not (last_seen and current.startswith(f'id: {last_seen}\n')):
+                    yield current
+                while True:
+                    try:
+                        message = await asyncio.wait_for(q.get(), timeout=app_settings.SSE_HEARTBEAT_SECONDS)
+                    except asyncio.TimeoutError:
+                        yield ': ping\n\n'
+                        continue
+                    yield message
+            finally:
+                broadcaster.unsubscribe(q)
+
+        resp = StreamingHttpResponse(stream(), content_type='text/event-stream')
+        resp['Cache-Control'] = 'no-cache'
+        resp['X-Accel-Buffering'] = 'no'
+        return resp
+
+
+class RankingView(View):
+    """Ranking público leído de la tabla materializada del último resultado publicado.
 
     Params:
-      - q: filtro por nombre o email (icontains)
+      - q: filtro por nombre o email (icontains); la posición sigue siendo la global
+      - limit: tamaño de página (máx 200); sin limit se devuelve el ranking completo
+      - cursor: `next_cursor` de la página anterior (keyset, no offset)
+      - email: devuelve la posición de ese email y una ventana de vecinos
+      - window: vecinos arriba/abajo para `email` (default 5, máx 50)
+      - compact: 1 para omitir email y breakdown de cada fila
     """
 
-    def get(self, request: Request):
+    async def get(self, request):
         """Devuelve 200 siempre. Si no hay resultados publicados, responde una
         estructura vacía para evitar errores visibles en consola del browser.
         """
         try:
-            res = (
-                OfficialResults.objects.filter(is_published=True)
-                .order_by('-published_at', '-created_at')
-                .first()
-            )
+            res = await alatest_published_results()
             if not res:
                 return _empty_ranking_response()
-            q = (request.GET.get('q') or '').strip()
-            items = _compute_ranking_items(res, q)
-            return JsonResponse({
-                'count': len(items),
+            await aensure_ranking(res)
+            compact = bool(request.GET.get('compact'))
+            payload = {
                 'generated_at': timezone.now().isoformat(),
-                'results': items,
-            })
-        except Exception as e:
-            print(f"RankingView failed: {type(e).__name__}: {e}")
+                'results_version': res.id,
+            }
+
+            email = (request.GET.get('email') or '').strip().lower()
+            if email:
+                radius = _int_param(request.GET.get('window'), default=5, lo=0, hi=50)
+                me, window = await aranking_window(res, email, radius)
+                with span('serialize'):
+                    items = [entry_to_item(e, compact) for e in window]
+                payload.update({
+                    'count': len(items),
+                    'me': entry_to_item(me, compact) if me else None,
+                    'results': items,
+                })
+                return JsonResponse(payload)
+
+            q = (request.GET.get('q') or '').strip()
+            qs = RankingEntry.objects.filter(results=res)
+            if q:
+                qs = qs.filter(Q(username__icontains=q) | Q(email__icontains=q))
+
+            if request.GET.get('limit') or request.GET.get('cursor'):
+                limit = _int_param(request.GET.get('limit'), default=50, lo=1, hi=200)
+                try:
+                    entries, next_cursor = await aranking_page(qs, limit, request.GET.get('cursor'))
+                except InvalidCursor:
+                    return JsonResponse({'detail': 'cursor inválido'}, status=400)
+                payload['next_cursor'] = next_cursor
+            else:
+                entries = [e async for e in qs.order_by('position')]
+            with span('serialize'):
+                items = [entry_to_item(e, compact) for e in entries]
+            payload.update({'count': len(items), 'results': items})
+            return JsonResponse(payload)
+        except Exception:
+            logger.exception("RankingView failed")
             return _empty_ranking_response()
 
 
+def _int_param(raw: Any, *, default: int, lo: int, hi: int) -> int:
+    try:
+        return min(max(int(raw), lo), hi)
+    except (TypeError, ValueError):
+        return default
+
+
 def _empty_ranking_response():
     return JsonResponse({
         'count': 0,
@@ -286,101 +474,6 @@ def _empty_ranking_response():
     })
 
 
-def _compute_ranking_items(res: OfficialResults, q: str) -> List[Dict[str, Any]]:
-    qs = Prediction.objects.all().only('username','email','top3','national_percentages','participation','margin_1_2','updated_at')
-    if q:
-        qs = qs.filter(Q(username__icontains=q) | Q(email__icontains=q))
-    items: List[Dict[str, Any]] = []
-    for p in qs.iterator():
-        try:
-            scored = _score_prediction(p, res)
-            items.append({
-                'username': p.username,
-                'email': p.email,
-                'score': scored['score'],
-                'bonus': scored['bonus'],
-                'medals': scored['medals'],
-                'breakdown': scored['breakdown'],
-                'submitted_at': p.updated_at.isoformat(),
-            })
-        except Exception as row_err:
-            print(f"RankingView row error id={getattr(p, 'id', None)}: {type(row_err).__name__}: {row_err}")
-            continue
-    items.sort(key=lambda x: (-x['score'], x['submitted_at']))
-    for idx, it in enumerate(items, start=1):
-        it['position'] = idx
-    return items
-
-
-def _score_prediction(p: Prediction, res: OfficialResults) -> Dict[str, Any]:
-    nat_real = res.national_percentages or {}
-    mae_nat = _mae_national(p, nat_real)
-    part_err = _abs_error(p.participation, res.participation)
-    margin_err = _abs_error(p.margin_1_2, res.margin_1_2)
-    top3_points = _top3_points(p.top3 or [], nat_real)
-    top3_err = 30.0 - top3_points
-
-    err = (mae_nat * 0.5) + (part_err * 0.25) + (margin_err * 0.25) + (top3_err * (2.0/3.0))
-    score = round(max(0.0, 100.0 - err), 2)
-
-    return {
-        'score': score,
-        'bonus': 0,
-        'medals': [],
-        'breakdown': {
-            'mae_national': round(mae_nat, 2),
-            'participation_error': round(part_err, 2),
-            'margin_error': round(margin_err, 2),
-            'top3_points': round(top3_points, 2),
-        }
-    }
-
-
-def _mae_national(p: Prediction, nat_real: Dict[str, Any]) -> float:
-    forces = list(nat_real.keys())
-    if not forces:
-        return 0.0
-    abs_sum = 0.0
-    preds = p.national_percentages or {}
-    for f in forces:
-        pred_v = _to_float_or_zero(preds.get(f, 0))
-        real_v = _to_float_or_zero(nat_real.get(f, 0))
-        abs_sum += abs(pred_v - real_v)
-    return abs_sum / len(forces)
-
-
-def _to_float_or_zero(x: Any) -> float:
-    try:
-        return float(x or 0)
-    except Exception:
-        return 0.0
-
-
-def _abs_error(pred: Any, real: Any) -> float:
-    try:
-        r = float(real)
-    except Exception:
-        return 0.0
-    try:
-        p = float(pred)
-    except Exception:
-        p = 100.0
-    return abs(p - r)
-
-
-def _top3_points(predicted_top3: List[str], nat_real: Dict[str, Any]) -> float:
-    official_sorted = sorted(nat_real.items(), key=lambda kv: _to_float_or_zero(kv[1]), reverse=True)
-    official_top3 = [k for k, _ in official_sorted[:3]]
-    points = 0.0
-    for i in range(min(3, len(predicted_top3))):
-        f = predicted_top3[i]
-        if i < len(official_top3) and f == official_top3[i]:
-            points += 10.0
-        elif f in official_top3:
-            points += 5.0
-    return points
-
-
 class AdminCsrfView(APIView):
     authentication_classes = []
     permission_classes = []
@@ -413,6 +506,9 @@ class AdminLoginView(APIView):
 
 
 class AdminLogoutView(APIView):
+    # El logout revoca los tokens Bearer emitidos hasta ahora (señal user_logged_out, auth.py)
+    authentication_classes = [AdminBearerAuthentication, SessionAuthentication]
+
     def post(self, request: Request):
         auth_logout(request)
         return JsonResponse({'ok': True})
@@ -452,22 +548,54 @@ class AdminOverviewView(APIView):
         if not _is_staff(request):
             return HttpResponseForbidden(MSG_STAFF_ONLY)
 
-        res = (
-            OfficialResults.objects.filter(is_published=True)
-            .order_by('-published_at', '-created_at')
-            .first()
-        )
-        predictions = Prediction.objects.count()
-        completed = Prediction.objects.exclude(username='').count()
-        overview = {
-            'deadline': app_settings.DEADLINE,
-            'after_deadline': app_settings.is_after_deadline(),
-            'predictions_total': predictions,
-            'predictions_completed': completed,
-            'results_published': bool(res),
-            'results_published_at': res.published_at.isoformat() if res and res.published_at else None,
-        }
-        return JsonResponse(overview)
+        # Un aggregate condicional cacheado unos segundos (admin_stats.py)
+        return JsonResponse(admin_overview())
+
+
+class AdminAnalyticsView(APIView):
+    """Ritmo de envíos y distribución de los pronósticos nacionales (solo staff).
+
+    Query params: `bucket` (`minute` | `hour`), `span` (cantidad de buckets
+    hasta ahora; default 120 minutos / 48 horas) y `bins` (tramos del histograma).
+    """
+    authentication_classes = [AdminBearerAuthentication, SessionAuthentication]
+
+    def get(self, request: Request):
+        if not _is_staff(request):
+            return HttpResponseForbidden(MSG_STAFF_ONLY)
+        bucket = request.GET.get('bucket') or 'minute'
+        if bucket not in ANALYTICS_BUCKETS:
+            return JsonResponse({'detail': f"bucket debe ser uno de {sorted(ANALYTICS_BUCKETS)}"}, status=400)
+        span = _int_param(request.GET.get('span'), default=0, lo=0, hi=ANALYTICS_BUCKETS[bucket][3]) or None
+        bins = _int_param(request.GET.get('bins'), default=10, lo=1, hi=100)
+        return JsonResponse(admin_analytics(bucket, span, bins))
+
+
+class AdminProfilingView(APIView):
+    """Histogramas por vista de `ProfilingMiddleware` (este proceso; requiere PROFILING_ENABLED=1).
+
+    GET: histogramas de tiempo total, DB, serialización, queries y tamaño, más la
+    lista de cProfile guardados; `?profile=<id>` devuelve ese volcado.
+    DELETE: reinicia histogramas y volcados.
+    """
+    authentication_classes = [AdminBearerAuthentication, SessionAuthentication]
+
+    def get(self, request: Request):
+        if not _is_staff(request):
+            return HttpResponseForbidden(MSG_STAFF_ONLY)
+        pid = request.GET.get('profile')
+        if pid:
+            profile = get_request_profile(pid)
+            if profile is None:
+                return JsonResponse({'detail': MSG_NOT_FOUND}, status=404)
+            return JsonResponse(profile)
+        return JsonResponse(dict(profiling_snapshot(), enabled=app_settings.PROFILING_ENABLED))
+
+    def delete(self, request: Request):
+        if not _is_staff(request):
+            return HttpResponseForbidden(MSG_STAFF_ONLY)
+        reset_profiling()
+        return JsonResponse({'ok': True})
 
 
 class AdminReprocessView(APIView):
@@ -475,43 +603,40 @@ class AdminReprocessView(APIView):
     def post(self, request: Request):
         if not _is_staff(request):
             return HttpResponseForbidden(MSG_STAFF_ONLY)
-        # En este MVP el ranking se calcula on-the-fly; devolvemos un resumen
-        count = Prediction.objects.count()
-        return JsonResponse({'reprocessed': True, 'predictions_count': count, 'at': timezone.now().isoformat()})
+        res = latest_published_results()
+        if not res:
+            return JsonResponse({'detail': MSG_WAIT_RESULTS}, status=404)
+        count = after_results_published(res)
+        return JsonResponse({'reprocessed': True, 'predictions_count': count, 'results_version': res.id, 'at': timezone.now().isoformat()})
 
 
 class AdminExportRankingCsvView(APIView):
+    """Export del ranking en CSV por streaming (lee el ranking materializado en bloques).
+
+    GET params:
+      - extra: columnas adicionales separadas por coma (`breakdown` o claves sueltas)
+      - gzip: 1 para comprimir; también se comprime si el cliente acepta gzip
+    """
     authentication_classes = [AdminBearerAuthentication, SessionAuthentication]
     def get(self, request: Request):
         if not _is_staff(request):
             return HttpResponseForbidden('Solo staff')
 
-        res = (
-            OfficialResults.objects.filter(is_published=True)
-            .order_by('-published_at', '-created_at')
-            .first()
-        )
+        res = latest_published_results()
         if not res:
             return JsonResponse({'detail': MSG_WAIT_RESULTS}, status=404)
+        ensure_ranking(res)
 
-        rows = []
-        for p in Prediction.objects.all().only('username','email','top3','national_percentages','participation','margin_1_2','updated_at'):
-            s = _score_prediction(p, res)
-            rows.append({
-                'username': p.username,
-                'email': p.email,
-                'score': s['score'],
-                'bonus': s['bonus'],
-                'submitted_at': p.updated_at.isoformat(),
-            })
-        rows.sort(key=lambda x: (-x['score'], x['submitted_at']))
-        # Construir CSV
-        response = HttpResponse(content_type='text/csv')
+        extra = parse_extra_columns(request.GET.get('extra') or '')
+        use_gzip = bool(request.GET.get('gzip')) or accepts_gzip(request.headers.get('Accept-Encoding') or '')
+        response = StreamingHttpResponse(
+            encode_stream(ranking_csv_lines(res, extra), gzip=use_gzip),
+            content_type='text/csv; charset=utf-8',
+        )
         response['Content-Disposition'] = 'attachment; filename="ranking.csv"'
-        writer = csv.writer(response)
-        writer.writerow(['posicion','usuario','email','puntaje','bonus','enviado'])
-        for i, r in enumerate(rows, start=1):
-            writer.writerow([i, r['username'], r['email'], r['score'], r['bonus'], r['submitted_at']])
+        response['Vary'] = 'Accept-Encoding'
+        if use_gzip:
+            response['Content-Encoding'] = 'gzip'
         return response
 
 
@@ -555,6 +680,9 @@ class AdminPurgeTestDataView(APIView):
                 stdout=type('ListWriter', (), {'write': lambda self, s: buf.append(str(s))})(),
             )
             out = ''.join(buf)
+            if not dry:
+                invalidate_results_cache()
+                invalidate_ranking()
             return JsonResponse({'ok': True, 'dry_run': dry, 'include_official': include_official, 'purge_all_official': purge_all_official, 'output': out})
         except Exception as e:
             return JsonResponse({'ok': False, 'detail': f'Error en purge: {type(e).__name__}: {e}'}, status=500)
@@ -601,14 +729,55 @@ class AdminPredictionsView(APIView):
         if not isinstance(ids, list) or not ids:
             return JsonResponse({'detail': 'ids requerido (lista)'}, status=400)
         try:
-            n, _ = Prediction.objects.filter(id__in=ids).delete()
+            n = delete_predictions(Prediction.objects.filter(id__in=ids))
+            invalidate_ranking()
             return JsonResponse({'deleted': n})
         except Exception as e:
             return JsonResponse({'detail': f'No se pudo eliminar: {type(e).__name__}: {e}'}, status=400)
 
 
+class AdminPredictionsImportView(APIView):
+    """Carga masiva de pronósticos para staff (upsert por email, en lotes).
+
+    POST:
+      - multipart con `file`, o el archivo como cuerpo crudo
+      - file_format: csv | jsonl (query param; default según extensión o content-type, si no jsonl)
+      - dry_run: 1 para validar sin escribir
+    Responde un reporte con filas creadas/actualizadas y errores por línea.
+    """
+    authentication_classes = [AdminBearerAuthentication, SessionAuthentication]
+
+    def post(self, request: Request):
+        if not _is_staff(request):
+            return HttpResponseForbidden(MSG_STAFF_ONLY)
+        upload = request.FILES.get('file') if _is_multipart(request) else None
+        fmt = (request.GET.get('file_format') or '').strip().lower()
+        if not fmt:
+            name = getattr(upload, 'name', '') or ''
+            fmt = 'csv' if name.lower().endswith('.csv') or 'csv' in (request.content_type or '') else 'jsonl'
+        if fmt not in INGEST_FORMATS:
+            return JsonResponse({'detail': f'file_format debe ser uno de {", ".join(INGEST_FORMATS)}'}, status=400)
+        # Se decodifica línea a línea: ni el upload ni el cuerpo se cargan enteros
+        raw = upload if upload is not None else request._request
+        stream = codecs.iterdecode(raw, 'utf-8')
+        dry = bool(request.GET.get('dry_run'))
+        try:
+            report = ingest(iter_rows(stream, fmt), dry_run=dry)
+        except Exception as e:
+            return JsonResponse({'detail': f'Error en import: {type(e).__name__}: {e}'}, status=400)
+        return JsonResponse(dict(report.as_dict(), dry_run=dry))
+
+
+def _is_multipart(request: Request) -> bool:
+    return (request.content_type or '').startswith('multipart/')
+
+
 class AdminOfficialResultsView(APIView):
-    """Listado y borrado de resultados oficiales. Solo se puede borrar drafts."""
+    """Listado, publicación y borrado de resultados oficiales. Solo se puede borrar drafts.
+
+    POST body JSON:
+      - id: resultado a publicar o republicar (recalcula el ranking materializado)
+    """
     authentication_classes = [AdminBearerAuthentication, SessionAuthentication]
     def get(self, request: Request):
         if not _is_staff(request):
@@ -624,6 +793,23 @@ class AdminOfficialResultsView(APIView):
             })
         return JsonResponse({'results': rows, 'count': len(rows)})
 
+    def post(self, request: Request):
+        if not _is_staff(request):
+            return HttpResponseForbidden(MSG_STAFF_ONLY)
+        rid = request.data.get('id') if isinstance(request.data, dict) else None
+        if not rid:
+            return JsonResponse({'detail': 'id requerido'}, status=400)
+        try:
+            obj = OfficialResults.objects.get(id=rid)
+        except (OfficialResults.DoesNotExist, ValueError):
+            return JsonResponse({'detail': MSG_NOT_FOUND}, status=404)
+        # Cada publicación (o republicación) fija un instante nuevo: es la versión del evento SSE
+        obj.is_published = True
+        obj.published_at = timezone.now()
+        obj.save(update_fields=['is_published', 'published_at', 'updated_at'])
+        count = after_results_published(obj)
+        return JsonResponse({'id': obj.id, 'published_at': obj.published_at.isoformat(), 'ranking_count': count})
+
     def delete(self, request: Request):
         if not _is_staff(request):
             return HttpResponseForbidden(MSG_STAFF_ONLY)
@@ -635,6 +821,7 @@ class AdminOfficialResultsView(APIView):
             if obj.is_published:
                 return JsonResponse({'detail': 'No se puede borrar un resultado publicado'}, status=400)
             obj.delete()
+            invalidate_results_cache()
             return JsonResponse({'deleted': 1})
         except OfficialResults.DoesNotExist:
             return JsonResponse({'detail': MSG_NOT_FOUND}, status=404)
@@ -677,5 +864,9 @@ class AdminPredictionDetailView(APIView):
         serializer = PredictionSerializer(obj, data=data, partial=True)
         if serializer.is_valid():
             saved = serializer.save()
+            res = latest_published_results()
+            if res is not None:
+                # Corrección puntual: se reubica solo esta fila del ranking
+                rescore_prediction(res, saved)
             return JsonResponse(PredictionSerializer(saved).data)
         return JsonResponse(serializer.errors, status=400)
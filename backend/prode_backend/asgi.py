@@ -2,4 +2,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'prode_backend.settings')
+# Servir con un servidor ASGI (p. ej. `uvicorn prode_backend.asgi:application`,
+# con ASGI=1; ver deploy_readme) para habilitar el stream SSE de /api/events y
+# atender las vistas públicas async sin un hilo por request.
 application = get_asgi_application()
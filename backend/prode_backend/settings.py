@@ -25,6 +25,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Requests por vista/status para /api/metrics (primero: ve todas las respuestas)
+    'prode.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -55,10 +57,21 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'prode_backend.wsgi.application'
 
+# Perfil ASGI (uvicorn; ver deploy_readme): bajo ASGI cada request async usa su
+# propia conexión, así que las persistentes no se reutilizan: se usa el pool de psycopg.
+ASGI_PROFILE = os.environ.get('ASGI', '0') == '1'
+DB_POOL_MAX = int(os.environ.get('DB_POOL_MAX', '10'))  # conexiones por proceso
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        # Toma el lock de escritura al abrir la transacción: una lectura previa
+        # (p. ej. el estado anterior en upsert_prediction) no queda desactualizada
+        "OPTIONS": {"transaction_mode": "IMMEDIATE"},
+        # Base de test en archivo: la de memoria compartida bloquea por tabla sin
+        # esperar y no permite probar escrituras concurrentes desde varios hilos
+        "TEST": {"NAME": BASE_DIR / "test_db.sqlite3"},
     }
 }
 
@@ -66,9 +79,11 @@ DATABASES = {
 if os.getenv("DATABASE_URL"):
     DATABASES["default"] = dj_database_url.config(
         env="DATABASE_URL",
-        conn_max_age=60,            # pooling liviano
+        conn_max_age=0 if ASGI_PROFILE else 60,  # pooling liviano (WSGI)
         ssl_require=True            # Render usa SSL
     )
+    if ASGI_PROFILE:
+        DATABASES["default"].setdefault("OPTIONS", {})["pool"] = {"min_size": 1, "max_size": DB_POOL_MAX}
 
 
 AUTH_PASSWORD_VALIDATORS = []
@@ -135,3 +150,62 @@ if _cross:
 
 # Admin token TTL (segundos) para autenticación alternativa sin cookies
 ADMIN_TOKEN_TTL = int(os.environ.get('ADMIN_TOKEN_TTL', '86400'))  # 24h
+# Segundos que un token Bearer verificado evita volver a leer el usuario (0 desactiva).
+# Es por proceso: cambios hechos desde otro proceso se ven al vencer el TTL.
+ADMIN_AUTH_CACHE_TTL = int(os.environ.get('ADMIN_AUTH_CACHE_TTL', '30'))
+
+# Cache en memoria del proceso para respuestas casi estáticas (/api/results, /api/metadata).
+# TTL acota la desactualización entre procesos cuando se publica o borra un resultado.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'prode',
+    }
+}
+RESULTS_CACHE_TTL = int(os.environ.get('RESULTS_CACHE_TTL', '30'))
+METADATA_CACHE_TTL = int(os.environ.get('METADATA_CACHE_TTL', '3600'))
+# Páginas de /api/players: la clave incluye la versión de los contadores, el TTL solo libera memoria
+PLAYERS_CACHE_TTL = int(os.environ.get('PLAYERS_CACHE_TTL', '300'))
+# /api/consensus: segundos que se sirve el mismo consenso (se rearma leyendo ConsensusStat)
+CONSENSUS_CACHE_TTL = int(os.environ.get('CONSENSUS_CACHE_TTL', '15'))
+
+# /api/admin/overview: segundos que se reutilizan las cifras (un aggregate por vencimiento)
+ADMIN_STATS_TTL = int(os.environ.get('ADMIN_STATS_TTL', '5'))
+
+# Instrumentación por request (prode/profiling.py): Server-Timing, logs JSON e
+# histogramas en /api/admin/profiling. cProfile a pedido de staff con `X-Prode-Profile: 1`.
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', '0') == '1'
+PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', '0'))  # fracción de requests perfilados al azar
+if PROFILING_ENABLED:
+    MIDDLEWARE.insert(
+        MIDDLEWARE.index('django.contrib.auth.middleware.AuthenticationMiddleware') + 1,
+        'prode.profiling.ProfilingMiddleware',
+    )
+
+# /api/metrics: si se define, el scrape debe mandar `Authorization: Bearer <token>`
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+# Write-behind de /api/predictions (prode/submission_queue.py): los envíos validados van
+# a una cola SQLite local y un worker los escribe en lotes. Apagado por defecto.
+WRITE_BEHIND = os.environ.get('WRITE_BEHIND', '0') == '1'
+WRITE_BEHIND_PATH = os.environ.get('WRITE_BEHIND_PATH', str(BASE_DIR / 'write_behind.sqlite3'))
+WRITE_BEHIND_BATCH = int(os.environ.get('WRITE_BEHIND_BATCH', '200'))
+WRITE_BEHIND_INTERVAL = float(os.environ.get('WRITE_BEHIND_INTERVAL', '0.5'))  # segundos entre lotes
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {'console': {'class': 'logging.StreamHandler'}},
+    'loggers': {
+        # Una línea JSON por request cuando PROFILING_ENABLED=1
+        'prode.requests': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+        # Avisos de los módulos de la app (cola write-behind, scoring, métricas...)
+        'prode': {'handlers': ['console'], 'level': 'WARNING'},
+    },
+}
+
+# Server-Sent Events (/api/events, requiere ASGI)
+SSE_HEARTBEAT_SECONDS = int(os.environ.get('SSE_HEARTBEAT_SECONDS', '15'))
+SSE_POLL_SECONDS = int(os.environ.get('SSE_POLL_SECONDS', '5'))
+SSE_TOP_N = int(os.environ.get('SSE_TOP_N', '10'))  # 0 desactiva el diff de ranking
+SSE_QUEUE_SIZE = int(os.environ.get('SSE_QUEUE_SIZE', '16'))